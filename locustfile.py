@@ -1,9 +1,239 @@
-from locust import HttpUser, task, wait_time
+"""
+Tournament-day load test: spectators, the big-screen kiosk, captains and
+referees, with pass/fail thresholds per endpoint.
 
-class TournamentUser(HttpUser):
-    # Simulate a user waiting between 15-25 seconds (matching your auto-refresh)
-    wait_time = wait_time.between(15, 25)
+Run it headless against a seeded local copy, never the live site (referees
+really save scores):
+
+    export MGCL_DB_PATH=/tmp/mgcl-loadtest.sqlite3
+    python manage.py seed_loadtest              # programme, setup_users logins, loadtest.json
+    python manage.py run_recompute_worker --no-publish &   # drains results, leaves the live site's pages alone
+    python manage.py runserver --insecure 8000 &
+    locust -f locustfile.py --headless --host http://127.0.0.1:8000 --users 300 --spawn-rate 30 --run-time 5m
+
+Personas (weight): Spectator (80) reads fixtures, leaderboards and group
+tables; BigScreen (2 kiosks) polls the delta feed; Captain (5) picks squads;
+Referee (3) enters round-robin scores. Logins and match ids come from the
+fixtures file seed_loadtest writes (LOCUST_FIXTURES, default loadtest.json).
+
+When the run ends every endpoint is checked against SLOS (p95 latency, error
+rate) and locust exits 1 if any misses.
+
+Set LOCUST_STAFF_USER / LOCUST_STAFF_PASSWORD to a staff login and, when the
+run stops, the SQL queries the server spent on /championship/view/ are read
+from /metrics and printed. With the snapshot in place that should be ~0 per
+request.
+"""
+import itertools
+import json
+import os
+import random
+import re
+
+from locust import HttpUser, between, constant, events, task
+from locust.runners import WorkerRunner
+
+# (method, request name) -> (p95 ms, error ratio)
+SLOS = {
+    ("GET", "/fixtures/"): (500, 0.01),
+    ("GET", "/fixtures/[event]/groups/"): (500, 0.01),
+    ("GET", "/leaderboard/"): (500, 0.01),
+    ("GET", "/leaderboard/?fragment=standings"): (300, 0.01),
+    ("GET", "/leaderboard/data/"): (300, 0.01),
+    ("GET", "/championship/view/"): (300, 0.01),
+    ("GET", "/big-screen/"): (800, 0.01),
+    ("GET", "/big-screen/feed"): (200, 0.01),
+    ("GET", "/login/"): (500, 0.01),
+    ("POST", "/login/"): (1000, 0.01),
+    ("GET", "/captain-dashboard/"): (800, 0.02),
+    ("GET", "/match/[id]/select-squad/"): (800, 0.02),
+    ("POST", "/match/[id]/select-squad/"): (1000, 0.02),
+    ("GET", "/score/[id]/"): (800, 0.02),
+    ("POST", "/score/[id]/"): (1000, 0.02),
+}
+DEFAULT_SLO = (1000, 0.01)
+
+
+def load_fixtures():
+    path = os.environ.get("LOCUST_FIXTURES", "loadtest.json")
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise SystemExit(f"{path} not found: run `manage.py seed_loadtest` first (or set LOCUST_FIXTURES)")
+
+
+FIXTURES = load_fixtures()
+_captains = itertools.cycle(FIXTURES["captains"])
+
+
+class StaffSession(HttpUser):
+    """Logs in through the Django login form on start."""
+    abstract = True
+
+    def login(self, username, password):
+        self.client.get("/login/", name="/login/")
+        with self.client.post(
+            "/login/", name="/login/", allow_redirects=False, catch_response=True,
+            data={"username": username, "password": password, "csrfmiddlewaretoken": self.csrf_token()},
+            headers=self.form_headers("/login/"),
+        ) as response:
+            if response.status_code != 302:
+                response.failure(f"login as {username} returned {response.status_code}")
+
+    def csrf_token(self):
+        return self.client.cookies.get("csrftoken", "")
+
+    def form_headers(self, path):
+        # Django checks the Referer on HTTPS posts
+        return {"Referer": f"{self.host}{path}", "X-CSRFToken": self.csrf_token()}
+
+    def post_form(self, path, name, data):
+        """POST expecting the view's redirect; a re-rendered form is a failure."""
+        with self.client.post(
+            path, name=name, data={**data, "csrfmiddlewaretoken": self.csrf_token()},
+            headers=self.form_headers(path), allow_redirects=False, catch_response=True,
+        ) as response:
+            if response.status_code != 302:
+                response.failure(f"expected a redirect, got {response.status_code}")
+
+
+class Spectator(HttpUser):
+    weight = 80
+    wait_time = between(5, 15)
+
+    @task(4)
+    def fixtures(self):
+        self.client.get("/fixtures/")
+
+    @task(3)
+    def leaderboard(self):
+        self.client.get("/leaderboard/")
+
+    @task(3)
+    def leaderboard_refresh(self):
+        # what the open page fetches when /live/ reports a change
+        self.client.get("/leaderboard/?fragment=standings", name="/leaderboard/?fragment=standings")
+
+    @task(2)
+    def leaderboard_data(self):
+        self.client.get("/leaderboard/data/")
+
+    @task(2)
+    def group_table(self):
+        event = random.choice(FIXTURES["group_events"])
+        self.client.get(f"/fixtures/{event}/groups/", name="/fixtures/[event]/groups/")
+
+    @task(2)
+    def championship(self):
+        self.client.get("/championship/view/")
+
+
+class BigScreen(HttpUser):
+    """The venue kiosk: loads once, then pulls the delta feed."""
+    fixed_count = 2
+    wait_time = constant(15)
+
+    def on_start(self):
+        page = self.client.get("/big-screen/")
+        match = re.search(r"let revision = (\d+)", page.text)
+        self.revision = int(match.group(1)) if match else 0
+
+    @task
+    def pull_feed(self):
+        with self.client.get(
+            f"/big-screen/feed?since={self.revision}", name="/big-screen/feed", catch_response=True
+        ) as response:
+            try:
+                self.revision = response.json()["revision"]
+            except (ValueError, KeyError):
+                response.failure("feed did not return a revision")
+
+
+class Captain(StaffSession):
+    weight = 5
+    wait_time = between(20, 60)
+
+    def on_start(self):
+        self.account = next(_captains)
+        self.login(self.account["username"], self.account["password"])
+
+    @task(3)
+    def dashboard(self):
+        self.client.get("/captain-dashboard/")
+
+    @task(1)
+    def select_squad(self):
+        if not self.account["matches"]:
+            return
+        path = f"/match/{random.choice(self.account['matches'])}/select-squad/"
+        self.client.get(path, name="/match/[id]/select-squad/")
+        self.post_form(path, "/match/[id]/select-squad/", {"guest_name": "Load Test Guest"})
+
+
+class Referee(StaffSession):
+    weight = 3
+    wait_time = between(10, 30)
+
+    def on_start(self):
+        account = random.choice(FIXTURES["referees"])
+        self.login(account["username"], account["password"])
 
     @task
-    def view_standings(self):
-        self.client.get("/championship/view/")
\ No newline at end of file
+    def enter_score(self):
+        path = f"/score/{random.choice(FIXTURES['score_matches'])}/"
+        self.client.get(path, name="/score/[id]/")
+        s1, s2 = random.sample(range(0, 22), 2)
+        self.post_form(path, "/score/[id]/", {"team1_score": s1, "team2_score": s2})
+
+
+@events.quitting.add_listener
+def check_slos(environment, **kwargs):
+    """Fails the run (exit code 1) when any endpoint misses its SLO."""
+    if isinstance(environment.runner, WorkerRunner):
+        return   # the master checks the aggregated numbers
+    missed = []
+    print(f"\n{'SLO':<45} {'reqs':>7} {'p95 ms':>8} {'limit':>6} {'errors':>7} {'limit':>6}")
+    for entry in sorted(environment.stats.entries.values(), key=lambda e: (e.name, e.method)):
+        if not entry.num_requests:
+            continue
+        p95_limit, error_limit = SLOS.get((entry.method, entry.name), DEFAULT_SLO)
+        p95 = entry.get_response_time_percentile(0.95)
+        ok = p95 <= p95_limit and entry.fail_ratio <= error_limit
+        print(f"{'  ' if ok else '✗ '}{entry.method + ' ' + entry.name:<43} {entry.num_requests:>7} "
+              f"{p95:>8.0f} {p95_limit:>6} {entry.fail_ratio:>7.2%} {error_limit:>6.0%}")
+        if not ok:
+            missed.append(f"{entry.method} {entry.name}")
+    if missed:
+        print(f"SLOs missed: {', '.join(missed)}")
+        environment.process_exit_code = 1
+
+
+@events.test_stop.add_listener
+def report_db_activity(environment, **kwargs):
+    username, password = os.environ.get("LOCUST_STAFF_USER"), os.environ.get("LOCUST_STAFF_PASSWORD")
+    if not username or not environment.host:
+        return
+
+    import requests
+
+    session = requests.Session()
+    login = session.get(f"{environment.host}/login/")
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', login.text)
+    session.post(f"{environment.host}/login/", data={
+        "username": username, "password": password,
+        "csrfmiddlewaretoken": token.group(1) if token else "",
+    }, headers={"Referer": f"{environment.host}/login/"})
+    metrics = session.get(f"{environment.host}/metrics")
+    if metrics.status_code != 200:
+        print(f"Could not read /metrics ({metrics.status_code})")
+        return
+
+    def series(name):
+        m = re.search(rf'^{name}{{view="manual_championship_view"}} (\S+)$', metrics.text, re.M)
+        return float(m.group(1)) if m else 0.0
+
+    requests_seen = series("mgcl_request_queries_count")
+    queries = series("mgcl_request_queries_sum")
+    print(f"/championship/view/: {int(requests_seen)} requests, {int(queries)} SQL queries "
+          f"({queries / requests_seen if requests_seen else 0:.3f} per request, this worker process)")
@@ -1,3 +1,4 @@
+import hashlib
 import os
 from pathlib import Path
 
@@ -25,11 +26,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tournament.metrics.RequestMetricsMiddleware',  # first, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tournament.database.PublicReadsMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -56,13 +59,70 @@ TEMPLATES = [
 WSGI_APPLICATION = 'mgcl_tournament.wsgi.application'
 
 # Database - Pointing to your Master SQLite file
+# MGCL_DB_PATH points a run at another file, e.g. the load-test database
+DB_PATH = Path(os.environ.get('MGCL_DB_PATH', BASE_DIR / 'db_mgcl_2026_master.sqlite3'))
+
+# One SQLite file, two roles (see tournament/database.py): "default" is the
+# writer in WAL mode; "replica" is a read-only connection the public pages
+# read through, so spectators never queue behind referees saving scores.
+# WAL is what makes that true, so it is on unless MGCL_SQLITE_WAL=0. WAL is
+# recorded in the file itself; opt out for a run that must leave the file
+# byte-for-byte alone. Without WAL a reader blocks the writer's commit, so
+# the replica is dropped too and every read goes through the writer.
+SQLITE_WAL = os.environ.get('MGCL_SQLITE_WAL', '1') != '0'
+SQLITE_PRAGMAS = 'PRAGMA busy_timeout=20000'
+if SQLITE_WAL:
+    SQLITE_PRAGMAS = 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; ' + SQLITE_PRAGMAS
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db_mgcl_2026_master.sqlite3',
+        'NAME': DB_PATH,
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': SQLITE_PRAGMAS,
+        },
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{DB_PATH}?mode=ro',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'init_command': 'PRAGMA query_only=1',
+        },
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+if not SQLITE_WAL:
+    del DATABASES['replica']
+DATABASE_ROUTERS = ['tournament.database.PublicReadRouter']
+
+# Score entries queue a recompute; `manage.py run_recompute_worker` applies it.
+# Set to True to run the engine inline instead (no worker needed).
+RECOMPUTE_EAGER = False
+
+# Shared by every web/worker process (revision counter, cached pages). Entries
+# are prefixed with the database file they were built from, so pointing
+# MGCL_DB_PATH at another file never serves the master file's revision or pages.
+CACHES = {
+    'default': {
+        'BACKEND': 'tournament.metrics.MeteredFileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'cache',
+        'KEY_PREFIX': hashlib.sha1(str(DB_PATH.resolve()).encode()).hexdigest()[:12],
+        # per-revision payloads and per-event fixture blocks; the default 300 culls too eagerly
+        'OPTIONS': {'MAX_ENTRIES': 3000},
     }
 }
 
+# Monte Carlo runs per tournament revision, computed by the recompute worker
+# when its queue is idle. 0 disables the odds page refresh.
+SIMULATION_RUNS = 100_000
+
 # Fix for the W042 Warnings in your logs
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -88,6 +148,11 @@ MEDIA_URL = '/media/'
 #MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Pre-rendered public pages for Nginx (tournament.publisher); None turns it off.
+# PUBLISH_BASE_URL is the host the pages are rendered for (QR codes, absolute links).
+PUBLISH_ROOT = BASE_DIR / 'published'
+PUBLISH_BASE_URL = 'https://mgcl.areakpi.in'
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'Asia/Kolkata' # Updated for local club context
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from tournament import views 
+from tournament.live import live_stream
 from django.conf import settings
 from django.conf.urls.static import static
 from django.conf import settings
@@ -26,8 +27,10 @@ urlpatterns = [
 
     # --- MAIN PAGES ---
     path('fixtures/', views.fixtures, name='fixtures'),
+    path('fixtures/<int:event_pk>/groups/', views.group_table_view, name='group_table'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
     path('big-screen/', views.big_screen, name='big_screen'), 
+    path('big-screen/feed', views.big_screen_feed, name='big_screen_feed'),
 
     # --- CAPTAIN'S PORTAL ---
     path('captain-dashboard/', views.captain_dashboard, name='captain_dashboard'),
@@ -47,6 +50,17 @@ urlpatterns = [
     # --- SCORING & DATA ---
     path('score/<int:match_id>/', views.score_entry, name='score_entry'),
     path('leaderboard/data/', views.leaderboard_data, name='leaderboard_data'),
+    path('recompute/status/', views.recompute_status, name='recompute_status'),
+    path('odds/', views.odds, name='odds'),
+    path('metrics', views.metrics, name='metrics'),
+    path('export/<slug:name>.csv', views.export_csv, name='export_csv'),
+    path('export/<slug:name>.xlsx', views.export_xlsx, name='export_xlsx'),
+
+    # --- PAPER SCORESHEETS ---
+    path('scoresheets/', views.scoresheet_queue, name='scoresheet_queue'),
+    path('scoresheets/<int:scan_id>/', views.scoresheet_review, name='scoresheet_review'),
+    path('scoresheets/print/', views.scoresheet_print, name='scoresheet_print'),
+    path('live/', live_stream, name='live_stream'),
 ] 
 
 # Serve media files (logo/icons) in local development
@@ -1,7 +1,10 @@
 from django.contrib import admin
+from django.db.models import Count
+from .bracket import compile_bracket
 from .models import (
-    Sport, Team, Player, Event, Match,
-    ChampionshipStanding, BridgeGroupResult, SwimmingResult
+    Sport, Pool, Team, Player, Event, Match,
+    ChampionshipStanding, BridgeGroupResult, SwimmingResult, EventPoints,
+    RecomputeRequest, TournamentRevision, SimulationResult, ScoresheetScan
 )
 
 # ============================================
@@ -36,9 +39,13 @@ class TeamAdmin(admin.ModelAdmin):
     search_fields = ("name", "code", "owners")
     inlines = [PlayerInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(player_count=Count("players"))
+
     def get_player_count(self, obj):
-        return obj.players.count()
+        return obj.player_count
     get_player_count.short_description = "Players"
+    get_player_count.admin_order_field = "player_count"
 
 # ============================================
 # 4. MATCH ADMIN
@@ -48,11 +55,13 @@ class MatchAdmin(admin.ModelAdmin):
     list_display = (
         "event", "match_no", "group", 
         "team1", "team2", 
-        "completed", "winner"
+        "completed", "winner_team"
     )
     list_filter = ("event__sport", "group", "completed", "date")
     search_fields = ("event__name", "team1__name", "team2__name")
     ordering = ("event", "match_no")
+    list_select_related = ("event__sport", "team1", "team2", "winner_team")
+    readonly_fields = ("winner", "loser")
 
     fieldsets = (
         ("Match Details", {
@@ -68,10 +77,19 @@ class MatchAdmin(admin.ModelAdmin):
             "fields": (("date", "time"), ("venue_type", "venue_no"))
         }),
         ("Result", {
-            "fields": ("completed", ("team1_score", "team2_score"), ("winner", "loser"))
+            "fields": ("completed", ("team1_score", "team2_score"), ("winner_team", "loser_team"), ("winner", "loser"))
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        if {"winner_team", "loser_team"} & set(form.changed_data):
+            obj.winner = obj.winner_team.name if obj.winner_team else None
+            obj.loser = obj.loser_team.name if obj.loser_team else None
+        super().save_model(request, obj, form, change)
+        # Rules are only parsed here and at load time, not on every score entry
+        if {"opponent_rule", "match_type", "event"} & set(form.changed_data):
+            compile_bracket(obj.event)
+
     def has_change_permission(self, request, obj=None):
         if obj and obj.event.is_locked:
             return False
@@ -94,5 +112,37 @@ class ChampionshipStandingAdmin(admin.ModelAdmin):
     list_display = ('team', 'total_points', 'gold', 'silver', 'bronze')
     ordering = ('-total_points', '-gold')
 
+@admin.register(EventPoints)
+class EventPointsAdmin(admin.ModelAdmin):
+    list_display = ("event", "team", "points", "gold", "silver", "bronze")
+    list_filter = ("event__sport", "team")
+
+@admin.register(RecomputeRequest)
+class RecomputeRequestAdmin(admin.ModelAdmin):
+    list_display = ("event", "status", "requested_at", "started_at")
+    list_filter = ("status",)
+
+@admin.register(TournamentRevision)
+class TournamentRevisionAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "event", "created_at")
+    list_filter = ("kind",)
+
+@admin.register(SimulationResult)
+class SimulationResultAdmin(admin.ModelAdmin):
+    list_display = ("revision", "runs", "elapsed", "created_at")
+    exclude = ("payload",)
+
+@admin.register(ScoresheetScan)
+class ScoresheetScanAdmin(admin.ModelAdmin):
+    list_display = ("source", "match", "team1_score", "team2_score", "confidence", "status", "created_at")
+    list_filter = ("status",)
+    list_select_related = ("match__event__sport",)
+    raw_id_fields = ("match",)
+
+@admin.register(Pool)
+class PoolAdmin(admin.ModelAdmin):
+    list_display = ("code", "name", "order")
+    list_editable = ("name", "order")
+
 admin.site.register(Sport)
 admin.site.register(Event)
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+Bracket compiler.
+
+Turns the free-text Match.opponent_rule of each knockout match
+("1st of Group A vs 2nd of Group B", "Winners SF", ...) into BracketSlot rows
+once, when the schedule is loaded. The engine then resolves brackets from the
+slots alone (engine.resolve_bracket) instead of re-reading the rule strings.
+
+knockout_plan() writes those rules for any number of pools: cross-pool first
+round, then quarters/semis/final, a 3-4 playoff and, when there are quarter
+finals, 5-8 playoffs from their losers. When the qualifiers don't fill a
+power of two the top seeds get byes: their rule names the pool place
+directly in the next round ("1st of Group A vs Winner of QF2").
+"""
+import re
+
+from django.db import transaction
+
+from .models import BracketSlot, Match
+
+# "1st of Group A", "2nd B", "3rd of Group NE" (Pool.code is up to three characters;
+# without the word "group" only a single letter counts, so "3rd Place" isn't a pool)
+RANK_RULE = re.compile(r"\b(\d+)(?:st|nd|rd|th)\s+(?:of\s+)?(?:group\s+([a-z0-9]{1,3})|([a-z]))\b")
+
+# "Winner of QF1 vs Winner of QF2", "Loser of SF1 vs Loser of SF2", ...
+MATCH_RULE = re.compile(r"\b(winner|loser)s?\s+(?:of\s+)?([a-z]{1,2}\d)\b")
+
+# "Winners SF" / "Loser of Semi Finals" pair up the two semi-finals
+SEMI_FINALS = ("SF1", "SF2")
+
+# Match type prefix by number of matches in the round
+ROUND_PREFIX = {8: "EF", 4: "QF", 2: "SF"}
+
+# The largest first round ROUND_PREFIX has names for
+MAX_ENTRANTS = 16
+
+
+def parse_opponent_rule(rule):
+    """Returns the two (source, group, rank, from_match_type) tuples a rule
+    describes, or None for ordinary fixtures and group-stage aggregates."""
+    text = " ".join((rule or "").lower().split())
+    source = {"winner": BracketSlot.WINNER, "loser": BracketSlot.LOSER}
+    sides = sorted(
+        [(m.start(), (BracketSlot.GROUP, (m[2] or m[3]).upper(), int(m[1]), None)) for m in RANK_RULE.finditer(text)]
+        + [(m.start(), (source[m[1]], "", None, m[2].upper())) for m in MATCH_RULE.finditer(text)]
+    )
+    if len(sides) == 2:
+        return [side for _, side in sides]
+    if "winner" in text:
+        return [(BracketSlot.WINNER, "", None, mt) for mt in SEMI_FINALS]
+    if "loser" in text:
+        return [(BracketSlot.LOSER, "", None, mt) for mt in SEMI_FINALS]
+    return None
+
+
+def build_slots(matches):
+    """Unsaved slots for a single event's matches."""
+    by_type = {m.match_type: m for m in matches}
+    slots = []
+    for m in matches:
+        parsed = parse_opponent_rule(m.opponent_rule)
+        if not parsed:
+            continue
+        if any(ref and ref not in by_type for _, _, _, ref in parsed):
+            continue
+        for position, (source, group, rank, ref) in enumerate(parsed, start=1):
+            slots.append(BracketSlot(
+                match=m, position=position, source=source,
+                source_group=group, source_rank=rank,
+                source_match=by_type[ref] if ref else None,
+            ))
+    return slots
+
+
+def compile_bracket(event):
+    """(Re)builds the slot graph for one event."""
+    slots = build_slots(list(Match.objects.filter(event=event)))
+    with transaction.atomic():
+        BracketSlot.objects.filter(match__event=event).delete()
+        BracketSlot.objects.bulk_create(slots)
+    return slots
+
+
+def seed_order(n):
+    """Bracket positions for n seeds (a power of two): 1 and 2 can only meet
+    in the final, 1-4 not before the semis, and so on."""
+    order = [1]
+    while len(order) < n:
+        total = len(order) * 2 + 1
+        order = [x for seed in order for x in (seed, total - seed)]
+    return order
+
+
+def knockout_plan(pools, advance=2, thirds=False):
+    """[(match_type, opponent_rule), ...] in playing order for a knockout
+    fed by the top `advance` teams of each pool (pool codes, in order).
+
+    Seed k meets seed N+1-k in the first round, pool winners being the top
+    seeds; N is the qualifier count rounded up to a power of two and the
+    missing seeds are byes, so the top seeds go straight to the second
+    round. With two qualifiers per pool each runner-up is drawn into the
+    other half of the bracket from its pool winner, so pool mates can only
+    meet in the final (1st A vs 2nd B and 1st B vs 2nd A for two pools).
+    thirds=True adds the traditional "3rd of Group A vs 3rd of Group B" 5-6
+    playoff when there are two pools and no quarter finals.
+
+    Raises ValueError for fewer than 2 or more than MAX_ENTRANTS qualifiers."""
+    pools = list(pools)
+    entrants = len(pools) * advance
+    if not 2 <= entrants <= MAX_ENTRANTS:
+        raise ValueError(
+            f"{len(pools)} pools x {advance} qualifiers gives {entrants} teams; "
+            f"a knockout takes 2 to {MAX_ENTRANTS}"
+        )
+
+    size = 1 << (entrants - 1).bit_length()
+    order = seed_order(size)
+    seeds = [f"{_ordinal(rank)} of Group {pool}" for rank in range(1, advance + 1) for pool in pools]
+    if advance == 2 and len(pools) > 1:
+        top_half = {seed: i < size // 2 for i, seed in enumerate(order)}
+        winners, runners_up = range(1, len(pools) + 1), range(len(pools) + 1, entrants + 1)
+        for top in (True, False):
+            places = sorted((s for s in runners_up if top_half[s] == top), reverse=True)
+            rivals = sorted(w for w in winners if top_half[w] != top)
+            for seed, w in zip(places, rivals):
+                seeds[seed - 1] = f"2nd of Group {pools[w - 1]}"
+    if size == 2:
+        return [("F", f"{seeds[0]} vs {seeds[1]}")]
+
+    plan, played = [], {}
+    prefix = ROUND_PREFIX[size // 2]
+    sides = []
+    for i in range(0, size, 2):
+        a, b = order[i], order[i + 1]
+        if b > entrants:
+            sides.append(seeds[a - 1])
+            continue
+        first_round = played.setdefault(prefix, [])
+        code = f"{prefix}{len(first_round) + 1}"
+        plan.append((code, f"{seeds[a - 1]} vs {seeds[b - 1]}"))
+        first_round.append(code)
+        sides.append(f"Winner of {code}")
+
+    while len(sides) > 2:
+        prefix = ROUND_PREFIX[len(sides) // 2]
+        codes = [f"{prefix}{i}" for i in range(1, len(sides) // 2 + 1)]
+        plan += [(code, f"{sides[2 * i]} vs {sides[2 * i + 1]}") for i, code in enumerate(codes)]
+        played[prefix] = codes
+        sides = [f"Winner of {code}" for code in codes]
+
+    quarters, semis = played.get("QF", []), played.get("SF", [])
+    if len(quarters) == 4:
+        plan += [
+            ("PQ1", f"Loser of {quarters[0]} vs Loser of {quarters[1]}"),
+            ("PQ2", f"Loser of {quarters[2]} vs Loser of {quarters[3]}"),
+            ("P78", "Loser of PQ1 vs Loser of PQ2"),
+            ("P56", "Winner of PQ1 vs Winner of PQ2"),
+        ]
+    elif len(quarters) == 2:
+        plan.append(("P56", f"Loser of {quarters[0]} vs Loser of {quarters[1]}"))
+    elif thirds and len(pools) == 2 and not quarters:
+        plan.append(("P56", f"3rd of Group {pools[0]} vs 3rd of Group {pools[1]}"))
+    if len(semis) == 2:
+        plan.append(("P34", f"Loser of {semis[0]} vs Loser of {semis[1]}"))
+    plan.append(("F", f"{sides[0]} vs {sides[1]}"))
+    return plan
+
+
+def _ordinal(n):
+    return f"{n}{'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')}"
@@ -0,0 +1,98 @@
+"""
+SQLite connection roles.
+
+"default" is the writer: WAL journal, IMMEDIATE transactions (the write
+lock is taken at BEGIN, where the busy timeout applies, instead of failing
+on a lock upgrade mid-transaction) and a 20 s busy timeout. "replica" opens
+the same file read-only. In WAL mode readers never wait for the writer and
+the writer never waits for readers. With MGCL_SQLITE_WAL=0 (see settings)
+there is no replica and every read goes to the writer.
+
+PublicReadsMiddleware sends the ORM reads of the public pages (PUBLIC_VIEWS,
+GET/HEAD only) to the replica. Everything else, including staff pages,
+management commands and anything inside a transaction on the writer, reads
+from "default", so a request always sees its own writes.
+
+retry_on_locked wraps a writer in a transaction and reruns it, with backoff,
+when SQLite still reports "database is locked" after the busy timeout.
+"""
+import functools
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from django.urls import Resolver404, resolve
+
+DEFAULT, REPLICA = "default", "replica"
+
+# url names whose GET requests read from the replica
+PUBLIC_VIEWS = {
+    "login_selection", "fixtures", "group_table", "leaderboard", "leaderboard_data",
+    "big_screen", "big_screen_feed", "manual_championship_view", "odds", "recompute_status",
+}
+
+_public_read = ContextVar("tournament_public_read", default=False)
+
+
+class PublicReadRouter:
+    def db_for_read(self, model, **hints):
+        if _public_read.get() and REPLICA in settings.DATABASES and not connections[DEFAULT].in_atomic_block:
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True   # same database file
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT
+
+
+class PublicReadsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in ("GET", "HEAD") or _url_name(request.path_info) not in PUBLIC_VIEWS:
+            return self.get_response(request)
+        token = _public_read.set(True)
+        try:
+            return self.get_response(request)
+        finally:
+            _public_read.reset(token)
+
+
+def _url_name(path):
+    try:
+        return resolve(path).url_name
+    except Resolver404:
+        return None
+
+
+def is_locked(exc):
+    return isinstance(exc, OperationalError) and "locked" in str(exc)
+
+
+def retry_on_locked(func=None, *, attempts=4, delay=0.1):
+    """Runs func in a transaction on the writer; if SQLite is still locked
+    after its busy timeout, rolls back and tries again with exponential
+    backoff and jitter. Inside an outer transaction there is nothing safe to
+    rerun, so the error is raised as is."""
+    if func is None:
+        return functools.partial(retry_on_locked, attempts=attempts, delay=delay)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic(using=DEFAULT):
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if not is_locked(exc) or attempt == attempts - 1 or connections[DEFAULT].in_atomic_block:
+                    raise
+            time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
@@ -1,241 +1,364 @@
-from django.db.models import Q
-from .models import Match, ChampionshipStanding, Team, BridgeGroupResult, SwimmingResult
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from .models import (
+    Match, ChampionshipStanding, Team, BridgeGroupResult, SwimmingResult, EventPoints, BracketSlot,
+    ManualEventResult,
+)
+from .revision import bump_revision
 
 def update_championship(event):
     """Main entry point for calculations."""
     calculate_group_standings(event)
     
-    sport_name = event.sport.name.lower()
-    
     # --- SWIMMING UNLOCK ---
-    if "swimming" in sport_name:
-        unlock_swimming_finals(event)
-        return
+    if "swimming" in event.sport.name.lower():
+        changed = unlock_swimming_finals(event)
+    else:
+        changed = [m.pk for m in resolve_bracket(event)]
 
-    # --- BRIDGE UNLOCK ---
-    if "bridge" in sport_name:
-        unlock_bridge_brackets(event)
-        return
-        
-    update_bracket_matches(event)
+    rev = bump_revision("standings", event.pk)
+    if changed:
+        # bulk writes skip post_save, so stamp the filled-in matches here
+        Match.objects.filter(pk__in=changed).update(revision=rev)
 
 def unlock_swimming_finals(event):
-    """Physically assigns teams to swimming matches so they aren't 'None'."""
-    swimming_matches = Match.objects.filter(event=event)
+    """Physically assigns teams to swimming matches so they aren't 'None'.
+    Returns the ids of the matches it filled."""
     placeholder_team = Team.objects.first()
-    for m in swimming_matches:
-        if m.team1 is None or m.team2 is None:
-            m.team1 = placeholder_team
-            m.team2 = placeholder_team
-            m.save()
-
-def unlock_bridge_brackets(event):
-    """Unlocks Bridge Playoffs using BridgeGroupResult table."""
-    res_a = BridgeGroupResult.objects.filter(event=event, group="A").first()
-    res_b = BridgeGroupResult.objects.filter(event=event, group="B").first()
-
-    if res_a and res_b:
-        bracket = Match.objects.filter(event=event, group="A&B")
-        for m in bracket:
-            if m.completed: continue
-            rule = (m.opponent_rule or "").lower()
-            
-            # Match 3: SF 1 (1st A vs 2nd B)
-            if "1st of group a" in rule or "2nd of group b" in rule:
-                m.team1, m.team2 = res_a.first, res_b.second
-                auto_assign_squad(m)
-                m.save()
-            # Match 4: SF 2 (1st B vs 2nd A)
-            elif "1st of group b" in rule or "2nd of group a" in rule:
-                m.team1, m.team2 = res_b.first, res_a.second
-                auto_assign_squad(m)
-                m.save()
-            # Match 5: 5-6 Position (3rd A vs 3rd B)
-            elif "3rd of group a" in rule or "3rd of group b" in rule:
-                m.team1, m.team2 = res_a.third, res_b.third
-                auto_assign_squad(m)
-                m.save()
-
-        # Unlock Finals and 3rd Place Match (Match 6) based on Semi results
-        update_bridge_playoff_advancement(event)
-
-def update_bridge_playoff_advancement(event):
-    """Specifically unlocks Match 6 (3rd Place) and Match 7 (Finals) for Bridge."""
-    bracket_qs = Match.objects.filter(event=event, group="A&B")
-    
-    # 1. Identify completed Semi-Finals
-    # We look for Match 3 and Match 4 specifically
-    sf_done = bracket_qs.filter(completed=True).filter(
-        Q(match_no=3) | Q(match_no=4)
-    ).order_by('match_no')
-
-    # 2. Only proceed if BOTH Semi-Finals are done
-    if sf_done.count() >= 2:
-        sf1 = sf_done.filter(match_no=3).first()
-        sf2 = sf_done.filter(match_no=4).first()
-        
-        def get_w(m): return m.team1 if m.winner == m.team1.name else m.team2
-        def get_l(m): return m.team2 if m.winner == m.team1.name else m.team1
-
-        # --- UNLOCK MATCH 6 (3-4 Position / 3rd Place) ---
-        # Loser of SF1 vs Loser of SF2
-        m6 = bracket_qs.filter(match_no=6).first()
-        if m6 and not m6.completed:
-            m6.team1, m6.team2 = get_l(sf1), get_l(sf2)
-            auto_assign_squad(m6) # Carry forward players even if incomplete
-            m6.save()
-
-        # --- UNLOCK MATCH 7 (Finals) ---
-        # Winner of SF1 vs Winner of SF2
-        m7 = bracket_qs.filter(match_no=7).first()
-        if m7 and not m7.completed:
-            m7.team1, m7.team2 = get_w(sf1), get_w(sf2)
-            auto_assign_squad(m7) # Automatically populate squad to prevent blocking
-            m7.save()
+    ids = list(Match.objects.filter(event=event).filter(Q(team1=None) | Q(team2=None)).values_list("pk", flat=True))
+    if ids:
+        Match.objects.filter(pk__in=ids).update(team1=placeholder_team, team2=placeholder_team)
+    return ids
+
+def resolve_bracket(event):
+    """Fills knockout matches from the event's compiled BracketSlots.
+
+    One pass in dependency order over matches held in memory; every match
+    whose teams changed is written back with a single bulk_update."""
+    matches = {m.pk: m for m in Match.objects.filter(event=event)}
+    slots = {}
+    for slot in BracketSlot.objects.filter(match__event=event):
+        slots.setdefault(slot.match_id, {})[slot.position] = slot
+    if not slots: return []
+
+    groups = {s.source_group for pair in slots.values() for s in pair.values() if s.source == BracketSlot.GROUP}
+    changed = fill_bracket(matches, slots, get_group_rankings(event, groups))
+    Match.objects.bulk_update(changed, ["team1", "team2", "team1_players", "team2_players"])
+    return changed
+
+def fill_bracket(matches, slots, rankings):
+    """Sets team1/team2 (and a guessed squad) on every undecided knockout match
+    whose slots can be resolved. Works on the objects passed in; returns the
+    ones it changed without saving them."""
+    changed = []
+    for match in bracket_order(matches, slots):
+        pair = slots[match.pk]
+        if match.completed or len(pair) < 2: continue
+        team1_id = resolve_slot(pair[1], matches, rankings)
+        team2_id = resolve_slot(pair[2], matches, rankings)
+        if team1_id is None or team2_id is None: continue
+        if (match.team1_id, match.team2_id) == (team1_id, team2_id): continue
+
+        if match.team1_id != team1_id: match.team1_players = ""
+        if match.team2_id != team2_id: match.team2_players = ""
+        match.team1_id, match.team2_id = team1_id, team2_id
+        auto_assign_squad(match, matches.values())
+        changed.append(match)
+    return changed
+
+def bracket_order(matches, slots):
+    """Bracket matches ordered so every feeder comes before the matches it feeds."""
+    deps = {
+        pk: {s.source_match_id for s in pair.values() if s.source_match_id in slots}
+        for pk, pair in slots.items()
+    }
+    ordered, done = [], set()
+    while deps:
+        ready = sorted((pk for pk, needs in deps.items() if needs <= done), key=lambda pk: matches[pk].match_no)
+        if not ready: break  # cycle: leave the rest untouched
+        for pk in ready:
+            ordered.append(matches[pk])
+            done.add(pk)
+            del deps[pk]
+    return ordered
+
+def resolve_slot(slot, matches, rankings):
+    """Team id a slot points at right now, or None if it isn't decided yet."""
+    if slot.source == BracketSlot.GROUP:
+        ranked = rankings.get(slot.source_group, [])
+        return ranked[slot.source_rank - 1] if len(ranked) >= slot.source_rank else None
+
+    src = matches.get(slot.source_match_id)
+    if not src or not src.completed: return None
+    return src.winner_team_id if slot.source == BracketSlot.WINNER else src.loser_team_id
+
+def get_group_rankings(event, groups):
+    """{group: [team_id, ...]} best first. Bridge ranks come from the aggregate
+    BridgeGroupResult; everything else from the round-robin table."""
+    if "bridge" in event.sport.name.lower():
+        results = BridgeGroupResult.objects.filter(event=event, group__in=groups)
+        return {r.group: [r.first_id, r.second_id, r.third_id] for r in results}
+    return {g: [t.pk for t in teams] for g, teams in group_tables(event, groups).items()}
 
 def calculate_group_standings(event):
-    """Calculates points based on the 100/70/50/40/30/10 scale."""
-    all_teams = Team.objects.all()
-    for t in all_teams:
-        standing, _ = ChampionshipStanding.objects.get_or_create(team=t)
-        standing.total_points, standing.gold, standing.silver, standing.bronze = 0, 0, 0, 0
-        standing.save()
+    """Rewrites this event's ledger rows on the 100/70/50/40/30/10 scale.
+    Other events' rows are left alone."""
+    ledger = PointsAccumulator(event)
+    collect_event_points(event, ledger)
+    ledger.flush()
+
+# match_type -> (winner points, winner medal, loser points, loser medal)
+PLACEMENT_POINTS = {
+    "F": (100, "gold", 70, "silver"),
+    "P34": (50, "bronze", 40, ""),
+    "P56": (30, "", 10, ""),
+}
+
+def collect_event_points(event, ledger):
+    """Feeds every placement this event has decided so far into the ledger."""
+    sport_name = event.sport.name.lower()
+    if "swimming" in sport_name:
+        award_event_points(event, ledger, swimming=SwimmingResult.objects.filter(event=event).first())
+        return
+    knockout = Match.objects.filter(event=event, group=Match.KNOCKOUT, completed=True)
+    bridge = BridgeGroupResult.objects.filter(event=event) if "bridge" in sport_name else ()
+    award_event_points(event, ledger, knockout=knockout, bridge=bridge)
 
+def award_event_points(event, ledger, knockout=(), bridge=(), swimming=None):
+    """The scoring rules over results already in hand: completed knockout
+    matches, the event's BridgeGroupResults and its SwimmingResult."""
     sport_name = event.sport.name.lower()
 
     if "swimming" in sport_name:
-        res = SwimmingResult.objects.filter(event=event).first()
+        res = swimming
         if res:
-            award_points(res.first, 100, "gold")
-            award_points(res.second, 70, "silver")
-            award_points(res.third, 50, "bronze")
-            award_points(res.fourth, 40, "")
-            award_points(res.fifth, 30, "")
-            award_points(res.sixth, 10, "")
+            ledger.award(res.first_id, 100, "gold")
+            ledger.award(res.second_id, 70, "silver")
+            ledger.award(res.third_id, 50, "bronze")
+            ledger.award(res.fourth_id, 40, "")
+            ledger.award(res.fifth_id, 30, "")
+            ledger.award(res.sixth_id, 10, "")
         return
 
-    if "bridge" in sport_name:
-        bridge_rankings = BridgeGroupResult.objects.filter(event=event)
-        for res in bridge_rankings:
-            award_points(res.first, 100, "gold")
-            award_points(res.second, 70, "silver")
-            award_points(res.third, 50, "bronze")
-        if bridge_rankings.exists() and not Match.objects.filter(event=event, group="A&B", completed=True).exists():
-            return
+    bracket = {m.match_type: m for m in knockout if m.group == Match.KNOCKOUT and m.completed}
 
-    bracket = Match.objects.filter(event=event, group="A&B", completed=True)
-    
-    # Finals (100/70 pts)
-    f_match = bracket.filter(Q(match_type="F") | Q(opponent_rule__icontains="winner")).first()
-    if f_match:
-        win_obj = f_match.team1 if f_match.winner == f_match.team1.name else f_match.team2
-        lose_obj = f_match.team2 if f_match.winner == f_match.team1.name else f_match.team1
-        award_points(win_obj, 100, "gold")
-        award_points(lose_obj, 70, "silver")
-
-    # 3rd Place Match (50/40 pts) - Match 6
-    p34_match = bracket.filter(Q(match_no=6) | Q(match_type="P34") | Q(opponent_rule__icontains="loser")).first()
-    if p34_match:
-        win_obj = p34_match.team1 if p34_match.winner == p34_match.team1.name else p34_match.team2
-        lose_obj = p34_match.team2 if p34_match.winner == p34_match.team1.name else p34_match.team1
-        award_points(win_obj, 50, "bronze")
-        award_points(lose_obj, 40, "")
-
-    # 5-6 Playoff (30/10 pts) - Match 5
-    p56_match = bracket.filter(Q(match_no=5) | Q(match_type="P56") | Q(opponent_rule__icontains="3rd")).first()
-    if p56_match:
-        win_obj = p56_match.team1 if p56_match.winner == p56_match.team1.name else p56_match.team2
-        lose_obj = p56_match.team2 if p56_match.winner == p56_match.team1.name else p56_match.team1
-        award_points(win_obj, 30, "")
-        award_points(lose_obj, 10, "")
-
-def award_points(team, points, medal):
-    if not team: return
-    s, _ = ChampionshipStanding.objects.get_or_create(team=team)
-    s.total_points += points
-    if medal == "gold": s.gold += 1
-    elif medal == "silver": s.silver += 1
-    elif medal == "bronze": s.bronze += 1
-    s.save()
-
-def auto_assign_squad(match):
+    if "bridge" in sport_name and not bracket:
+        # Group rankings only count until the playoffs start scoring
+        for res in bridge:
+            ledger.award(res.first_id, 100, "gold")
+            ledger.award(res.second_id, 70, "silver")
+            ledger.award(res.third_id, 50, "bronze")
+        return
+
+    # Finals 100/70, 3-4 Position 50/40, 5-6 Position 30/10
+    for match_type, (win_pts, win_medal, lose_pts, lose_medal) in PLACEMENT_POINTS.items():
+        m = bracket.get(match_type)
+        if m:
+            ledger.award(m.winner_team_id, win_pts, win_medal)
+            ledger.award(m.loser_team_id, lose_pts, lose_medal)
+
+class PointsAccumulator:
+    """Collects one event's point and medal deltas in memory.
+    flush() writes only the ledger rows that changed and re-totals the
+    standings of the teams they belong to, so a recompute touches this
+    event's teams only."""
+
+    MEDALS = ("gold", "silver", "bronze")
+
+    def __init__(self, event):
+        self.event = event
+        self.rows = {}
+
+    def award(self, team_id, points, medal=""):
+        if not team_id: return
+        row = self.rows.setdefault(team_id, EventPoints(event=self.event, team_id=team_id))
+        row.points += points
+        if medal in self.MEDALS:
+            setattr(row, medal, getattr(row, medal) + 1)
+
+    FIELDS = ("points", "gold", "silver", "bronze")
+
+    def diff(self, old):
+        """Compares the collected rows with the stored ones ({team_id: EventPoints}).
+        Returns (added, changed, removed pks, {team_id: [points, gold, silver, bronze] delta})."""
+        added, changed, deltas = [], [], {}
+        for team_id in old.keys() | self.rows.keys():
+            before, after = old.get(team_id), self.rows.get(team_id)
+            was = tuple(getattr(before, f) for f in self.FIELDS) if before else (0, 0, 0, 0)
+            now = tuple(getattr(after, f) for f in self.FIELDS) if after else (0, 0, 0, 0)
+            if was == now: continue
+            deltas[team_id] = [n - w for n, w in zip(now, was)]
+            if after is None: continue
+            if before is None:
+                added.append(after)
+            else:
+                after.pk = before.pk
+                changed.append(after)
+        removed = [r.pk for team_id, r in old.items() if team_id not in self.rows]
+        return added, changed, removed, deltas
+
+    def flush(self):
+        with transaction.atomic():
+            old = {r.team_id: r for r in EventPoints.objects.filter(event=self.event)}
+            added, changed, removed, deltas = self.diff(old)
+            EventPoints.objects.filter(pk__in=removed).delete()
+            EventPoints.objects.bulk_create(added)
+            EventPoints.objects.bulk_update(changed, self.FIELDS)
+            if deltas:
+                refresh_championship_totals(deltas)
+
+def refresh_championship_totals(team_ids=None):
+    """Rebuilds standings from a single aggregate over the ledger: those of
+    team_ids, or every team's. total_points is always the sum of the team's
+    ledger rows, never an increment on whatever the standing held before
+    (the manual sheet writes there too). Callers wrap it in a transaction."""
+    ledger = EventPoints.objects.all()
+    standings = ChampionshipStanding.objects.all()
+    if team_ids is None:
+        team_ids = Team.objects.values_list("id", flat=True)
+    else:
+        team_ids = list(team_ids)
+        ledger = ledger.filter(team_id__in=team_ids)
+        standings = standings.filter(team_id__in=team_ids)
+    totals = {
+        row["team"]: row for row in ledger.values("team").annotate(
+            pts=Sum("points"), g=Sum("gold"), s=Sum("silver"), b=Sum("bronze")
+        )
+    }
+    standings = {s.team_id: s for s in standings}
+    changed, missing = [], []
+    for team_id in team_ids:
+        row = totals.get(team_id, {})
+        new = (row.get("pts") or 0, row.get("g") or 0, row.get("s") or 0, row.get("b") or 0)
+        s = standings.get(team_id)
+        if s is None:
+            s = ChampionshipStanding(team_id=team_id)
+            missing.append(s)
+        elif (s.total_points, s.gold, s.silver, s.bronze) == new:
+            continue
+        else:
+            changed.append(s)
+        s.total_points, s.gold, s.silver, s.bronze = new
+
+    ChampionshipStanding.objects.bulk_create(missing)
+    ChampionshipStanding.objects.bulk_update(changed, ["total_points", "gold", "silver", "bronze"])
+
+# --- MANUAL CHAMPIONSHIP SHEET ---
+
+MANUAL_MEDALS = {"1": 1, "2": 2, "3": 3}  # pos -> index into [gross, gold, silver, bronze]
+
+def manual_totals(team_codes):
+    """{code: [gross, gold, silver, bronze]} from one pass over the manual sheet."""
+    totals = {code: [0, 0, 0, 0] for code in team_codes}
+    for results_data in ManualEventResult.objects.values_list("results_data", flat=True):
+        for code, cell in (results_data or {}).items():
+            row = totals.get(code)
+            if row is None: continue
+            row[0] += int(cell.get("pts") or 0)
+            medal = MANUAL_MEDALS.get(str(cell.get("pos") or "").strip())
+            if medal: row[medal] += 1
+    return totals
+
+def rank_manual_standings(penalties=None):
+    """Rewrites gross/penalty/total/rank of every standing from the manual sheet
+    with one bulk_update. Ranking is competition style ("1224"): total points,
+    then golds, silvers, bronzes (positions 1/2/3 on the sheet).
+    Returns {code: {"gross", "penalty", "total", "rank"}}."""
+    with transaction.atomic():
+        teams = {t.pk: t.code for t in Team.objects.all()}
+        standings = {s.team_id: s for s in ChampionshipStanding.objects.filter(team_id__in=teams)}
+        missing = [ChampionshipStanding(team_id=pk) for pk in teams if pk not in standings]
+        for s in ChampionshipStanding.objects.bulk_create(missing):
+            standings[s.team_id] = s
+
+        totals = manual_totals(teams.values())
+        keyed = []
+        for team_id, s in standings.items():
+            code = teams[team_id]
+            if penalties is not None and code in penalties:
+                s.penalty_points = penalties[code]
+            gross, gold, silver, bronze = totals[code]
+            s.gross_total = gross
+            s.total_points = gross - s.penalty_points
+            keyed.append(((s.total_points, gold, silver, bronze), s))
+
+        keyed.sort(key=lambda x: x[0], reverse=True)
+        previous = None
+        for position, (key, s) in enumerate(keyed, start=1):
+            if key != previous:
+                rank, previous = position, key
+            s.rank = rank
+        ChampionshipStanding.objects.bulk_update(
+            standings.values(), ["gross_total", "penalty_points", "total_points", "rank"]
+        )
+
+    return {
+        teams[s.team_id]: {"gross": s.gross_total, "penalty": s.penalty_points, "total": s.total_points, "rank": s.rank}
+        for s in standings.values()
+    }
+
+def auto_assign_squad(match, event_matches):
     """Guesses squad from previous rounds to keep the show going."""
-    def get_prev(team):
-        if not team: return ""
-        last = Match.objects.filter(event=match.event, completed=True).filter(Q(team1=team) | Q(team2=team)).order_by('-match_no').first()
-        return (last.team1_players if last.team1 == team else last.team2_players) if last else ""
-    if not match.team1_players: match.team1_players = get_prev(match.team1)
-    if not match.team2_players: match.team2_players = get_prev(match.team2)
-
-def update_bracket_matches(event):
-    # 1. First, handle the transition from Round Robin to Semi-Finals
-    standings_a = get_sorted_teams(event, "A")
-    standings_b = get_sorted_teams(event, "B")
-    
-    # Only try to populate SFs if we have enough teams
-    if len(standings_a) >= 2 and len(standings_b) >= 2:
-        bracket_qs = Match.objects.filter(event=event, group="A&B")
-        for m in bracket_qs:
-            if m.completed: continue
-            rule = (m.opponent_rule or "").lower()
-            
-            # Match 7: SF 1
-            if "1st a" in rule or "1st of group a" in rule or "2nd of group b" in rule:
-                m.team1, m.team2 = standings_a[0], standings_b[1]
-                auto_assign_squad(m)
-                m.save()
-            # Match 8: SF 2
-            elif "1st b" in rule or "1st of group b" in rule or "2nd of group a" in rule:
-                m.team1, m.team2 = standings_b[0], standings_a[1]
-                auto_assign_squad(m)
-                m.save()
-            # Match 9: 5-6 Position
-            elif "3rd a" in rule or "3rd of group a" in rule:
-                if len(standings_a) >= 3 and len(standings_b) >= 3:
-                    m.team1, m.team2 = standings_a[2], standings_b[2]
-                    auto_assign_squad(m)
-                    m.save()
-
-    # 2. NEW: Handle the transition from Semi-Finals to Finals (Matches 10 & 11)
-    unlock_final_rounds(event)
-
-def unlock_final_rounds(event):
-    """Unlocks Match 10 (3-4 Pos) and Match 11 (Finals) based on Semi-Final results."""
-    # Semi-Finals are usually Match 7 and 8
-    sf_matches = Match.objects.filter(event=event, match_no__in=[7, 8], completed=True)
-    
-    if sf_matches.count() == 2:
-        sf1 = sf_matches.filter(match_no=7).first()
-        sf2 = sf_matches.filter(match_no=8).first()
-        
-        # Helper to get winner/loser objects
-        def get_w(m): return m.team1 if m.winner == m.team1.name else m.team2
-        def get_l(m): return m.team1 if m.winner != m.team1.name else m.team2
-
-        # Unlock Match 10 (3rd/4th)
-        m10 = Match.objects.filter(event=event, match_no=10).first()
-        if m10 and not m10.completed:
-            m10.team1, m10.team2 = get_l(sf1), get_l(sf2)
-            auto_assign_squad(m10)
-            m10.save()
-
-        # Unlock Match 11 (Finals)
-        m11 = Match.objects.filter(event=event, match_no=11).first()
-        if m11 and not m11.completed:
-            m11.team1, m11.team2 = get_w(sf1), get_w(sf2)
-            auto_assign_squad(m11)
-            m11.save()
-            
+    def get_prev(team_id):
+        if not team_id: return ""
+        played = [m for m in event_matches if m.completed and team_id in (m.team1_id, m.team2_id)]
+        if not played: return ""
+        last = max(played, key=lambda m: m.match_no)
+        return last.team1_players if last.team1_id == team_id else last.team2_players
+    if not match.team1_players: match.team1_players = get_prev(match.team1_id)
+    if not match.team2_players: match.team2_players = get_prev(match.team2_id)
+
+# Round-robin ranking, best first: most wins, then best score difference, then
+# the lower team id. group_table() orders by it in SQL and group_rank_key() in
+# memory (tournament.rebuild), so the two can't rank a tied group differently.
+GROUP_RANKING = ("-won", "-score_diff", "pk")
+
+def group_rank_key(row):
+    """Sort key for GROUP_RANKING over a dict with the same fields."""
+    return tuple(-row[f[1:]] if f.startswith("-") else row[f] for f in GROUP_RANKING)
+
+def group_table(event, groups=None):
+    """Round-robin table for an event as one annotated query.
+
+    Each Team comes back with played/won/lost/score_for/score_against/score_diff,
+    counted over completed matches of its own pool, and ordered by
+    GROUP_RANKING. Only pools this event has a group
+    stage in are included; pass groups to narrow that further."""
+    played = Match.objects.filter(
+        event=event, completed=True, group=OuterRef("pool_id"),
+    ).filter(Q(team1=OuterRef("pk")) | Q(team2=OuterRef("pk"))).order_by().values("event")
+
+    def stat(expr):
+        return Coalesce(Subquery(played.annotate(v=expr).values("v")), 0)
+
+    is_home = Q(team1=OuterRef("pk"))
+    own = Case(When(is_home, then=F("team1_score")), default=F("team2_score"), output_field=IntegerField())
+    other = Case(When(is_home, then=F("team2_score")), default=F("team1_score"), output_field=IntegerField())
+
+    event_pools = Match.objects.filter(event=event).exclude(group=Match.KNOCKOUT).values("group")
+    teams = Team.objects.filter(pool_id__in=event_pools)
+    if groups is not None:
+        teams = teams.filter(pool_id__in=groups)
+    return teams.annotate(
+        played=stat(Count("pk")),
+        won=stat(Count("pk", filter=Q(winner_team=OuterRef("pk")))),
+        score_for=stat(Sum(own)),
+        score_against=stat(Sum(other)),
+    ).annotate(
+        lost=F("played") - F("won"),
+        score_diff=F("score_for") - F("score_against"),
+    ).order_by("pool_id", *GROUP_RANKING)
+
+def group_tables(event, groups=None):
+    """{pool: [Team, ...]} for every pool of the event from a single query."""
+    tables = {}
+    for team in group_table(event, groups):
+        tables.setdefault(team.pool_id, []).append(team)
+    return tables
+
 def get_sorted_teams(event, group):
-    matches = Match.objects.filter(event=event, group=group, completed=True)
-    teams = Team.objects.filter(pool=group)
-    stats = {t.id: {'wins': 0, 'diff': 0, 'obj': t} for t in teams}
-    for m in matches:
-        if m.winner == m.team1.name: stats[m.team1.id]['wins'] += 1
-        elif m.winner == m.team2.name: stats[m.team2.id]['wins'] += 1
-        stats[m.team1.id]['diff'] += (m.team1_score - m.team2_score)
-        stats[m.team2.id]['diff'] += (m.team2_score - m.team1_score)
-    return [i['obj'] for i in sorted(stats.values(), key=lambda x: (x['wins'], x['diff']), reverse=True)]
+    return group_tables(event, [group]).get(group, [])
 
 def is_placeholder_match(match):
     if "swimming" in match.event.sport.name.lower(): return False
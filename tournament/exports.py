@@ -0,0 +1,135 @@
+"""
+Results exports for the organisers: fixtures and scores, squads, bridge and
+swimming results, the manual championship sheet and the standings, as CSV or
+as one XLSX workbook.
+
+Every dataset is a generator over `values_list(...).iterator()`, so rows are
+fetched from the cursor in chunks and written out as they arrive. Nothing
+holds a whole table: CSV goes straight into a StreamingHttpResponse (or a
+file for the management command), and openpyxl's write-only workbook spools
+each sheet to disk, so memory stays flat however many rows there are.
+
+Under ASGI, Django reads a synchronous iterator to the end before sending a
+byte, so the views hand the server in_batches() instead: an async iterator
+that pulls the rows on Django's sync thread, a batch at a time.
+"""
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from openpyxl import Workbook
+
+from .models import BridgeGroupResult, ChampionshipStanding, ManualEventResult, Match, SwimmingResult
+
+CHUNK_SIZE = 2000
+
+
+def _rows(queryset, *fields):
+    return queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def matches():
+    yield ("event_id", "event", "match_no", "group", "type", "rule", "date", "time", "venue_type", "venue_no",
+           "team1", "team2", "team1_score", "team2_score", "completed", "winner", "loser")
+    yield from _rows(
+        Match.objects.order_by("event__event_id", "match_no"),
+        "event__event_id", "event__name", "match_no", "group", "match_type", "opponent_rule", "date", "time",
+        "venue_type", "venue_no", "team1__code", "team2__code", "team1_score", "team2_score", "completed",
+        "winner", "loser",
+    )
+
+
+def squads():
+    """One row per side of a match that has a squad picked."""
+    yield ("event_id", "event", "match_no", "team", "players")
+    for event_id, event, no, team1, players1, team2, players2 in _rows(
+        Match.objects.order_by("event__event_id", "match_no"),
+        "event__event_id", "event__name", "match_no", "team1__code", "team1_players", "team2__code", "team2_players",
+    ):
+        if players1:
+            yield (event_id, event, no, team1, players1)
+        if players2:
+            yield (event_id, event, no, team2, players2)
+
+
+def bridge():
+    yield ("event_id", "event", "group", "first", "first_score", "second", "second_score", "third", "third_score")
+    yield from _rows(
+        BridgeGroupResult.objects.order_by("event__event_id", "group"),
+        "event__event_id", "event__name", "group", "first__code", "first_score",
+        "second__code", "second_score", "third__code", "third_score",
+    )
+
+
+def swimming():
+    yield ("event_id", "event", "first", "second", "third", "fourth", "fifth", "sixth")
+    yield from _rows(
+        SwimmingResult.objects.order_by("event__event_id"),
+        "event__event_id", "event__name", "first__code", "second__code", "third__code",
+        "fourth__code", "fifth__code", "sixth__code",
+    )
+
+
+def manual():
+    """results_data flattened to one row per event and team."""
+    yield ("event_id", "event", "team", "pos", "pts")
+    for event_id, name, data in _rows(ManualEventResult.objects.order_by("event_id"), "event_id", "event_name", "results_data"):
+        for code, cell in sorted((data or {}).items()):
+            yield (event_id, name, code, cell.get("pos"), cell.get("pts"))
+
+
+def standings():
+    yield ("rank", "team", "name", "gross_total", "penalty_points", "total_points", "gold", "silver", "bronze")
+    yield from _rows(
+        ChampionshipStanding.objects.order_by("rank", "team__code"),
+        "rank", "team__code", "team__name", "gross_total", "penalty_points", "total_points", "gold", "silver", "bronze",
+    )
+
+
+# Dataset name -> generator of rows, header first. Also the sheet order in the workbook.
+DATASETS = {
+    "matches": matches,
+    "squads": squads,
+    "bridge": bridge,
+    "swimming": swimming,
+    "manual": manual,
+    "standings": standings,
+}
+
+
+class _Echo:
+    """File-like object that hands back what csv.writer writes to it."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(name):
+    """Yields the dataset as CSV lines, for StreamingHttpResponse."""
+    writer = csv.writer(_Echo())
+    for row in DATASETS[name]():
+        yield writer.writerow(row)
+
+
+async def in_batches(iterable, size=500):
+    """Async iterator over a sync one, for StreamingHttpResponse under ASGI.
+    Each batch is fetched with sync_to_async on the request's sync thread,
+    which is where the ORM cursor behind the rows lives."""
+    items = iter(iterable)
+    take = sync_to_async(lambda: list(islice(items, size)))
+    while batch := await take():
+        for item in batch:
+            yield item
+
+
+def write_csv(name, f):
+    csv.writer(f).writerows(DATASETS[name]())
+
+
+def write_workbook(names, f):
+    """Writes the datasets as sheets of one XLSX into a path or binary file."""
+    wb = Workbook(write_only=True)
+    for name in names:
+        ws = wb.create_sheet(title=name)
+        for row in DATASETS[name]():
+            ws.append(row)
+    wb.save(f)
@@ -0,0 +1,162 @@
+"""
+Resized variants of uploaded team icons and event logos.
+
+Every source image gets AVIF (when Pillow has the codec), WebP and PNG copies
+at 1x and 2x of each height the templates show it at. Derived files live in
+MEDIA_ROOT/derived/ and carry a hash of their own bytes in the name, so Nginx
+can serve them with a far-future expiry:
+
+    location /media/derived/ { expires max; add_header Cache-Control "public, immutable"; }
+
+derived/manifest.json maps each source name (as stored in the ImageField) to
+its variants. The {% picture %} tag in tournament_extras reads it and falls
+back to the original file for anything not processed yet. Uploads through
+the admin are processed when saved; ``manage.py build_image_variants``
+processes everything in a process pool.
+"""
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, features
+
+from .publisher import write_atomic
+
+# upload_to folder -> CSS heights (px) the templates display those images at
+HEIGHTS = {
+    "team_icons": (45,),
+    "event_logos": (50, 80),
+}
+DENSITIES = (1, 2)
+DERIVED = "derived"
+MANIFEST = f"{DERIVED}/manifest.json"
+
+ENCODERS = {
+    "avif": {"quality": 60},
+    "webp": {"quality": 82, "method": 6},
+    "png": {"optimize": True},
+}
+MIME = {"avif": "image/avif", "webp": "image/webp", "png": "image/png"}   # best first
+
+
+def available_formats():
+    """Best first; PNG is the fallback every browser takes."""
+    out = []
+    for fmt in ("avif", "webp"):
+        try:
+            if features.check(fmt):
+                out.append(fmt)
+        except ValueError:  # Pillow too old to know the codec
+            pass
+    return out + ["png"]
+
+
+def heights_for(name):
+    return HEIGHTS.get(name.split("/", 1)[0])
+
+
+def derive(media_root, name, heights, formats):
+    """Writes the variants of one source image. Runs in a pool worker, so it
+    only takes plain arguments. Returns (name, manifest entry)."""
+    media_root = Path(media_root)
+    source = (media_root / name).read_bytes()
+    image = Image.open(io.BytesIO(source))
+    image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    folder, stem = name.rsplit("/", 1)[0], Path(name).stem
+    entry = {
+        "source": hashlib.sha256(source).hexdigest()[:16],
+        "width": image.width, "height": image.height, "sizes": {},
+    }
+    for css_height in heights:
+        size = {}
+        for fmt in formats:
+            urls, seen = {}, set()
+            for density in DENSITIES:
+                px = min(css_height * density, image.height)   # never upscale
+                if px in seen:
+                    continue
+                seen.add(px)
+                resized = image.resize((max(1, round(image.width * px / image.height)), px), Image.LANCZOS)
+                buf = io.BytesIO()
+                resized.save(buf, fmt.upper(), **ENCODERS[fmt])
+                data = buf.getvalue()
+                digest = hashlib.sha256(data).hexdigest()[:10]
+                rel = f"{DERIVED}/{folder}/{stem}-{px}.{digest}.{fmt}"
+                write_atomic(media_root / rel, data)
+                urls[f"{density}x"] = rel
+            size[fmt] = urls
+        entry["sizes"][str(css_height)] = size
+    return name, entry
+
+
+def source_names(media_root=None):
+    """Every image in the upload folders, as ImageField names."""
+    media_root = Path(media_root or settings.MEDIA_ROOT)
+    names = []
+    for folder in HEIGHTS:
+        for path in sorted((media_root / folder).glob("*")):
+            if path.suffix.lower() in (".png", ".jpg", ".jpeg", ".webp", ".gif"):
+                names.append(f"{folder}/{path.name}")
+    return names
+
+
+def build_variants(names, workers=None, force=False):
+    """Derives variants for names (skipping ones already in the manifest
+    unless force) and merges them into the manifest. Returns the names done."""
+    media_root = Path(settings.MEDIA_ROOT)
+    done = load_manifest()
+    todo = [n for n in names if heights_for(n) and (force or n not in done) and (media_root / n).exists()]
+    if not todo:
+        return []
+
+    formats = available_formats()
+    jobs = [(str(media_root), n, heights_for(n), formats) for n in todo]
+    if len(jobs) == 1 or workers == 1:
+        results = [derive(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(derive, *zip(*jobs)))
+
+    manifest = dict(load_manifest())   # re-read: another process may have added entries
+    manifest.update(results)
+    write_atomic(media_root / MANIFEST, json.dumps(manifest, indent=1, sort_keys=True).encode())
+    return [name for name, _ in results]
+
+
+_manifest = {"mtime": None, "data": {}}
+
+
+def load_manifest():
+    """The manifest, re-read only when the file changes. Shared: copy before
+    modifying."""
+    path = Path(settings.MEDIA_ROOT) / MANIFEST
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if _manifest["mtime"] != mtime:
+        with open(path) as f:
+            _manifest["data"], _manifest["mtime"] = json.load(f), mtime
+    return _manifest["data"]
+
+
+def variants(name, height):
+    """{format: {"1x": url, "2x": url}} for the closest processed height at
+    or above `height`, best format first; None if name is unprocessed."""
+    entry = load_manifest().get(name)
+    if not entry:
+        return None
+    heights = sorted(int(h) for h in entry["sizes"])
+    pick = next((h for h in heights if h >= height), heights[-1])
+    size = entry["sizes"][str(pick)]
+    return {
+        fmt: {d: settings.MEDIA_URL + url for d, url in size[fmt].items()}
+        for fmt in MIME if fmt in size
+    }
@@ -0,0 +1,372 @@
+"""
+Season import from the organiser's spreadsheet.
+
+The workbook (or a folder of CSV files named after the sheets) has four
+sheets; header names are matched case-insensitively:
+
+    Teams        code | name | pool | owners
+    Events       event_id | sport | name
+    Schedule     event_id | match_no | group | type | rule | date | time | venue_type | venue_no
+    Nominations  one column per team (headed by its name or code) plus an
+                 "Event / ID" column; each cell lists that team's players for
+                 the event, one per line
+
+Round-robin fixtures ("Golden Eagles vs Rising Phoenix") get their teams and
+nominated players; knockout rules are compiled into bracket slots. Rows are
+streamed (openpyxl read-only mode) into plain dicts, resolved against
+in-memory maps and written with one bulk_create per table inside a single
+transaction, replacing the previous season; teams are kept and updated by
+code so captains' accounts stay linked. diff() compares a parsed season
+with the database without writing anything.
+"""
+import csv
+import difflib
+import re
+from contextlib import contextmanager
+from datetime import date, datetime, time
+from pathlib import Path
+
+from django.db import transaction
+
+from .bracket import build_slots
+from .models import (
+    BracketSlot, BridgeGroupResult, ChampionshipStanding, Event, EventPoints, Match, Player, Pool, ScoresheetScan,
+    Sport, SwimmingResult, Team,
+)
+from .revision import bump_revision
+
+SHEETS = {
+    "teams": ("code", "name", "pool"),
+    "events": ("event_id", "sport", "name"),
+    "schedule": ("event_id", "match_no", "group", "type", "rule", "date", "time", "venue_type", "venue_no"),
+    "nominations": (),
+}
+OPTIONAL = {"teams": ("owners",)}
+
+VS = re.compile(r"\s+vs\.?\s+", re.I)
+EVENT_ID = re.compile(r"(\d+)\s*$")
+
+
+class SheetError(ValueError):
+    pass
+
+
+# --- reading ---
+
+@contextmanager
+def open_sheets(source):
+    """{sheet: row iterator} for an .xlsx workbook or a folder of CSVs. Rows
+    are tuples of cell values, header first."""
+    source = Path(source)
+    if source.is_dir():
+        files = {p.stem.lower(): p for p in source.glob("*.csv")}
+        missing = [name for name in SHEETS if name not in files]
+        if missing:
+            raise SheetError(f"{source} has no {', '.join(f'{m}.csv' for m in missing)}")
+        yield {name: _csv_rows(files[name]) for name in SHEETS}
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheets = {ws.title.strip().lower(): ws for ws in workbook.worksheets}
+        missing = [name for name in SHEETS if name not in sheets]
+        if missing:
+            raise SheetError(f"{source.name} has no {', '.join(missing)} sheet")
+        yield {name: sheets[name].iter_rows(values_only=True) for name in SHEETS}
+    finally:
+        workbook.close()   # read-only mode keeps the file open
+
+
+def _csv_rows(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.reader(f)
+
+
+def records(name, rows):
+    """Dicts keyed by the required (and optional) headers; blank rows skipped."""
+    header = [str(h or "").strip().lower().replace(" ", "_") for h in next(rows, ())]
+    wanted = SHEETS[name] + OPTIONAL.get(name, ())
+    missing = [col for col in SHEETS[name] if col not in header]
+    if missing:
+        raise SheetError(f"{name} sheet is missing column(s): {', '.join(missing)}")
+    index = {col: header.index(col) for col in wanted if col in header}
+    for line, row in enumerate(rows, start=2):
+        if not any(cell not in (None, "") for cell in row):
+            continue
+        yield line, {col: _clean(row[i]) if i < len(row) else None for col, i in index.items()}
+
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def _int(value, what):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise SheetError(f"{what}: expected a number, got {value!r}")
+
+
+def _date(value, what):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise SheetError(f"{what}: expected a date (YYYY-MM-DD), got {value!r}")
+
+
+def _time(value, what):
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    try:
+        return time.fromisoformat(str(value))
+    except ValueError:
+        raise SheetError(f"{what}: expected a time (HH:MM), got {value!r}")
+
+
+# --- parsing ---
+
+def parse(source):
+    """Reads and validates a season. Returns a dict of plain values keyed the
+    way diff() and apply() compare them, plus warnings."""
+    with open_sheets(source) as sheets:
+        return _parse(sheets)
+
+
+def _parse(sheets):
+    season = {"teams": {}, "events": {}, "matches": {}, "players": {}, "warnings": []}
+
+    for line, row in records("teams", sheets["teams"]):
+        code = str(row["code"])
+        if code in season["teams"]:
+            raise SheetError(f"teams line {line}: duplicate code {code}")
+        season["teams"][code] = {"name": row["name"], "pool": str(row["pool"]), "owners": row.get("owners") or ""}
+    teams = _TeamLookup(season)
+
+    for line, row in records("events", sheets["events"]):
+        event_id = _int(row["event_id"], f"events line {line}")
+        if event_id in season["events"]:
+            raise SheetError(f"events line {line}: duplicate event_id {event_id}")
+        season["events"][event_id] = {"sport": row["sport"], "name": row["name"]}
+
+    for line, row in records("schedule", sheets["schedule"]):
+        where = f"schedule line {line}"
+        event_id = _int(row["event_id"], where)
+        if event_id not in season["events"]:
+            raise SheetError(f"{where}: unknown event_id {event_id}")
+        key = (event_id, _int(row["match_no"], where))
+        if key in season["matches"]:
+            raise SheetError(f"{where}: duplicate match {key[0]}/{key[1]}")
+        rule = str(row["rule"] or "").strip()
+        team1 = team2 = None
+        if row["type"] == "RR":
+            parts = VS.split(" ".join(rule.split()))
+            if len(parts) == 2:
+                team1, team2 = teams.resolve(parts[0], where), teams.resolve(parts[1], where)
+        season["matches"][key] = {
+            "group": str(row["group"]), "match_type": row["type"], "opponent_rule": rule,
+            "team1": team1, "team2": team2,
+            "date": _date(row["date"], where), "time": _time(row["time"], where),
+            "venue_type": str(row["venue_type"] or ""), "venue_no": str(row["venue_no"] or ""),
+        }
+
+    squads = _nominations(sheets["nominations"], season, teams)
+    for (event_id, _), match in season["matches"].items():
+        match["team1_players"] = squads.get((event_id, match["team1"]), "")
+        match["team2_players"] = squads.get((event_id, match["team2"]), "")
+    return season
+
+
+class _TeamLookup:
+    """Team codes by code or lower-cased name; close misspellings resolve
+    with a warning."""
+
+    def __init__(self, season):
+        self.warnings = season["warnings"]
+        self.names = {t["name"].lower(): code for code, t in season["teams"].items()}
+        self.codes = set(season["teams"])
+
+    def resolve(self, text, where):
+        text = str(text or "").strip()
+        if text in self.codes:
+            return text
+        code = self.names.get(text.lower())
+        if code:
+            return code
+        close = difflib.get_close_matches(text.lower(), self.names, n=1, cutoff=0.85)
+        if close:
+            self.warnings.append(f"{where}: read {text!r} as {close[0]!r}")
+            return self.names[close[0]]
+        raise SheetError(f"{where}: unknown team {text!r}")
+
+
+def _nominations(rows, season, teams):
+    """Fills season["players"] ({(team code, name): {sports}}) and returns
+    {(event_id, team code): "A & B"} squads."""
+    header = [str(h or "").strip() for h in next(rows, ())]
+    event_col = next((i for i, h in enumerate(header) if h.lower().startswith("event")), None)
+    if event_col is None:
+        raise SheetError("nominations sheet needs an 'Event / ID' column")
+    team_cols = {i: teams.resolve(h, "nominations header") for i, h in enumerate(header) if h and i != event_col}
+
+    squads = {}
+    for line, row in enumerate(rows, start=2):
+        label = str(row[event_col] or "").strip() if event_col < len(row) else ""
+        if not label:
+            continue
+        found = EVENT_ID.search(label)
+        event_id = int(found.group(1)) if found else None
+        if event_id not in season["events"]:
+            raise SheetError(f"nominations line {line}: no event id in {label!r}")
+        sport = season["events"][event_id]["sport"]
+        for i, code in team_cols.items():
+            names = [n.strip() for n in str(row[i] or "").splitlines() if n.strip()] if i < len(row) else []
+            for name in names:
+                season["players"].setdefault((code, name), set()).add(sport)
+            if names:
+                squads[(event_id, code)] = " & ".join(names)
+    return squads
+
+
+# --- comparing and writing ---
+
+def current():
+    """The database in parse()'s shape (without players' squads)."""
+    season = {
+        "teams": {
+            code: {"name": name, "pool": pool, "owners": owners or ""}
+            for code, name, pool, owners in Team.objects.values_list("code", "name", "pool_id", "owners")
+        },
+        "events": {
+            eid: {"sport": sport, "name": name}
+            for eid, sport, name in Event.objects.values_list("event_id", "sport__name", "name")
+        },
+        "matches": {},
+        "players": {},
+    }
+    fields = ("group", "match_type", "opponent_rule", "date", "time", "venue_type", "venue_no", "team1_players", "team2_players")
+    for row in Match.objects.values("event__event_id", "match_no", "team1__code", "team2__code", *fields):
+        season["matches"][(row["event__event_id"], row["match_no"])] = {
+            **{f: row[f] or "" if f.endswith("players") else row[f] for f in fields},
+            "team1": row["team1__code"], "team2": row["team2__code"],
+        }
+    for code, name, label in Player.objects.values_list("team__code", "name", "sport_label"):
+        season["players"][(code, name)] = {s.strip() for s in (label or "").split(",") if s.strip()}
+    return season
+
+
+def diff(season, limit=20):
+    """Lines describing what apply(season) would change, per table: a count
+    line, then up to `limit` +/-/~ lines."""
+    now = current()
+    lines = []
+    for table in ("teams", "events", "matches", "players"):
+        old, new = now[table], season[table]
+        added = [k for k in new if k not in old]
+        removed = [k for k in old if k not in new]
+        changed = [k for k in new if k in old and old[k] != new[k]]
+        lines.append(f"{table}: {len(added)} new, {len(removed)} removed, {len(changed)} changed, "
+                     f"{len(new) - len(added) - len(changed)} unchanged")
+        details = [f"  + {_label(k)}" for k in added] + [f"  - {_label(k)}" for k in removed]
+        for k in changed:
+            if isinstance(new[k], dict):
+                fields = ", ".join(f"{f}: {old[k].get(f)!r} -> {v!r}" for f, v in new[k].items() if old[k].get(f) != v)
+            else:
+                fields = f"{sorted(old[k])} -> {sorted(new[k])}"
+            details.append(f"  ~ {_label(k)} ({fields})")
+        lines += details[:limit] + ([f"  ... {len(details) - limit} more"] if len(details) > limit else [])
+    return lines
+
+
+def _label(key):
+    return "/".join(str(k) for k in key) if isinstance(key, tuple) else str(key)
+
+
+def has_results():
+    return Match.objects.filter(completed=True).exists()
+
+
+def _clear_programme():
+    """Deletes the previous season's events and everything hanging off them.
+
+    Matches and their results would go through the delete collector one row
+    at a time, each sending the result signal (a revision bump); they are
+    cleared with one DELETE per table instead, and apply() bumps once."""
+    ScoresheetScan.objects.filter(match__isnull=False).update(match=None)
+    for model in (BracketSlot, EventPoints, BridgeGroupResult, SwimmingResult, Match):
+        model.objects.all()._raw_delete(model.objects.db)
+    for model in (Event, Player, Sport):
+        model.objects.all().delete()
+
+
+@transaction.atomic
+def apply(season):
+    """Replaces the programme with season. Returns row counts.
+
+    Teams are updated in place by code rather than recreated, so a
+    captain's login (Team.account) and the team icon survive a re-import;
+    teams no longer on the sheet are removed."""
+    _clear_programme()
+
+    pools = sorted({t["pool"] for t in season["teams"].values()})
+    kept = {p.code: p for p in Pool.objects.filter(code__in=pools)}
+    for i, code in enumerate(pools, start=1):
+        if code in kept:
+            kept[code].order = i
+    Pool.objects.bulk_update(kept.values(), ["order"])
+    Pool.objects.bulk_create([Pool(code=code, order=i) for i, code in enumerate(pools, start=1) if code not in kept])
+
+    Team.objects.exclude(code__in=season["teams"]).delete()
+    kept = {t.code: t for t in Team.objects.all()}
+    added = []
+    for code, t in season["teams"].items():
+        team = kept.get(code)
+        if team is None:
+            team = Team(code=code)
+            added.append(team)
+        team.name, team.pool_id, team.owners = t["name"], t["pool"], t["owners"]
+    Team.objects.bulk_update(kept.values(), ["name", "pool", "owners"])
+    Team.objects.bulk_create(added)
+    Pool.objects.exclude(code__in=pools).delete()   # PROTECT: only once no team is left in them
+    teams = {**kept, **{t.code: t for t in added}}
+    ChampionshipStanding.objects.update(
+        gross_total=0, total_points=0, penalty_points=0, rank=0, gold=0, silver=0, bronze=0,
+    )
+    ChampionshipStanding.objects.bulk_create([ChampionshipStanding(team=t) for t in added])
+
+    sports = {name: Sport(name=name) for name in dict.fromkeys(e["sport"] for e in season["events"].values())}
+    Sport.objects.bulk_create(sports.values())
+    events = {e.event_id: e for e in Event.objects.bulk_create([
+        Event(sport=sports[e["sport"]], event_id=eid, name=e["name"]) for eid, e in season["events"].items()
+    ])}
+
+    matches = Match.objects.bulk_create([
+        Match(
+            event=events[eid], match_no=no, group=m["group"], match_type=m["match_type"],
+            opponent_rule=m["opponent_rule"], team1=teams.get(m["team1"]), team2=teams.get(m["team2"]),
+            team1_players=m["team1_players"], team2_players=m["team2_players"],
+            date=m["date"], time=m["time"], venue_type=m["venue_type"], venue_no=m["venue_no"],
+        )
+        for (eid, no), m in season["matches"].items()
+    ])
+    by_event = {}
+    for m in matches:
+        by_event.setdefault(m.event_id, []).append(m)
+    slots = BracketSlot.objects.bulk_create([s for ms in by_event.values() for s in build_slots(ms)])
+
+    players = Player.objects.bulk_create([
+        Player(team=teams[code], name=name, sport_label=", ".join(sorted(sports_)))
+        for (code, name), sports_ in season["players"].items()
+    ])
+
+    bump_revision("standings")
+    return {
+        "pools": len(pools), "teams": len(teams), "events": len(events),
+        "matches": len(matches), "bracket_slots": len(slots), "players": len(players),
+    }
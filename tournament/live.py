@@ -0,0 +1,130 @@
+"""
+Server-Sent Events stream of tournament changes (GET /live/).
+
+Each process runs one poll loop, and only while at least one client is
+connected. The loop checks the cached tournament revision once a second.
+When the revision moves, it reads the new TournamentRevision rows and wakes
+every connection, and each connection sends one small notice:
+
+    id: 42
+    event: change
+    data: {"revision": 42, "changes": [{"kind": "score", "event": 7}]}
+
+Idle connections cost a parked coroutine and no queries, so a single ASGI
+worker can hold thousands of spectators:
+
+    uvicorn mgcl_tournament.asgi:application --workers 1
+
+Under WSGI (runserver, gunicorn's sync workers) a stream would tie up a
+worker for good, so the endpoint answers 204 there and the pages fall back to
+their timed refresh.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .models import TournamentRevision
+from .revision import current_revision
+
+POLL_INTERVAL = 1.0     # seconds between revision checks
+KEEPALIVE = 15.0        # comment line so proxies keep idle streams open
+RETRY_MS = 3000         # client reconnect delay
+BACKLOG = 200           # notices kept for clients resuming with Last-Event-ID
+
+logger = logging.getLogger(__name__)
+
+
+class Hub:
+    """Per-process fan-out: one poller, any number of waiting streams."""
+
+    def __init__(self):
+        self.revision = None
+        self.recent = deque(maxlen=BACKLOG)   # (revision, {"kind", "event"})
+        self.listeners = 0
+        self.changed = None
+        self.task = None
+
+    def _start(self):
+        if self.task is None or self.task.done():
+            self.changed = asyncio.Event()
+            self.task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def _poll(self):
+        while self.listeners:
+            try:
+                rev = await sync_to_async(current_revision)()
+                if self.revision is None:
+                    self.revision = rev
+                elif rev != self.revision:
+                    # a lower revision means the database was restored: clients reload
+                    rows = await sync_to_async(_changes_since)(self.revision) if rev > self.revision else None
+                    if rows is None or len(rows) == BACKLOG:
+                        self.recent.clear()   # too much at once: clients reload
+                    else:
+                        self.recent.extend(rows)
+                    self.revision = rev
+                    self.changed.set()
+                    self.changed = asyncio.Event()
+            except Exception:
+                # database or cache hiccup: log it and try again next tick
+                logger.exception("Live poll failed at revision %s", self.revision)
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def since(self, revision):
+        """Notices after revision, or None if they are no longer held (or the
+        client has seen revisions the database no longer has)."""
+        first = self.recent[0][0] if self.recent else self.revision + 1
+        if revision < first - 1 or revision > self.revision:
+            return None
+        return [change for rev, change in self.recent if rev > revision]
+
+    async def stream(self, last_seen):
+        self.listeners += 1
+        self._start()
+        try:
+            while self.revision is None:
+                await asyncio.sleep(0.05)
+            seen = self.revision if last_seen is None else last_seen
+            yield f"retry: {RETRY_MS}\nevent: hello\ndata: {json.dumps({'revision': self.revision})}\n\n"
+
+            while True:
+                if self.revision != seen:
+                    changes = self.since(seen)
+                    payload = {"revision": self.revision, "changes": changes or []}
+                    if changes is None:
+                        payload["reload"] = True
+                    seen = self.revision
+                    yield f"id: {seen}\nevent: change\ndata: {json.dumps(payload)}\n\n"
+                    continue
+                try:
+                    await asyncio.wait_for(self.changed.wait(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self.listeners -= 1
+
+
+def _changes_since(revision):
+    rows = TournamentRevision.objects.filter(pk__gt=revision).order_by("pk").values_list("pk", "kind", "event_id")
+    return [(pk, {"kind": kind, "event": event_id}) for pk, kind, event_id in rows[:BACKLOG]]
+
+
+hub = Hub()
+
+
+async def live_stream(request):
+    """SSE endpoint the public pages subscribe to (see live_updates.html)."""
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)   # EventSource stops reconnecting on 204
+    last = request.headers.get("Last-Event-ID", "")
+    response = StreamingHttpResponse(
+        hub.stream(int(last) if last.isdigit() else None), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"   # nginx: do not buffer the stream
+    return response
@@ -0,0 +1,199 @@
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from tournament import engine
+from tournament.database import DEFAULT, REPLICA, retry_on_locked
+from tournament.models import Event, Match
+from tournament.synthetic import build_tournament
+
+JOURNALS = ("wal", "delete")
+
+
+def public_urls(events):
+    urls = [reverse(name) for name in ("fixtures", "leaderboard", "leaderboard_data", "big_screen")]
+    urls += [reverse("group_table", args=[e.pk]) for e in events if "swimming" not in e.sport.name.lower()]
+    return urls
+
+
+def reader(urls, seconds, seed, results):
+    """One spectator process: GETs public pages back to back."""
+    client, rng = Client(), random.Random(seed)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            ok = client.get(rng.choice(urls)).status_code == 200
+        except OperationalError:
+            ok = False
+        latencies.append(time.perf_counter() - started)
+        errors += not ok
+    connections.close_all()
+    results.put(("reader", latencies, errors))
+
+
+def writer(event_ids, seconds, pause, seed, results):
+    """One referee desk plus the engine: saves a round-robin score and
+    recalculates its event in one retried transaction, every `pause` seconds."""
+    rng = random.Random(seed)
+    matches = list(
+        Match.objects.filter(event_id__in=event_ids, match_type="RR", team1__isnull=False, team2__isnull=False)
+        .exclude(event__sport__name__icontains="bridge").exclude(event__sport__name__icontains="swimming")
+        .select_related("event__sport", "team1", "team2")
+    )
+    latencies, errors = [], 0
+
+    @retry_on_locked
+    def save(match):
+        s1, s2 = rng.sample(range(0, 22), 2)
+        match.team1_score, match.team2_score = s1, s2
+        winner, loser = (match.team1, match.team2) if s1 > s2 else (match.team2, match.team1)
+        match.record_result(winner, loser)
+        match.save()
+        engine.update_championship(match.event)
+
+    deadline = time.perf_counter() + seconds
+    while matches and time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            save(rng.choice(matches))
+        except OperationalError:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+        time.sleep(pause)
+    connections.close_all()
+    results.put(("writer", latencies, errors))
+
+
+def summarize(latencies, errors, seconds):
+    ms = sorted(x * 1000 for x in latencies)
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "per_second": round(len(ms) / seconds, 1),
+        "p50_ms": round(ms[len(ms) // 2], 2) if ms else None,
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 2) if ms else None,
+        "max_ms": round(ms[-1], 2) if ms else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures public page throughput with and without referees writing, on a synthetic "
+        "tournament in a throwaway SQLite file (JSON report)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4, help="Spectator processes")
+        parser.add_argument("--writers", type=int, default=2, help="Referee processes")
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per phase")
+        parser.add_argument("--pause", type=float, default=0.2, help="Seconds each referee waits between results (0: flat out)")
+        parser.add_argument("--journal", choices=JOURNALS, default="wal", help="'delete' shows the rollback-journal baseline")
+        parser.add_argument("--seed", type=int, default=2026)
+
+    def handle(self, *args, **kwargs):
+        if kwargs["readers"] < 1 or kwargs["writers"] < 1:
+            raise CommandError("--readers and --writers must be at least 1")
+        if REPLICA not in connections.settings:
+            raise CommandError(f"DATABASES has no '{REPLICA}' alias to benchmark (is MGCL_SQLITE_WAL=0 set?)")
+
+        default, replica = connections[DEFAULT], connections[REPLICA]
+        saved = {
+            DEFAULT: (default.settings_dict["NAME"], dict(default.settings_dict["OPTIONS"]), dict(default.settings_dict["TEST"])),
+            REPLICA: (replica.settings_dict["NAME"], dict(replica.settings_dict["OPTIONS"]), None),
+        }
+        with tempfile.TemporaryDirectory(prefix="mgcl-bench-") as tmp:
+            # A file, not the usual in-memory test database: every process opens it
+            path = Path(tmp) / "bench.sqlite3"
+            default.settings_dict["TEST"]["NAME"] = str(path)
+            # the journal is the benchmark's choice, whatever settings picked for the real file
+            pragmas = [p.strip() for p in default.settings_dict["OPTIONS"].get("init_command", "").split(";")]
+            default.settings_dict["OPTIONS"]["init_command"] = "; ".join([
+                f"PRAGMA journal_mode={kwargs['journal'].upper()}",
+                *(p for p in pragmas if p and "journal_mode" not in p),
+            ])
+            default.close()
+            default.creation.create_test_db(verbosity=0, autoclobber=True)
+            replica.close()
+            replica.settings_dict["NAME"] = f"file:{path}?mode=ro"
+            try:
+                # Shared file cache, so readers see the writers' revision bumps
+                with override_settings(
+                    CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": f"{tmp}/cache"}},
+                    ALLOWED_HOSTS=["testserver"],
+                ):
+                    report = self.run(kwargs)
+            finally:
+                connections.close_all()
+                default.creation.destroy_test_db(saved[DEFAULT][0], verbosity=0)
+                for alias, (name, options, test) in saved.items():
+                    connections[alias].settings_dict.update(NAME=name, OPTIONS=options)
+                    if test is not None:
+                        connections[alias].settings_dict["TEST"] = test
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        events = build_tournament()
+        journal = connections[DEFAULT].cursor().execute("PRAGMA journal_mode").fetchone()[0]
+        urls = public_urls(Event.objects.select_related("sport"))
+        event_ids = [e.pk for e in events]
+        rng.shuffle(event_ids)
+        # forked children must open their own connections
+        connections.close_all()
+
+        seconds, n_readers, n_writers = options["duration"], options["readers"], options["writers"]
+        self.timeout = seconds + 120
+        alone = self.phase(
+            [(reader, (urls, seconds, rng.random())) for _ in range(n_readers)],
+        )
+        contended = self.phase(
+            [(reader, (urls, seconds, rng.random())) for _ in range(n_readers)]
+            + [(writer, (event_ids[i::n_writers], seconds, options["pause"], rng.random())) for i in range(n_writers)],
+        )
+
+        reads_alone = summarize(*alone["reader"], seconds)
+        reads_contended = summarize(*contended["reader"], seconds)
+        return {
+            "config": {k: options[k] for k in ("readers", "writers", "duration", "pause", "seed")},
+            # readers and writers share these; with fewer CPUs than processes
+            # the ratio measures CPU contention as well as locking
+            "cpus": os.cpu_count(),
+            "journal_mode": journal,
+            "pages": len(urls),
+            "reads_alone": reads_alone,
+            "reads_while_writing": reads_contended,
+            "writes": summarize(*contended["writer"], seconds),
+            "read_throughput_ratio": round(reads_contended["per_second"] / reads_alone["per_second"], 3)
+            if reads_alone["per_second"] else None,
+        }
+
+    def phase(self, jobs):
+        """Runs every job in its own process at once; returns
+        {role: (latencies, errors)} pooled across the processes."""
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        procs = [ctx.Process(target=target, args=args + (results,)) for target, args in jobs]
+        for p in procs:
+            p.start()
+        pooled = {}
+        for _ in procs:
+            role, latencies, errors = results.get(timeout=self.timeout)
+            all_latencies, all_errors = pooled.get(role, ([], 0))
+            pooled[role] = (all_latencies + latencies, all_errors + errors)
+        for p in procs:
+            p.join()
+        if any(p.exitcode for p in procs):
+            raise CommandError("A benchmark process crashed")
+        return pooled
@@ -0,0 +1,230 @@
+import functools
+import json
+import platform
+import random
+import statistics
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from tournament import engine
+from tournament.models import Match
+from tournament.synthetic import build_tournament, score_stream
+
+# Engine functions that get timed. Nested calls are recorded under their own
+# name too, so update_championship's cost can be broken down.
+ENTRY_POINTS = (
+    "update_championship",
+    "calculate_group_standings",
+    "resolve_bracket",
+    "unlock_swimming_finals",
+    "refresh_championship_totals",
+    "group_tables",
+)
+
+# Queries per call are deterministic for a given seed, so they are compared
+# strictly; wall time only beyond this factor.
+WALL_TOLERANCE = 1.5
+
+# (teams, pools) for --scaling: today's programme up to next season's largest
+SCALING_SIZES = ((6, 2), (16, 4), (32, 8))
+
+
+class Probe:
+    """Wraps the engine entry points and records wall time, SQL queries and
+    rows written for every call."""
+
+    def __init__(self):
+        self.queries = 0
+        self.calls = {name: [] for name in ENTRY_POINTS}
+        self.originals = {}
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def rows_written(self):
+        # sqlite keeps a running count of inserted/updated/deleted rows
+        raw = connection.connection
+        return getattr(raw, "total_changes", 0)
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            queries, rows = self.queries, self.rows_written()
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.calls[name].append((
+                    time.perf_counter() - started,
+                    self.queries - queries,
+                    self.rows_written() - rows,
+                ))
+        return timed
+
+    def __enter__(self):
+        for name in ENTRY_POINTS:
+            self.originals[name] = getattr(engine, name)
+            setattr(engine, name, self.wrap(name, self.originals[name]))
+        self.wrapper = connection.execute_wrapper(self.count_query)
+        self.wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.wrapper.__exit__(*exc)
+        for name, func in self.originals.items():
+            setattr(engine, name, func)
+
+    def report(self):
+        out = {}
+        for name, calls in self.calls.items():
+            if not calls:
+                continue
+            wall = sorted(c[0] * 1000 for c in calls)
+            out[name] = {
+                "calls": len(calls),
+                "wall_ms": {
+                    "total": round(sum(wall), 3),
+                    "mean": round(statistics.fmean(wall), 3),
+                    "p50": round(wall[len(wall) // 2], 3),
+                    "p95": round(wall[min(len(wall) - 1, int(len(wall) * 0.95))], 3),
+                    "max": round(wall[-1], 3),
+                },
+                "queries": {"total": sum(c[1] for c in calls), "mean": round(statistics.fmean(c[1] for c in calls), 2)},
+                "rows_written": {"total": sum(c[2] for c in calls), "mean": round(statistics.fmean(c[2] for c in calls), 2)},
+            }
+        return out
+
+
+class Command(BaseCommand):
+    help = "Benchmarks tournament.engine on a synthetic tournament in a throwaway database and prints JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teams", type=int, default=6)
+        parser.add_argument("--pools", type=int, default=2)
+        parser.add_argument("--events", type=int, default=17)
+        parser.add_argument("--matches", type=int, default=None, help="Round-robin matches per event (default: one full round robin)")
+        parser.add_argument("--seed", type=int, default=2026)
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+        parser.add_argument("--baseline", help="Earlier report to compare against; fails on regressions")
+        parser.add_argument(
+            "--scaling", action="store_true",
+            help="Run at 6/16/32 teams (2/4/8 pools) instead of --teams/--pools and report cost per event match",
+        )
+
+    def handle(self, *args, **kwargs):
+        config = {k: kwargs[k] for k in ("teams", "pools", "events", "matches", "seed")}
+        if kwargs["scaling"]:
+            runs = [self.run_isolated({**config, "teams": t, "pools": p}) for t, p in SCALING_SIZES]
+            report = {"scaling": [self.scaling_row(r) for r in runs], "runs": runs}
+        else:
+            report = self.run_isolated(config)
+
+        text = json.dumps(report, indent=2)
+        if kwargs["output"]:
+            with open(kwargs["output"], "w") as f:
+                f.write(text + "\n")
+            self.stderr.write(self.style.SUCCESS(f"📊 Report written to {kwargs['output']}"))
+        else:
+            self.stdout.write(text)
+
+        if kwargs["baseline"]:
+            self.compare(report, kwargs["baseline"])
+
+    def run_isolated(self, config):
+        """run_benchmark() in a fresh test database."""
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Revision bumps must not reach the live cache, nor the synthetic
+            # tournament the pages Nginx serves (and the timings)
+            with override_settings(
+                CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+                RECOMPUTE_EAGER=True,
+                PUBLISH_ROOT=None,
+            ):
+                return self.run_benchmark(config)
+        except ValueError as e:
+            raise CommandError(e)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def scaling_row(self, report):
+        update = report["entry_points"]["update_championship"]
+        per_event = report["totals"]["matches"] / report["config"]["events"]
+        return {
+            "teams": report["config"]["teams"],
+            "pools": report["config"]["pools"],
+            "matches_per_event": round(per_event, 1),
+            "update_ms": update["wall_ms"]["mean"],
+            "update_queries": update["queries"]["mean"],
+            "update_ms_per_event_match": round(update["wall_ms"]["mean"] / per_event, 3),
+        }
+
+    def run_benchmark(self, config):
+        rng = random.Random(config["seed"])
+        started = time.perf_counter()
+        events = build_tournament(config["teams"], config["pools"], config["events"], config["matches"])
+        setup = time.perf_counter() - started
+        matches = Match.objects.count()
+
+        results = 0
+        started = time.perf_counter()
+        with Probe() as probe:
+            for event, _ in score_stream(events, rng):
+                engine.update_championship(event)
+                results += 1
+                # what a page view asks for after each result
+                if "swimming" not in event.sport.name.lower():
+                    engine.group_tables(event)
+        replay = time.perf_counter() - started
+
+        return {
+            "config": config,
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "totals": {
+                "matches": matches,
+                "results": results,
+                "setup_s": round(setup, 3),
+                "replay_s": round(replay, 3),
+                "queries": probe.queries,
+            },
+            "entry_points": probe.report(),
+        }
+
+    def compare(self, report, path):
+        with open(path) as f:
+            baseline = json.load(f)
+        pairs = list(zip(baseline.get("runs", [baseline]), report.get("runs", [report])))
+        if len(pairs) != len(report.get("runs", [report])) or any(b.get("config") != r["config"] for b, r in pairs):
+            raise CommandError("Baseline was recorded with a different configuration")
+
+        regressions = []
+        for before_run, run in pairs:
+            regressions += self.regressions(before_run, run)
+        if regressions:
+            raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+        self.stderr.write(self.style.SUCCESS("✅ No regressions against baseline"))
+
+    def regressions(self, baseline, report):
+        label = f"[{report['config']['teams']} teams] "
+        regressions = []
+        for name, now in report["entry_points"].items():
+            before = baseline["entry_points"].get(name)
+            if not before:
+                continue
+            if now["queries"]["mean"] > before["queries"]["mean"]:
+                regressions.append(f"{label}{name}: queries/call {before['queries']['mean']} -> {now['queries']['mean']}")
+            if now["rows_written"]["mean"] > before["rows_written"]["mean"]:
+                regressions.append(f"{label}{name}: rows/call {before['rows_written']['mean']} -> {now['rows_written']['mean']}")
+            if now["wall_ms"]["p50"] > before["wall_ms"]["p50"] * WALL_TOLERANCE:
+                regressions.append(f"{label}{name}: p50 {before['wall_ms']['p50']}ms -> {now['wall_ms']['p50']}ms")
+        return regressions
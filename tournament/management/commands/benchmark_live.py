@@ -0,0 +1,130 @@
+import asyncio
+import json
+import resource
+import statistics
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from tournament import live
+from tournament.revision import bump_revision
+
+
+class Stream:
+    """One spectator: an ASGI connection to /live/ that stays idle until
+    a change notice arrives."""
+
+    def __init__(self, n):
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/live/", "raw_path": b"/live/",
+            "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"localhost"), (b"accept", b"text/event-stream")],
+            "client": ("127.0.0.1", 10000 + n), "server": ("localhost", 80),
+        }
+        self.sent_request = False
+        self.disconnect = asyncio.get_running_loop().create_future()
+        self.hello = asyncio.Event()
+        self.status = None
+        self.changes = []   # (revision, perf_counter)
+
+    async def receive(self):
+        if not self.sent_request:
+            self.sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnect
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body":
+            for block in message.get("body", b"").decode().split("\n\n"):
+                if "event: hello" in block:
+                    self.hello.set()
+                elif "event: change" in block:
+                    data = json.loads(block.split("data: ", 1)[1])
+                    self.changes.append((data["revision"], time.perf_counter()))
+
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Command(BaseCommand):
+    help = "Holds thousands of idle /live/ streams in this one process, then times change fan-out (JSON report)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=2000)
+        parser.add_argument("--hold", type=float, default=5.0, help="Seconds to sit idle with every stream open")
+        parser.add_argument("--changes", type=int, default=3, help="Results to save while the streams are open")
+
+    def handle(self, *args, **kwargs):
+        if kwargs["connections"] < 1:
+            raise CommandError("--connections must be at least 1")
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+                ALLOWED_HOSTS=["localhost"],
+            ):
+                report = asyncio.run(self.run(kwargs["connections"], kwargs["hold"], kwargs["changes"]))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    async def run(self, n, hold, changes):
+        app = ASGIHandler()
+        rss_before = rss_kb()
+
+        started = time.perf_counter()
+        streams = [Stream(i) for i in range(n)]
+        tasks = [asyncio.create_task(app(s.scope, s.receive, s.send)) for s in streams]
+        try:
+            await asyncio.wait_for(asyncio.gather(*(s.hello.wait() for s in streams)), timeout=max(30, n / 50))
+        except asyncio.TimeoutError:
+            raise CommandError(f"Only {sum(s.hello.is_set() for s in streams)} of {n} streams opened")
+        connect = time.perf_counter() - started
+        if any(s.status != 200 for s in streams):
+            raise CommandError("Streams were refused; /live/ needs the ASGI handler")
+
+        revision = live.hub.revision
+        await asyncio.sleep(hold)
+        rss_open, listeners = rss_kb(), live.hub.listeners
+
+        fanout = []
+        for _ in range(changes):
+            received = [len(s.changes) for s in streams]
+            saved_at = time.perf_counter()
+            await sync_to_async(bump_revision)("score")
+            while any(len(s.changes) == k for s, k in zip(streams, received)):
+                await asyncio.sleep(0.01)
+            fanout.append(max(s.changes[-1][1] for s in streams) - saved_at)
+
+        for s in streams:
+            s.disconnect.set_result(None)
+        await asyncio.wait(tasks, timeout=10)
+
+        return {
+            "connections": n,
+            "listeners": listeners,
+            "connect_s": round(connect, 3),
+            "idle_s": hold,
+            "rss_kb": {"before": rss_before, "open": rss_open, "per_connection": round((rss_open - rss_before) / n, 2)},
+            "fanout_ms": {
+                "changes": changes,
+                "poll_interval_ms": live.POLL_INTERVAL * 1000,
+                "mean": round(statistics.fmean(fanout) * 1000, 1) if fanout else None,
+                "max": round(max(fanout) * 1000, 1) if fanout else None,
+            },
+            "revision": {"start": revision, "end": live.hub.revision},
+        }
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournament.images import available_formats, build_variants, source_names
+
+
+class Command(BaseCommand):
+    help = "Builds resized AVIF/WebP/PNG variants of every team icon and event logo"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Pool size (default: one per CPU)")
+        parser.add_argument("--force", action="store_true", help="Rebuild images that already have variants")
+
+    def handle(self, *args, **kwargs):
+        names = source_names()
+        started = time.perf_counter()
+        done = build_variants(names, workers=kwargs["workers"], force=kwargs["force"])
+        self.stdout.write(self.style.SUCCESS(
+            f"🖼️  {len(done)} of {len(names)} images processed ({', '.join(available_formats())}) "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
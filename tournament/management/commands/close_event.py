@@ -1,4 +1,5 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from tournament.database import retry_on_locked
 from tournament.models import Event
 from tournament.engine import update_championship
 
@@ -8,13 +9,14 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("event_id", type=int)
-        parser.add_argument("event_type", type=str)  # SINGLE / DOUBLE / BRIDGE
+        # Kept so old invocations still parse; the engine reads the sport from the event
+        parser.add_argument("event_type", nargs="?", help="Ignored (SINGLE / DOUBLE / BRIDGE)")
 
     def handle(self, *args, **kwargs):
-        event_id = kwargs["event_id"]
-        event_type = kwargs["event_type"]
-
-        event = Event.objects.get(id=event_id)
-        update_championship(event, event_type)
+        try:
+            event = Event.objects.select_related("sport").get(id=kwargs["event_id"])
+        except Event.DoesNotExist:
+            raise CommandError(f"No event with id {kwargs['event_id']}")
+        retry_on_locked(update_championship)(event)
 
         self.stdout.write(self.style.SUCCESS(f"Event {event} closed successfully"))
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament.exports import DATASETS, write_csv, write_workbook
+
+
+class Command(BaseCommand):
+    help = "Exports fixtures, scores, squads, results and standings as CSV files or one XLSX workbook"
+
+    def add_arguments(self, parser):
+        parser.add_argument("datasets", nargs="*", help=f"Any of {', '.join(DATASETS)} (default: all)")
+        parser.add_argument("--format", choices=["csv", "xlsx"], default="xlsx")
+        parser.add_argument("--output", "-o",
+                            help="Workbook path for xlsx, folder for csv; '-' writes a single CSV to stdout")
+
+    def handle(self, *args, **kwargs):
+        names = kwargs["datasets"] or list(DATASETS)
+        unknown = [n for n in names if n not in DATASETS]
+        if unknown:
+            raise CommandError(f"Unknown dataset(s): {', '.join(unknown)}. Choose from {', '.join(DATASETS)}")
+
+        if kwargs["format"] == "xlsx":
+            path = Path(kwargs["output"] or "mgcl-results.xlsx")
+            write_workbook(names, path)
+            self.stdout.write(self.style.SUCCESS(f"📤 Wrote {len(names)} sheets to {path}"))
+            return
+
+        if kwargs["output"] == "-":
+            if len(names) != 1:
+                raise CommandError("Only one dataset can go to stdout")
+            write_csv(names[0], self.stdout)
+            return
+        folder = Path(kwargs["output"] or ".")
+        folder.mkdir(parents=True, exist_ok=True)
+        for name in names:
+            with open(folder / f"mgcl-{name}.csv", "w", newline="", encoding="utf-8") as f:
+                write_csv(name, f)
+        self.stdout.write(self.style.SUCCESS(f"📤 Wrote {len(names)} CSV files to {folder}"))
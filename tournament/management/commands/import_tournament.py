@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament import importer
+
+
+class Command(BaseCommand):
+    help = "Imports teams, events, the schedule and nominated players from the organiser's XLSX (or a folder of CSVs)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Workbook (.xlsx) or folder with teams/events/schedule/nominations .csv")
+        parser.add_argument("--dry-run", action="store_true", help="Show what would change against the database and stop")
+        parser.add_argument("--force", action="store_true", help="Replace the programme even though results have been entered")
+        parser.add_argument("--limit", type=int, default=20, help="Changed rows listed per table in the diff")
+
+    def handle(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            season = importer.parse(kwargs["source"])
+        except (importer.SheetError, OSError) as e:
+            raise CommandError(e)
+        parsed = time.perf_counter() - started
+        for warning in season["warnings"]:
+            self.stdout.write(self.style.WARNING(f"⚠️  {warning}"))
+
+        if kwargs["dry_run"]:
+            for line in importer.diff(season, kwargs["limit"]):
+                self.stdout.write(line)
+            self.stdout.write(f"ℹ️  Dry run: nothing written (parsed in {parsed:.3f}s)")
+            return
+
+        if importer.has_results() and not kwargs["force"]:
+            raise CommandError("Results have already been entered; importing wipes them. Pass --force to go ahead.")
+
+        counts = importer.apply(season)
+        self.stdout.write(self.style.SUCCESS(
+            "📥 Imported " + ", ".join(f"{n} {table}" for table, n in counts.items())
+            + f" in {time.perf_counter() - started:.3f}s (parse {parsed:.3f}s)"
+        ))
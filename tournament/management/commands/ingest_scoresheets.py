@@ -0,0 +1,37 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament import scoresheets
+
+
+class Command(BaseCommand):
+    help = "Reads a folder of scoresheet photos/scans in parallel and stages the scores for staff to confirm"
+
+    def add_arguments(self, parser):
+        parser.add_argument("folder")
+        parser.add_argument("--workers", type=int, default=None, help="Pool size (default: one per CPU)")
+
+    def handle(self, *args, **kwargs):
+        try:
+            scoresheets.require_vision()
+            paths = scoresheets.image_paths(kwargs["folder"])
+        except (RuntimeError, OSError) as e:
+            raise CommandError(e)
+        if not paths:
+            raise CommandError(f"No images in {kwargs['folder']}")
+
+        started = time.perf_counter()
+        created, results = scoresheets.ingest(paths, workers=kwargs["workers"])
+        elapsed = time.perf_counter() - started
+
+        for r in results:
+            if r["error"]:
+                self.stdout.write(self.style.WARNING(f"⚠️  {r['source']}: {r['error']}"))
+        statuses = Counter(scan.status for scan in created)
+        self.stdout.write(self.style.SUCCESS(
+            f"📷 Read {len(results)} images in {elapsed:.1f}s ({len(results) / elapsed:.1f}/s); "
+            f"staged {statuses['pending']} for review, {statuses['failed']} unreadable, "
+            f"{len(paths) - len(results)} already staged"
+        ))
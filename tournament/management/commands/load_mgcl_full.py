@@ -4,7 +4,8 @@ from django.db.models import Q
 from django.db.models.signals import post_save
 from django.core.management.base import BaseCommand
 from datetime import date, time
-from tournament.models import Sport, Team, Event, Match, Player, ChampionshipStanding
+from tournament.models import Sport, Pool, Team, Event, Match, Player, ChampionshipStanding
+from tournament.bracket import compile_bracket
 
 class Command(BaseCommand):
     help = "Load MGCL 2026 schedule with verified player pairs from Organiser CSV"
@@ -19,6 +20,7 @@ class Command(BaseCommand):
         ChampionshipStanding.objects.all().delete()
         Team.objects.all().delete()
         Sport.objects.all().delete()
+        Pool.objects.all().delete()
 
         # ======================================================
         # 2. TEAMS (Verified)
@@ -32,11 +34,12 @@ class Command(BaseCommand):
             ("T6", "Super Rangers", "Atul Shah & Nitin Kothari", "B"),
         ]
 
+        Pool.objects.bulk_create([Pool(code="A", order=1), Pool(code="B", order=2)])
         team_lookup = {}
         team_objs = {}
         
         for code, name, owners, pool in teams_data:
-            t = Team.objects.create(code=code, name=name, owners=owners, pool=pool)
+            t = Team.objects.create(code=code, name=name, owners=owners, pool_id=pool)
             team_objs[code] = t
             team_lookup[name.lower()] = t 
             ChampionshipStanding.objects.create(team=t, total_points=0, gold=0, silver=0, bronze=0)
@@ -291,7 +294,11 @@ class Command(BaseCommand):
             if t2_obj: m.team2_players = get_players(t2_obj, sport_name, eid)
             m.save()
 
-        # 7. TRIGGER ENGINE
+        # 7. COMPILE KNOCKOUT BRACKETS (opponent rules -> slot graph)
+        for event in Event.objects.all():
+            compile_bracket(event)
+
+        # 8. TRIGGER ENGINE
         for m in Match.objects.all():
             post_save.send(sender=Match, instance=m, created=False)
 
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament import scoresheets
+from tournament.models import Match
+
+
+class Command(BaseCommand):
+    help = "Writes a PDF with one QR-coded scoresheet per open head-to-head match"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", type=int, action="append", help="Event id (repeatable); default: every event")
+        parser.add_argument("--output", "-o", default="scoresheets.pdf")
+
+    def handle(self, *args, **kwargs):
+        try:
+            scoresheets.require_vision()
+        except RuntimeError as e:
+            raise CommandError(e)
+        matches = Match.objects.all()
+        if kwargs["event"]:
+            matches = matches.filter(event__event_id__in=kwargs["event"])
+        pages = scoresheets.write_sheets(scoresheets.printable_matches(matches), kwargs["output"])
+        if not pages:
+            raise CommandError("No open matches to print")
+        self.stdout.write(self.style.SUCCESS(f"🖨️  {pages} scoresheets written to {kwargs['output']}"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament.publisher import PAGES, publish_all, publish_root
+
+
+class Command(BaseCommand):
+    help = "Re-renders every pre-rendered public page into PUBLISH_ROOT for Nginx"
+
+    def handle(self, *args, **kwargs):
+        root = publish_root()
+        if root is None:
+            raise CommandError("PUBLISH_ROOT is not set")
+        revision, changed = publish_all(root)
+        self.stdout.write(self.style.SUCCESS(
+            f"📰 Published {len(PAGES)} pages for revision {revision} to {root} ({changed} files changed)"
+        ))
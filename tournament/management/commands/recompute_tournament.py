@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament.rebuild import rebuild_tournament
+
+
+class Command(BaseCommand):
+    help = "Recomputes brackets, points and standings for every event in one pass (after a data correction)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true",
+                            help="Only report where the stored state differs from a full recompute; exit 1 if it does")
+
+    def handle(self, *args, **kwargs):
+        verify = kwargs["verify"]
+        plan = rebuild_tournament(write=not verify)
+
+        self.stdout.write(f"{'event':<40} {'ms':>7} {'matches':>8} {'points':>7}")
+        for e in plan.events:
+            ledger = len(e.added) + len(e.changed) + len(e.removed)
+            self.stdout.write(f"{e.event.event_id:>3} {e.event.name[:36]:<36} {e.elapsed * 1000:>7.2f} {len(e.matches):>8} {ledger:>7}")
+            if verify:
+                for m, (team1, team2) in e.matches:
+                    self.stdout.write(f"      ~ match {m.match_no}: teams {team1}/{team2} -> {m.team1_id}/{m.team2_id}")
+                for team_id, (pts, gold, silver, bronze) in sorted(e.deltas.items()):
+                    self.stdout.write(f"      ~ team {team_id}: points {pts:+d}, medals {gold:+d}/{silver:+d}/{bronze:+d}")
+        for code, old, new in plan.standing_changes:
+            self.stdout.write(f"    ~ standing {code}: {old} -> {new}  (points, gold, silver, bronze)")
+
+        timing = f"load {plan.load * 1000:.0f} ms, compute {sum(e.elapsed for e in plan.events) * 1000:.0f} ms"
+        changed = len(plan.changed_events)
+        if verify:
+            if plan:
+                raise CommandError(f"{changed} events and {len(plan.standing_changes)} standings differ from a full recompute ({timing})")
+            self.stdout.write(self.style.SUCCESS(f"✅ Stored state matches a full recompute ({timing})"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"🔁 Recomputed {len(plan.events)} events: {changed} changed, "
+            f"{len(plan.standing_changes)} standings updated ({timing}, write {plan.write * 1000:.0f} ms)"
+        ))
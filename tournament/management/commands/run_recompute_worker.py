@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournament.publisher import publish_if_stale
+from tournament.recompute import process_next, requeue_stale
+from tournament.simulation import refresh_simulation
+
+
+class Command(BaseCommand):
+    help = "Runs the standings/bracket recompute queue (start one alongside the web server)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0.5, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+        parser.add_argument("--no-simulation", action="store_true", help="Don't refresh the odds when idle")
+        parser.add_argument("--no-publish", action="store_true", help="Don't re-render the static public pages when idle")
+
+    def handle(self, *args, **kwargs):
+        requeue_stale()
+        self.stdout.write(self.style.SUCCESS("⚙️  Recompute worker started"))
+        while True:
+            if process_next():
+                continue
+            # Queue is empty: bring the Nginx pages and then the odds up to the
+            # latest revision (no-ops if already there)
+            if not kwargs["no_publish"]:
+                published = publish_if_stale()
+                if published:
+                    self.stdout.write(f"📰 Pages published for revision {published[0]} ({published[1]} files changed)")
+            if not kwargs["no_simulation"]:
+                result = refresh_simulation()
+                if result:
+                    self.stdout.write(f"🎲 Odds refreshed for revision {result.revision} ({result.elapsed:.1f}s)")
+            if kwargs["once"]:
+                break
+            time.sleep(kwargs["interval"])
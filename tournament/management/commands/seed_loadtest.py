@@ -0,0 +1,78 @@
+import json
+import os
+import random
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tournament import engine
+from tournament.models import Event, Match, Team
+from tournament.synthetic import score_stream
+
+
+class Command(BaseCommand):
+    help = "Seeds a local database for locustfile.py: MGCL programme, setup_users accounts, some results, and a fixtures file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--played", type=float, default=0.4, help="Share of results to enter up front (0-1)")
+        parser.add_argument("--seed", type=int, default=2026)
+        parser.add_argument("--output", default="loadtest.json", help="Fixtures file the locustfile reads")
+        parser.add_argument("--force", action="store_true", help="Seed even though MGCL_DB_PATH is not set")
+
+    def handle(self, *args, **kwargs):
+        if not 0 <= kwargs["played"] <= 1:
+            raise CommandError("--played must be between 0 and 1")
+        if "MGCL_DB_PATH" not in os.environ and not kwargs["force"]:
+            raise CommandError("Seeding wipes the tournament. Point MGCL_DB_PATH at a scratch file (or pass --force).")
+
+        quiet = open(os.devnull, "w")
+        self.stdout.write(f"🌱 Seeding {connection.settings_dict['NAME']}...")
+        call_command("migrate", verbosity=0)
+        call_command("load_mgcl_full", stdout=quiet)
+        call_command("setup_users", stdout=quiet)
+
+        # --- Results entered so far, engine run after each like the worker ---
+        rng = random.Random(kwargs["seed"])
+        events = list(Event.objects.filter(is_locked=False).select_related("sport"))
+        target = int(Match.objects.filter(event__in=events).count() * kwargs["played"])
+        played = 0
+        for event, _ in score_stream(events, rng) if target else ():
+            engine.update_championship(event)
+            played += 1
+            if played >= target:
+                break
+
+        fixtures = self.fixtures()
+        with open(kwargs["output"], "w") as f:
+            json.dump(fixtures, f, indent=1)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {played} results entered; {len(fixtures['captains'])} captains, "
+            f"{len(fixtures['score_matches'])} scoreable matches written to {kwargs['output']}"
+        ))
+
+    def fixtures(self):
+        """Logins and ids the personas need; passwords follow setup_users."""
+        captains = []
+        for team in Team.objects.select_related("account").order_by("code"):
+            if team.account is None:
+                continue
+            matches = Match.objects.filter(team1=team) | Match.objects.filter(team2=team)
+            captains.append({
+                "username": team.account.username,
+                "password": f"{team.account.username}123",
+                "team": team.code,
+                "matches": sorted(matches.filter(completed=False).values_list("pk", flat=True)),
+            })
+        playable = (
+            Match.objects.filter(match_type="RR", team1__isnull=False, team2__isnull=False, event__is_locked=False)
+            .exclude(event__sport__name__icontains="bridge").exclude(event__sport__name__icontains="swimming")
+        )
+        return {
+            "referees": [{"username": "referee", "password": "referee123"}],
+            "captains": captains,
+            "score_matches": sorted(playable.values_list("pk", flat=True)),
+            "group_events": sorted(
+                Event.objects.exclude(sport__name__icontains="swimming").values_list("pk", flat=True)
+            ),
+        }
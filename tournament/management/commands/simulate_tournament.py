@@ -0,0 +1,29 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from tournament.simulation import refresh_simulation, simulate_tournament
+
+
+class Command(BaseCommand):
+    help = "Runs the Monte Carlo odds simulation for the current tournament revision"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=None, help="Simulations (default: settings.SIMULATION_RUNS)")
+        parser.add_argument("--force", action="store_true", help="Re-run even if this revision is already stored")
+        parser.add_argument("--dry-run", action="store_true", help="Print the payload as JSON instead of storing it")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **kwargs):
+        if kwargs["dry_run"]:
+            payload = simulate_tournament(kwargs["runs"] or 10_000, seed=kwargs["seed"])
+            self.stdout.write(json.dumps(payload, indent=2))
+            return
+
+        result = refresh_simulation(kwargs["runs"], force=kwargs["force"])
+        if result is None:
+            self.stdout.write("ℹ️  Odds already up to date (or SIMULATION_RUNS is 0).")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"🎲 {result.runs:,} simulations for revision {result.revision} in {result.elapsed:.2f}s"
+        ))
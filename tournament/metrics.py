@@ -0,0 +1,197 @@
+"""
+In-process request metrics, exposed in Prometheus text format at /metrics.
+
+RequestMetricsMiddleware times every request and labels it with the URL
+name (fixtures, big_screen, leaderboard_data, ...). While a request runs it
+also counts SQL queries and their time, template render time and cache
+hits/misses. Everything is aggregated into fixed-bucket histograms; nothing
+is stored per request, so the middleware can stay on in production.
+
+Each worker process keeps its own numbers. Scrape every process, or run a
+single worker, if you need exact totals.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import connections
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HISTOGRAMS = {
+    "mgcl_request_duration_seconds": ("Wall time per request", SECONDS),
+    "mgcl_request_queries": ("SQL queries per request", QUERIES),
+    "mgcl_request_sql_seconds": ("Time spent in SQL per request", SECONDS),
+    "mgcl_request_template_seconds": ("Template render time per request", SECONDS),
+}
+COUNTERS = {
+    "mgcl_requests_total": "Requests by view and status class",
+    "mgcl_cache_requests_total": "Cache lookups made while serving a request",
+}
+
+_lock = threading.Lock()
+_histograms = {}   # (metric, view) -> Histogram
+_counters = {}     # (metric, view, label_name, label_value) -> int
+_current = threading.local()
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RequestStats:
+    __slots__ = ("queries", "sql", "template", "cache_hits", "cache_misses")
+
+    def __init__(self):
+        self.queries, self.sql, self.template = 0, 0.0, 0.0
+        self.cache_hits = self.cache_misses = 0
+
+    def time_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - started
+            self.queries += 1
+
+
+def current_stats():
+    """RequestStats of the request this thread is serving, or None."""
+    return getattr(_current, "stats", None)
+
+
+def record(view, status, wall, stats):
+    with _lock:
+        for metric, value in (
+            ("mgcl_request_duration_seconds", wall),
+            ("mgcl_request_queries", stats.queries),
+            ("mgcl_request_sql_seconds", stats.sql),
+            ("mgcl_request_template_seconds", stats.template),
+        ):
+            key = (metric, view)
+            if key not in _histograms:
+                _histograms[key] = Histogram(HISTOGRAMS[metric][1])
+            _histograms[key].observe(value)
+
+        for key, n in (
+            (("mgcl_requests_total", view, "status", f"{status // 100}xx"), 1),
+            (("mgcl_cache_requests_total", view, "result", "hit"), stats.cache_hits),
+            (("mgcl_cache_requests_total", view, "result", "miss"), stats.cache_misses),
+        ):
+            if n:
+                _counters[key] = _counters.get(key, 0) + n
+
+
+def render_metrics():
+    """All series in Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+
+    lines = []
+    for metric, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for (name, view), h in histograms:
+            if name != metric:
+                continue
+            cumulative = 0
+            for le, n in zip(list(buckets) + ["+Inf"], h.counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{view="{view}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{view="{view}"}} {h.sum:.6f}')
+            lines.append(f'{metric}_count{{view="{view}"}} {cumulative}')
+
+    for metric, help_text in COUNTERS.items():
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for (name, view, label, value), n in counters:
+            if name == metric:
+                lines.append(f'{metric}{{view="{view}",{label}="{value}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# --- instrumentation hooks ---
+
+def _instrument_templates():
+    """Times the Django backend's Template.render (one call per render(),
+    includes and extends are rendered inside it)."""
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, "metered", False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        stats = current_stats()
+        if stats is None:
+            return original(self, context, request)
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            stats.template += time.perf_counter() - started
+
+    render.metered = True
+    Template.render = render
+
+
+class MeteredCacheMixin:
+    """Counts hits and misses against the current request. BaseCache's
+    get_many/get_or_set go through get(), so every key is counted once."""
+
+    _miss = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._miss, version)
+        stats = current_stats()
+        if stats is not None:
+            if value is self._miss:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is self._miss else value
+
+
+class MeteredFileBasedCache(MeteredCacheMixin, FileBasedCache):
+    pass
+
+
+class RequestMetricsMiddleware:
+    """Put first in MIDDLEWARE so the wall time covers the whole stack."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _instrument_templates()
+
+    def __call__(self, request):
+        stats = _current.stats = RequestStats()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(stats.time_query))
+                response = self.get_response(request)
+        finally:
+            _current.stats = None
+
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unresolved"
+        record(view, response.status_code, time.perf_counter() - started, stats)
+        return response
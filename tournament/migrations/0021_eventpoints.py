@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0020_championshipstanding_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventPoints',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('gold', models.IntegerField(default=0)),
+                ('silver', models.IntegerField(default=0)),
+                ('bronze', models.IntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points_ledger', to='tournament.event')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_points', to='tournament.team')),
+            ],
+            options={
+                'unique_together': {('event', 'team')},
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:25
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A frozen copy of tournament.bracket as it stood when this migration was
+# written, so later changes to the compiler don't rewrite history.
+GROUP, WINNER, LOSER = 'G', 'W', 'L'
+
+RANK_RULE = re.compile(r"\b(\d+)(?:st|nd|rd|th)\s+(?:of\s+)?(?:group\s+)?([a-z])\b")
+
+SEMI_FINALS = ('SF1', 'SF2')
+
+
+def parse_opponent_rule(rule):
+    text = " ".join((rule or "").lower().split())
+    ranks = RANK_RULE.findall(text)
+    if len(ranks) == 2:
+        return [(GROUP, group.upper(), int(rank), None) for rank, group in ranks]
+    if "winner" in text:
+        return [(WINNER, "", None, mt) for mt in SEMI_FINALS]
+    if "loser" in text:
+        return [(LOSER, "", None, mt) for mt in SEMI_FINALS]
+    return None
+
+
+def build_slots(matches, BracketSlot):
+    by_type = {m.match_type: m for m in matches}
+    slots = []
+    for m in matches:
+        parsed = parse_opponent_rule(m.opponent_rule)
+        if not parsed:
+            continue
+        if any(ref and ref not in by_type for _, _, _, ref in parsed):
+            continue
+        for position, (source, group, rank, ref) in enumerate(parsed, start=1):
+            slots.append(BracketSlot(
+                match=m, position=position, source=source,
+                source_group=group, source_rank=rank,
+                source_match=by_type[ref] if ref else None,
+            ))
+    return slots
+
+
+def compile_existing_brackets(apps, schema_editor):
+    Event = apps.get_model('tournament', 'Event')
+    Match = apps.get_model('tournament', 'Match')
+    BracketSlot = apps.get_model('tournament', 'BracketSlot')
+    for event in Event.objects.all():
+        matches = list(Match.objects.filter(event=event))
+        BracketSlot.objects.bulk_create(build_slots(matches, BracketSlot))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0021_eventpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BracketSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(choices=[(1, 'Team 1'), (2, 'Team 2')])),
+                ('source', models.CharField(choices=[('G', 'Group position'), ('W', 'Winner of match'), ('L', 'Loser of match')], max_length=1)),
+                ('source_group', models.CharField(blank=True, max_length=3)),
+                ('source_rank', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='tournament.match')),
+                ('source_match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feeds', to='tournament.match')),
+            ],
+            options={
+                'unique_together': {('match', 'position')},
+            },
+        ),
+        migrations.RunPython(compile_existing_brackets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:28
+
+import django.db.models.deletion
+import re
+
+from django.db import migrations, models
+
+# Aggregate events store labels such as "1st: Golden Eagles" / "Gold: Super Rangers"
+LABEL_PREFIX = re.compile(r"^\s*(?:1st|gold)\s*:\s*", re.IGNORECASE)
+
+
+def link_result_teams(apps, schema_editor):
+    Match = apps.get_model('tournament', 'Match')
+    Team = apps.get_model('tournament', 'Team')
+    team_ids = {t.name.strip().lower(): t.pk for t in Team.objects.all()}
+
+    changed = []
+    for m in Match.objects.exclude(winner__isnull=True).exclude(winner=""):
+        winner_id = team_ids.get(LABEL_PREFIX.sub("", m.winner).strip().lower())
+        head_to_head = m.team1_id and m.team2_id and m.team1_id != m.team2_id
+        if head_to_head and winner_id in (m.team1_id, m.team2_id):
+            m.winner_team_id = winner_id
+            m.loser_team_id = m.team2_id if winner_id == m.team1_id else m.team1_id
+        else:
+            m.winner_team_id = winner_id
+            m.loser_team_id = team_ids.get((m.loser or "").strip().lower())
+        changed.append(m)
+    Match.objects.bulk_update(changed, ['winner_team', 'loser_team'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0022_bracketslot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='loser_team',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='matches_lost', to='tournament.team'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='winner_team',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='matches_won', to='tournament.team'),
+        ),
+        migrations.RunPython(link_result_teams, migrations.RunPython.noop),
+    ]
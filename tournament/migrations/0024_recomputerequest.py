@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0023_match_winner_team_loser_team'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecomputeRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recompute_requests', to='tournament.event')),
+            ],
+            options={
+                'ordering': ['requested_at'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('event',), name='one_pending_recompute_per_event')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0024_recomputerequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulationResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revision', models.IntegerField(unique=True)),
+                ('runs', models.IntegerField()),
+                ('elapsed', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('payload', models.JSONField(default=dict)),
+            ],
+            options={
+                'ordering': ['-revision'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TournamentRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tournament.event')),
+            ],
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_pools(apps, schema_editor):
+    """One Pool per code already used by a team (the old fixed "A"/"B" choices)."""
+    Pool = apps.get_model('tournament', 'Pool')
+    Team = apps.get_model('tournament', 'Team')
+    codes = sorted(set(Team.objects.values_list('pool', flat=True)) | {"A", "B"})
+    Pool.objects.bulk_create([Pool(code=code, order=i) for i, code in enumerate(codes)])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0025_tournamentrevision_simulationresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pool',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=3, unique=True)),
+                ('name', models.CharField(blank=True, max_length=50)),
+                ('order', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('order', 'code'),
+            },
+        ),
+        migrations.RunPython(create_pools, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='match',
+            name='group',
+            field=models.CharField(help_text='Pool code, or "A&B" for knockout matches', max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='match_type',
+            field=models.CharField(choices=[('RR', 'Round Robin'), ('EF1', 'Round of 16 - 1'), ('EF2', 'Round of 16 - 2'), ('EF3', 'Round of 16 - 3'), ('EF4', 'Round of 16 - 4'), ('EF5', 'Round of 16 - 5'), ('EF6', 'Round of 16 - 6'), ('EF7', 'Round of 16 - 7'), ('EF8', 'Round of 16 - 8'), ('QF1', 'Quarter Finals 1'), ('QF2', 'Quarter Finals 2'), ('QF3', 'Quarter Finals 3'), ('QF4', 'Quarter Finals 4'), ('SF1', 'Semi Finals 1'), ('SF2', 'Semi Finals 2'), ('PQ1', '5-8 Playoff 1'), ('PQ2', '5-8 Playoff 2'), ('P78', '7-8 Position'), ('P56', '5-6 Position'), ('P34', '3-4 Position'), ('F', 'Finals')], max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='pool',
+            field=models.ForeignKey(db_column='pool', on_delete=django.db.models.deletion.PROTECT, related_name='teams', to='tournament.pool', to_field='code'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0026_pool'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['event', 'group'], name='tournament__event_i_b56781_idx'),
+        ),
+    ]
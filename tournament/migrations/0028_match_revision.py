@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0027_match_event_group_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='revision',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0028_match_revision'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoresheetScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='File name of the photo or scan', max_length=255)),
+                ('digest', models.CharField(max_length=40, unique=True)),
+                ('image', models.ImageField(blank=True, help_text='Straightened sheet for review', upload_to='scoresheets/')),
+                ('team1_score', models.IntegerField(blank=True, null=True)),
+                ('team2_score', models.IntegerField(blank=True, null=True)),
+                ('confidence', models.FloatField(blank=True, help_text='Lowest OCR confidence of the two boxes (0-1)', null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('rejected', 'Rejected'), ('failed', 'Unreadable')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scans', to='tournament.match')),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'pk'],
+            },
+        ),
+    ]
@@ -1,10 +1,22 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User  # <--- Added Import
 
 class Sport(models.Model):
     name = models.CharField(max_length=100, unique=True)
     def __str__(self): return self.name
 
+class Pool(models.Model):
+    """A round-robin group. Teams and group-stage matches refer to it by code ("A", "B", ...)."""
+    code = models.CharField(max_length=3, unique=True)
+    name = models.CharField(max_length=50, blank=True)
+    order = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ("order", "code")
+
+    def __str__(self): return self.name or f"Group {self.code}"
+
 class Team(models.Model):
     # Link this Team to a Login Account for the Captain's Portal
     account = models.OneToOneField(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="team_profile")
@@ -12,7 +24,8 @@ class Team(models.Model):
     code = models.CharField(max_length=10, unique=True)
     name = models.CharField(max_length=100)
     owners = models.CharField(max_length=500, blank=True, null=True, help_text="Team Owners")
-    pool = models.CharField(max_length=1, choices=[("A", "Group A"), ("B", "Group B")], default="A")
+    # Stored as the pool code, so team.pool_id is "A", "B", ... and matches Match.group
+    pool = models.ForeignKey(Pool, to_field="code", db_column="pool", on_delete=models.PROTECT, related_name="teams")
     icon = models.ImageField(upload_to='team_icons/', null=True, blank=True)
 
     def __str__(self): return f"{self.code} - {self.name}"
@@ -35,14 +48,19 @@ class Event(models.Model):
     def __str__(self): return f"{self.sport} | {self.name}"
 
 class Match(models.Model):
-    GROUP_CHOICES = [("A", "A"), ("B", "B"), ("A&B", "A & B")]
+    # Group-stage matches carry their pool code; every knockout match is in KNOCKOUT
+    KNOCKOUT = "A&B"
     TYPE_CHOICES = [
-        ("RR", "Round Robin"), ("SF1", "Semi Finals 1"), ("SF2", "Semi Finals 2"),
-        ("P56", "5-6 Position"), ("P34", "3-4 Position"), ("F", "Finals"),
+        ("RR", "Round Robin"),
+        *[(f"EF{i}", f"Round of 16 - {i}") for i in range(1, 9)],
+        *[(f"QF{i}", f"Quarter Finals {i}") for i in range(1, 5)],
+        ("SF1", "Semi Finals 1"), ("SF2", "Semi Finals 2"),
+        ("PQ1", "5-8 Playoff 1"), ("PQ2", "5-8 Playoff 2"),
+        ("P78", "7-8 Position"), ("P56", "5-6 Position"), ("P34", "3-4 Position"), ("F", "Finals"),
     ]
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="matches")
     match_no = models.IntegerField()
-    group = models.CharField(max_length=3, choices=GROUP_CHOICES)
+    group = models.CharField(max_length=3, help_text='Pool code, or "A&B" for knockout matches')
     match_type = models.CharField(max_length=3, choices=TYPE_CHOICES)
     opponent_rule = models.CharField(max_length=200)
     team1 = models.ForeignKey(Team, null=True, blank=True, on_delete=models.SET_NULL, related_name="home_matches")
@@ -53,13 +71,30 @@ class Match(models.Model):
     time = models.TimeField()
     venue_type = models.CharField(max_length=20)
     venue_no = models.CharField(max_length=10)
+    winner_team = models.ForeignKey(Team, null=True, blank=True, on_delete=models.SET_NULL, related_name="matches_won")
+    loser_team = models.ForeignKey(Team, null=True, blank=True, on_delete=models.SET_NULL, related_name="matches_lost")
+    # Display text derived from winner_team/loser_team (e.g. "1st: Golden Eagles" for aggregates)
     winner = models.CharField(max_length=100, null=True, blank=True)
     loser = models.CharField(max_length=100, null=True, blank=True)
     completed = models.BooleanField(default=False)
     team1_score = models.IntegerField(null=True, blank=True)
     team2_score = models.IntegerField(null=True, blank=True)
+    # Tournament revision of the last change to this row (big screen delta feed)
+    revision = models.PositiveIntegerField(default=0, db_index=True)
     
+    class Meta:
+        # group tables and bracket resolution only ever read one event's pool
+        indexes = [models.Index(fields=["event", "group"])]
+
     def __str__(self): return f"{self.event} | {self.match_no}"
+
+    def record_result(self, winner_team, loser_team=None, label=None):
+        """Marks the match completed. Engine logic only reads the team FKs;
+        winner/loser text is kept for display."""
+        self.completed = True
+        self.winner_team, self.loser_team = winner_team, loser_team
+        self.winner = label or (winner_team.name if winner_team else None)
+        self.loser = loser_team.name if loser_team else None
     
     def is_bracket_match(self):
         rule = (self.opponent_rule or "").lower()
@@ -83,6 +118,28 @@ class Match(models.Model):
         return self.team1 is not None and self.team2 is not None
 
 
+class BracketSlot(models.Model):
+    """Where one side of a knockout match gets its team from.
+    Compiled once from Match.opponent_rule (see tournament.bracket)."""
+    GROUP, WINNER, LOSER = "G", "W", "L"
+    SOURCE_CHOICES = [(GROUP, "Group position"), (WINNER, "Winner of match"), (LOSER, "Loser of match")]
+
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name="slots")
+    position = models.PositiveSmallIntegerField(choices=[(1, "Team 1"), (2, "Team 2")])
+    source = models.CharField(max_length=1, choices=SOURCE_CHOICES)
+    source_group = models.CharField(max_length=3, blank=True)
+    source_rank = models.PositiveSmallIntegerField(null=True, blank=True)
+    source_match = models.ForeignKey(Match, null=True, blank=True, on_delete=models.CASCADE, related_name="feeds")
+
+    class Meta:
+        unique_together = ("match", "position")
+
+    def __str__(self):
+        if self.source == self.GROUP:
+            return f"{self.match} #{self.position} <- {self.source_rank} of {self.source_group}"
+        return f"{self.match} #{self.position} <- {self.get_source_display()} {self.source_match_id}"
+
+
 class ChampionshipStanding(models.Model):
     team = models.OneToOneField(Team, on_delete=models.CASCADE)
     gross_total = models.IntegerField(default=0)
@@ -95,6 +152,22 @@ class ChampionshipStanding(models.Model):
     bronze = models.IntegerField(default=0)
     def __str__(self): return f"{self.team} | {self.total_points}"
 
+class EventPoints(models.Model):
+    """Points ledger: what a single event awarded a single team.
+    Recomputing an event only rewrites its own rows; standings are the sum."""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="points_ledger")
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="event_points")
+    points = models.IntegerField(default=0)
+
+    gold = models.IntegerField(default=0)
+    silver = models.IntegerField(default=0)
+    bronze = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("event", "team")
+
+    def __str__(self): return f"{self.event} | {self.team} | {self.points}"
+
 class BridgeGroupResult(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
     group = models.CharField(max_length=1)
@@ -131,4 +204,74 @@ class ManualEventResult(models.Model):
         ordering = ['event_id']
 
     def __str__(self):
-        return f"Event {self.event_id}: {self.event_name}"
\ No newline at end of file
+        return f"Event {self.event_id}: {self.event_name}"
+
+class RecomputeRequest(models.Model):
+    """Queue row asking the recompute worker to rerun the engine for an event.
+    At most one pending row per event, so bursts of submissions collapse."""
+    PENDING, RUNNING, FAILED = "pending", "running", "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (RUNNING, "Running"), (FAILED, "Failed")]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="recompute_requests")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["requested_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["event"], condition=Q(status="pending"), name="one_pending_recompute_per_event"),
+        ]
+
+    def __str__(self): return f"{self.event} | {self.status}"
+
+
+class TournamentRevision(models.Model):
+    """Append-only change log. The id of the newest row is the tournament
+    revision number that caches and live views key on (see tournament.revision)."""
+    kind = models.CharField(max_length=20)
+    event = models.ForeignKey(Event, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self): return f"r{self.pk} | {self.kind}"
+
+
+class SimulationResult(models.Model):
+    """Monte Carlo odds computed for one tournament revision (see tournament.simulation)."""
+    revision = models.IntegerField(unique=True)
+    runs = models.IntegerField()
+    elapsed = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    payload = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ["-revision"]
+
+    def __str__(self): return f"r{self.revision} | {self.runs} runs"
+
+
+class ScoresheetScan(models.Model):
+    """A photographed paper scoresheet read by tournament.scoresheets.
+    Proposed scores wait here until staff confirm them into the match."""
+    PENDING, CONFIRMED, REJECTED, FAILED = "pending", "confirmed", "rejected", "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (CONFIRMED, "Confirmed"), (REJECTED, "Rejected"), (FAILED, "Unreadable")]
+
+    match = models.ForeignKey(Match, null=True, blank=True, on_delete=models.SET_NULL, related_name="scans")
+    source = models.CharField(max_length=255, help_text="File name of the photo or scan")
+    # sha1 of the file, so feeding the same folder in twice stages each sheet once
+    digest = models.CharField(max_length=40, unique=True)
+    image = models.ImageField(upload_to="scoresheets/", blank=True, help_text="Straightened sheet for review")
+    team1_score = models.IntegerField(null=True, blank=True)
+    team2_score = models.IntegerField(null=True, blank=True)
+    confidence = models.FloatField(null=True, blank=True, help_text="Lowest OCR confidence of the two boxes (0-1)")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    reviewed_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at", "pk"]
+
+    def __str__(self): return f"{self.source} | {self.status}"
@@ -0,0 +1,133 @@
+"""
+Pre-rendered public pages, written where Nginx can serve them directly.
+
+The recompute worker calls publish_if_stale() whenever its queue is empty,
+so the files follow every saved result within one worker tick. With
+RECOMPUTE_EAGER there is no worker, and the commit that moves the revision
+publishes instead (tournament.revision). Without either, run
+``manage.py publish_pages``, which rebuilds them all by hand. Each page is rendered
+through its own view as an anonymous spectator and written next to .gz and,
+if the ``brotli`` package is installed, .br copies. Every file is written to
+a temporary name and renamed into place, so Nginx never serves half a page.
+
+Nginx sends anonymous GETs without a query string to the files and
+everything else (staff sessions, fragments, feeds, /live/) to Django:
+
+    location ~ ^/(fixtures|leaderboard|big-screen|championship/view)/$ {
+        root /srv/mgcl/published;
+        gzip_static on;
+        brotli_static on;                 # ngx_brotli, if built in
+        error_page 418 = @django;
+        if ($cookie_sessionid) { return 418; }
+        if ($args) { return 418; }
+        try_files $uri/index.html @django;
+    }
+    location = /leaderboard/data/ {
+        root /srv/mgcl/published;
+        default_type application/json;
+        gzip_static on;
+        try_files $uri/index.json @django;
+    }
+"""
+import gzip
+import os
+import tempfile
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .revision import current_revision
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz copies are written
+    brotli = None
+
+# url name -> file extension; the file lives at <url path>/index.<ext>
+PAGES = {
+    "fixtures": "html",
+    "leaderboard": "html",
+    "big_screen": "html",
+    "manual_championship_view": "html",
+    "leaderboard_data": "json",
+}
+
+MARKER = ".revision"
+
+
+def publish_root():
+    root = getattr(settings, "PUBLISH_ROOT", None)
+    return Path(root) if root else None
+
+
+def render_page(name):
+    """Body bytes of the page as an anonymous spectator sees it."""
+    base = urlsplit(settings.PUBLISH_BASE_URL)
+    request = RequestFactory().get(reverse(name), HTTP_HOST=base.netloc, secure=base.scheme == "https")
+    request.user = AnonymousUser()
+    match = resolve(request.path_info)
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise RuntimeError(f"{name} rendered with status {response.status_code}")
+    return response.content
+
+
+def write_atomic(path, data):
+    """Atomically replaces path with data; returns False if it was already identical."""
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)   # mkstemp creates 0600; Nginx runs as another user
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
+
+
+def publish_page(root, name):
+    """Writes one page and its compressed copies. Returns files changed."""
+    body = render_page(name)
+    path = root / reverse(name).strip("/") / f"index.{PAGES[name]}"
+    variants = [(path.with_name(path.name + ".gz"), gzip.compress(body, 9, mtime=0))]
+    if brotli is not None:
+        variants.append((path.with_name(path.name + ".br"), brotli.compress(body)))
+    # compressed copies first, so the plain file never runs ahead of them
+    return sum(write_atomic(p, data) for p, data in variants + [(path, body)])
+
+
+def published_revision(root):
+    try:
+        return int((root / MARKER).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def publish_all(root=None):
+    """Renders every page. Returns (revision, files changed)."""
+    root = root or publish_root()
+    # Read first: a save during rendering leaves the marker behind, so the
+    # next publish_if_stale() picks it up
+    revision = current_revision()
+    changed = sum(publish_page(root, name) for name in PAGES)
+    write_atomic(root / MARKER, str(revision).encode())
+    return revision, changed
+
+
+def publish_if_stale():
+    """publish_all() if the tournament moved since the last publish; else None."""
+    root = publish_root()
+    if root is None or published_revision(root) == current_revision():
+        return None
+    return publish_all(root)
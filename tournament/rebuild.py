@@ -0,0 +1,186 @@
+"""
+Whole-tournament recompute, for after a data correction.
+
+update_championship() recomputes one event against the database. This
+module does every event in a single pass instead: the programme is loaded
+with one query per table (simulation.TournamentData plus the points ledger
+and standings), group tables are ranked in memory, brackets are filled with
+engine.fill_bracket and points are scored with engine.award_event_points, so
+the rules are the engine's own. Only the rows that come out different are
+written, all in one transaction. The standings are rebuilt from the whole
+new ledger, as refresh_championship_totals() does, so drift is repaired too.
+
+rebuild_tournament(write=False) computes the same plan and writes nothing
+(`recompute_tournament --verify`).
+"""
+import time
+from collections import defaultdict
+
+from .database import retry_on_locked
+from .engine import PointsAccumulator, award_event_points, fill_bracket, group_rank_key
+from .models import BracketSlot, ChampionshipStanding, EventPoints, Match
+from .revision import bump_revision
+from .simulation import TournamentData
+
+MATCH_FIELDS = ("team1", "team2", "team1_players", "team2_players")
+STANDING_FIELDS = ("total_points", "gold", "silver", "bronze")
+
+
+class EventPlan:
+    """What recomputing one event would change."""
+
+    def __init__(self, event):
+        self.event = event
+        self.matches = []          # [(Match, (old team1_id, old team2_id))]
+        self.added, self.changed, self.removed = [], [], []
+        self.deltas = {}
+        self.rows = {}
+        self.elapsed = 0.0
+
+    def __bool__(self):
+        return bool(self.matches or self.added or self.changed or self.removed)
+
+
+class Plan:
+    def __init__(self):
+        self.events = []
+        self.standings, self.missing = [], []   # ChampionshipStandings to update / create
+        self.standing_changes = []              # [(team code, old tuple, new tuple)]
+        self.load = self.write = 0.0
+
+    @property
+    def changed_events(self):
+        return [e for e in self.events if e]
+
+    def __bool__(self):
+        return bool(self.changed_events or self.standings or self.missing)
+
+
+def round_robin_rankings(matches, teams_by_pool, groups):
+    """{group: [team_id, ...]} in engine.GROUP_RANKING order (the order
+    engine.group_table gives), from matches in memory."""
+    rankings = {}
+    for group in groups:
+        stats = {t.pk: {"pk": t.pk, "won": 0, "score_diff": 0} for t in teams_by_pool.get(group, ())}
+        for m in matches:
+            if not m.completed or m.group != group:
+                continue
+            for team_id, own, other in ((m.team1_id, m.team1_score, m.team2_score),
+                                        (m.team2_id, m.team2_score, m.team1_score)):
+                if team_id in stats:
+                    stats[team_id]["won"] += m.winner_team_id == team_id
+                    stats[team_id]["score_diff"] += (own or 0) - (other or 0)
+        rankings[group] = [row["pk"] for row in sorted(stats.values(), key=group_rank_key)]
+    return rankings
+
+
+def plan_event(data, event, teams_by_pool, ledger_rows):
+    """Brackets and points for one event, computed from `data` in memory."""
+    plan = EventPlan(event)
+    matches = data.matches.get(event.pk, {})
+    sport = event.sport.name.lower()
+    before = {pk: (m.team1_id, m.team2_id) for pk, m in matches.items()}
+
+    if "swimming" in sport:
+        # engine.unlock_swimming_finals: every open heat gets the first team as a stand-in
+        placeholder = data.teams[0].pk if data.teams else None
+        filled = [m for m in matches.values() if m.team1_id is None or m.team2_id is None]
+        for m in filled:
+            m.team1_id = m.team2_id = placeholder
+    else:
+        slots = data.slots.get(event.pk, {})
+        groups = {s.source_group for pair in slots.values() for s in pair.values() if s.source == BracketSlot.GROUP}
+        if "bridge" in sport:
+            rankings = {
+                r.group: [r.first_id, r.second_id, r.third_id]
+                for (eid, group), r in data.bridge.items() if eid == event.pk and group in groups
+            }
+        else:
+            event_pools = {m.group for m in matches.values() if m.group != Match.KNOCKOUT}
+            rankings = round_robin_rankings(matches.values(), teams_by_pool, groups & event_pools)
+        filled = fill_bracket(matches, slots, rankings) if slots else []
+    plan.matches = [(m, before[m.pk]) for m in filled]
+
+    ledger = PointsAccumulator(event)
+    award_event_points(
+        event, ledger, knockout=matches.values(),
+        bridge=[r for (eid, _), r in data.bridge.items() if eid == event.pk],
+        swimming=data.swimming.get(event.pk),
+    )
+    plan.rows = ledger.rows
+    plan.added, plan.changed, plan.removed, plan.deltas = ledger.diff(ledger_rows.get(event.pk, {}))
+    return plan
+
+
+def build_plan():
+    started = time.perf_counter()
+    data = TournamentData()
+    ledger_rows = defaultdict(dict)
+    for row in EventPoints.objects.all():
+        ledger_rows[row.event_id][row.team_id] = row
+    standings = {s.team_id: s for s in ChampionshipStanding.objects.all()}
+    teams_by_pool = defaultdict(list)
+    for t in data.teams:
+        teams_by_pool[t.pool_id].append(t)
+
+    plan = Plan()
+    plan.load = time.perf_counter() - started
+
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    for event in data.events:
+        started = time.perf_counter()
+        event_plan = plan_event(data, event, teams_by_pool, ledger_rows)
+        for team_id, row in event_plan.rows.items():
+            total = totals[team_id]
+            total[0] += row.points; total[1] += row.gold; total[2] += row.silver; total[3] += row.bronze
+        event_plan.elapsed = time.perf_counter() - started
+        plan.events.append(event_plan)
+
+    for team in data.teams:
+        new = tuple(totals[team.pk]) if team.pk in totals else (0, 0, 0, 0)
+        s = standings.get(team.pk)
+        if s is None:
+            s = ChampionshipStanding(team_id=team.pk)
+            plan.missing.append(s)
+        elif tuple(getattr(s, f) for f in STANDING_FIELDS) == new:
+            continue
+        else:
+            plan.standings.append(s)
+        plan.standing_changes.append((team.code, tuple(getattr(s, f) for f in STANDING_FIELDS), new))
+        for field, value in zip(STANDING_FIELDS, new):
+            setattr(s, field, value)
+    return plan
+
+
+@retry_on_locked
+def apply_plan(plan):
+    """Writes the plan: changed matches, ledger rows and standings, then one
+    revision per changed event (stamped on its matches for the big screen)."""
+    matches, added, changed, removed = [], [], [], []
+    for event_plan in plan.changed_events:
+        rev = bump_revision("standings", event_plan.event.pk)
+        for m, _ in event_plan.matches:
+            m.revision = rev
+            matches.append(m)
+        added += event_plan.added
+        changed += event_plan.changed
+        removed += event_plan.removed
+    Match.objects.bulk_update(matches, [*MATCH_FIELDS, "revision"])
+    EventPoints.objects.filter(pk__in=removed).delete()
+    EventPoints.objects.bulk_create(added)
+    EventPoints.objects.bulk_update(changed, PointsAccumulator.FIELDS)
+    ChampionshipStanding.objects.bulk_create(plan.missing)
+    ChampionshipStanding.objects.bulk_update(plan.standings, STANDING_FIELDS)
+    if (plan.standings or plan.missing) and not plan.changed_events:
+        bump_revision("standings")
+
+
+def rebuild_tournament(write=True):
+    """Recomputes every event; writes the differences unless write is False.
+    Returns the Plan (with timings) either way."""
+    plan = build_plan()
+    if write and plan:
+        started = time.perf_counter()
+        apply_plan(plan)
+        plan.write = time.perf_counter() - started
+    return plan
@@ -0,0 +1,73 @@
+"""
+Database-backed recompute queue.
+
+Score submissions only record which event needs recalculating; the
+``run_recompute_worker`` management command drains the queue in a single
+process, so referees never wait on the engine and two submissions can't race
+each other into "database is locked".
+"""
+import logging
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+from .database import retry_on_locked
+from .engine import update_championship
+from .models import RecomputeRequest
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_recompute(event):
+    """Queues a recompute for the event. A request that is already pending
+    absorbs this one. With RECOMPUTE_EAGER the engine runs inline instead."""
+    if getattr(settings, "RECOMPUTE_EAGER", False):
+        update_championship(event)
+        return None
+    req, _ = RecomputeRequest.objects.get_or_create(event=event, status=RecomputeRequest.PENDING)
+    return req
+
+
+def pending_event_ids():
+    """Events whose results are queued or being recalculated right now."""
+    return sorted(set(
+        RecomputeRequest.objects.exclude(status=RecomputeRequest.FAILED).values_list("event_id", flat=True)
+    ))
+
+
+@retry_on_locked
+def claim_next():
+    """Moves the oldest pending request to running and returns it, or None."""
+    req = RecomputeRequest.objects.filter(status=RecomputeRequest.PENDING).select_related("event__sport").first()
+    if req is None:
+        return None
+    req.status, req.started_at = RecomputeRequest.RUNNING, timezone.now()
+    req.save(update_fields=["status", "started_at"])
+    return req
+
+
+def process_next():
+    """Runs one queued recompute. Returns False when the queue is empty."""
+    req = claim_next()
+    if req is None:
+        return False
+    try:
+        retry_on_locked(update_championship)(req.event)
+    except Exception:
+        logger.exception("Recompute failed for %s", req.event)
+        req.status, req.error = RecomputeRequest.FAILED, traceback.format_exc()
+        req.save(update_fields=["status", "error"])
+    else:
+        req.delete()
+    return True
+
+
+def requeue_stale():
+    """Puts back requests left running by a worker that died mid-recompute."""
+    for req in RecomputeRequest.objects.filter(status=RecomputeRequest.RUNNING):
+        if RecomputeRequest.objects.filter(event_id=req.event_id, status=RecomputeRequest.PENDING).exists():
+            req.delete()
+        else:
+            req.status = RecomputeRequest.PENDING
+            req.save(update_fields=["status"])
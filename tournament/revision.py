@@ -0,0 +1,97 @@
+"""
+Tournament revision counter.
+
+Every saved result (and every finished recompute) appends a TournamentRevision
+row; the newest id is the revision. The current value is mirrored into the
+shared cache so read paths can check it without touching the database, and so
+is the last revision of each event (fragment caches key on those).
+
+What goes into the cache is read back from the database after the commit,
+never compared with what the cache held: commits publishing out of order
+can't leave an older number behind, and a restored database with a lower
+counter replaces the old one on its first change.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .models import TournamentRevision
+
+CACHE_KEY = "tournament:revision"
+EVENT_KEY = "tournament:revision:event:{}"
+
+
+def bump_revision(kind, event_id=None):
+    """Records a change and returns the new revision number."""
+    rev = TournamentRevision.objects.create(kind=kind, event_id=event_id).pk
+    _on_commit(rev, event_id)
+    return rev
+
+
+def bump_events(kind, event_ids):
+    """bump_revision for a change shown in several events at once (a team
+    renamed in every event it plays), logged against each of them with one
+    insert. Returns the new revision number."""
+    rows = TournamentRevision.objects.bulk_create(
+        [TournamentRevision(kind=kind, event_id=pk) for pk in event_ids] or [TournamentRevision(kind=kind)]
+    )
+    for row in rows:
+        _on_commit(row.pk, row.event_id)
+    return rows[-1].pk
+
+
+def touch_event(event_id, rev):
+    """Marks an event as changed at rev without logging it against the event
+    (deletes, where the event row itself may be on its way out)."""
+    _on_commit(rev, event_id)
+
+
+def _on_commit(rev, event_id):
+    transaction.on_commit(lambda: _publish(rev, event_id))
+    if getattr(settings, "RECOMPUTE_EAGER", False):
+        # No recompute worker to re-render the Nginx pages when idle
+        # (tournament.publisher), so the request that made the change does it.
+        # A failure is logged, never raised into the saved request.
+        transaction.on_commit(_publish_pages, robust=True)
+
+
+def _publish_pages():
+    from .publisher import publish_if_stale   # publisher renders views, which import this module
+    publish_if_stale()
+
+
+def current_revision():
+    rev = cache.get(CACHE_KEY)
+    if rev is None:
+        rev = TournamentRevision.objects.aggregate(r=Max("id"))["r"] or 0
+        cache.set(CACHE_KEY, rev, None)
+    return rev
+
+
+def event_revisions(event_ids):
+    """{event_id: revision of the event's last change} (0 if it never changed)."""
+    keys = {EVENT_KEY.format(pk): pk for pk in event_ids}
+    found = cache.get_many(list(keys))
+    revisions = {keys[key]: rev for key, rev in found.items()}
+    missing = [pk for key, pk in keys.items() if key not in found]
+    if missing:
+        logged = dict(
+            TournamentRevision.objects.filter(event_id__in=missing)
+            .values("event_id").annotate(r=Max("id")).values_list("event_id", "r")
+        )
+        fresh = {pk: logged.get(pk, 0) for pk in missing}
+        cache.set_many({EVENT_KEY.format(pk): rev for pk, rev in fresh.items()}, None)
+        revisions.update(fresh)
+    return revisions
+
+
+def _publish(rev, event_id=None):
+    if event_id is None:
+        cache.set(CACHE_KEY, TournamentRevision.objects.aggregate(r=Max("id"))["r"] or 0, None)
+        return
+    latest = TournamentRevision.objects.aggregate(r=Max("id"), e=Max("id", filter=Q(event_id=event_id)))
+    cache.set_many({
+        CACHE_KEY: latest["r"] or 0,
+        EVENT_KEY.format(event_id): max(rev, latest["e"] or 0),
+    }, None)
@@ -0,0 +1,353 @@
+"""
+Paper scoresheets: printed with a QR code, photographed by referees, read
+back in bulk.
+
+render_sheet() draws one A4 sheet per match (150 dpi): a solid square in
+each corner, a QR code holding "MGCL-MATCH:<Match.id>", the fixture details
+and one box per side for the final score.
+
+read_scoresheet() takes a phone photo or scan of a filled-in sheet and runs
+entirely offline:
+
+  1. find the four corner squares and warp the sheet flat onto the layout it
+     was printed with (handles tilt, perspective and sideways photos);
+  2. decode the QR with pyzbar (OpenCV's detector if libzbar is missing)
+     where it was printed, or in the opposite corner for an upside-down photo;
+  3. OCR each score box with Tesseract, digits only.
+
+ingest() reads a batch in a process pool (one worker per CPU; workers get
+plain paths and return plain dicts) and stages the results as
+ScoresheetScan rows. Nothing reaches a Match until staff confirm the
+proposed score in the scoresheet queue.
+
+The vision stack (opencv-python, pyzbar, pytesseract) is in
+requirements.txt; pyzbar also needs the zbar shared library and pytesseract
+the tesseract binary. Without Tesseract, sheets are still matched to their
+fixture and staged with empty scores for staff to type in.
+"""
+import hashlib
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from PIL import Image, ImageDraw, ImageFont
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # printing and reading sheets both need OpenCV
+    cv2 = None
+
+try:
+    from pyzbar import pyzbar
+except ImportError:  # the Python package or libzbar missing: OpenCV decodes instead
+    pyzbar = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+from .models import Match, ScoresheetScan
+
+SHEET = (1240, 1754)                   # A4 at 150 dpi
+MARGIN, MARK = 50, 70                  # corner squares
+MARK_CENTRES = [
+    (MARGIN + MARK / 2, MARGIN + MARK / 2),
+    (SHEET[0] - MARGIN - MARK / 2, MARGIN + MARK / 2),
+    (SHEET[0] - MARGIN - MARK / 2, SHEET[1] - MARGIN - MARK / 2),
+    (MARGIN + MARK / 2, SHEET[1] - MARGIN - MARK / 2),
+]
+QR_BOX = (900, 180, 1160, 440)
+SCORE_BOXES = ((140, 760, 580, 1120), (660, 760, 1100, 1120))
+BOX_BORDER = 6
+
+PAYLOAD = "MGCL-MATCH:{}"
+PAYLOAD_RE = re.compile(r"^MGCL-MATCH:(\d+)$")
+OCR_CONFIG = "--psm 7 -c tessedit_char_whitelist=0123456789"
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".webp", ".bmp")
+MAX_SIDE = 2000                        # phone photos are scaled down to this first
+REVIEW_DIR = "scoresheets"
+
+
+def require_vision():
+    if cv2 is None:
+        raise RuntimeError("Scoresheets need opencv-python and numpy (see requirements.txt)")
+
+
+# --- printing ---
+
+def side_names(match):
+    """(team1, team2) as the sheet prints them: names once known, else the rule."""
+    if match.team1_id and match.team2_id:
+        return match.team1.name, match.team2.name
+    parts = re.split(r"\s+vs\.?\s+", match.opponent_rule or "", maxsplit=1, flags=re.I)
+    return (parts[0].strip(), parts[1].strip()) if len(parts) == 2 else ("Team 1", "Team 2")
+
+
+def printable_matches(queryset=None):
+    """Head-to-head matches still to be played. Swimming heats and bridge
+    aggregates have their own entry screens and get no sheet."""
+    queryset = Match.objects.all() if queryset is None else queryset
+    return (
+        queryset.filter(completed=False)
+        .exclude(event__sport__name__icontains="swimming")
+        .exclude(event__sport__name__icontains="bridge", opponent_rule__icontains="all teams")
+        .select_related("event__sport", "team1", "team2")
+        .order_by("date", "time", "event__event_id", "match_no")
+    )
+
+
+def qr_image(text, size):
+    modules = cv2.QRCodeEncoder.create().encode(text)   # includes the quiet zone
+    return Image.fromarray(modules).resize((size, size), Image.NEAREST)
+
+
+def render_sheet(match):
+    """One printable sheet (a 1-bit PIL image) for the match."""
+    require_vision()
+    img = Image.new("L", SHEET, 255)
+    draw = ImageDraw.Draw(img)
+    font = {size: ImageFont.load_default(size=size) for size in (24, 30, 44)}
+
+    for cx, cy in MARK_CENTRES:
+        draw.rectangle((cx - MARK / 2, cy - MARK / 2, cx + MARK / 2 - 1, cy + MARK / 2 - 1), fill=0)
+    x0, y0, x1, _ = QR_BOX
+    img.paste(qr_image(PAYLOAD.format(match.pk), x1 - x0), (x0, y0))
+
+    event = match.event
+    draw.text((140, 180), "MGCL 2026 SCORESHEET", font=font[44], fill=0)
+    draw.text((140, 250), f"{event.sport.name} | {event.name}", font=font[30], fill=0)
+    draw.text((140, 300), f"Match {match.match_no} | {match.get_match_type_display()} | Group {match.group}",
+              font=font[30], fill=0)
+    draw.text((140, 350), f"{match.date:%a %d %b %Y} {match.time:%H:%M} | {match.venue_type} {match.venue_no}",
+              font=font[30], fill=0)
+    draw.text((140, 400), f"Match ID {match.pk}", font=font[24], fill=0)
+
+    for (bx0, by0, bx1, by1), name in zip(SCORE_BOXES, side_names(match)):
+        draw.text(((bx0 + bx1) / 2, by0 - 30), name[:28], font=font[30], fill=0, anchor="ms")
+        draw.rectangle((bx0, by0, bx1, by1), outline=0, width=BOX_BORDER)
+    draw.text((SHEET[0] / 2, (SCORE_BOXES[0][1] + SCORE_BOXES[0][3]) / 2), "vs", font=font[30], fill=0, anchor="mm")
+    draw.text((140, 1160), "Write the final score in each box in large, clear digits.", font=font[24], fill=0)
+    draw.text((140, 1195), "Photograph the whole sheet with all four corner squares in view.", font=font[24], fill=0)
+
+    for i, label in enumerate(("Referee", "Captain", "Captain")):
+        x = 140 + i * 340
+        draw.line((x, 1420, x + 280, 1420), fill=0, width=2)
+        draw.text((x, 1435), label, font=font[24], fill=0)
+    draw.text((140, 1560), (match.opponent_rule or "")[:90], font=font[24], fill=0)
+    return img.convert("1")
+
+
+def write_sheets(matches, f):
+    """Writes one page per match as a PDF into a path or binary file.
+    Returns the number of pages."""
+    pages = [render_sheet(m) for m in matches]
+    if pages:
+        pages[0].save(f, "PDF", save_all=True, append_images=pages[1:], resolution=150)
+    return len(pages)
+
+
+# --- reading ---
+
+def order_points(pts):
+    """Four points as top-left, top-right, bottom-right, bottom-left.
+    (imutils.perspective has this too, but importing it pulls in scipy.)"""
+    total, diff = pts.sum(axis=1), np.diff(pts, axis=1).ravel()
+    return np.array([pts[np.argmin(total)], pts[np.argmin(diff)], pts[np.argmax(total)], pts[np.argmax(diff)]],
+                    dtype="float32")
+
+
+def find_corner_marks(binary):
+    """Centres of the four corner squares ordered tl, tr, br, bl, or None."""
+    h, w = binary.shape
+    side = min(h, w)
+    # RETR_LIST: a dark desk around the paper would enclose the squares
+    contours, _ = cv2.findContours(binary, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    found = []
+    for c in contours:
+        area = cv2.contourArea(c)
+        if not (0.012 * side) ** 2 < area < (0.12 * side) ** 2:
+            continue
+        (_, _), (rw, rh), _ = cv2.minAreaRect(c)
+        if not rw or not rh or not 0.6 < rw / rh < 1.6 or area / (rw * rh) < 0.8:
+            continue
+        # solid, unlike the QR finder patterns and the score boxes
+        x, y, bw, bh = cv2.boundingRect(c)
+        mask = np.zeros((bh, bw), np.uint8)
+        cv2.drawContours(mask, [c - (x, y)], -1, 255, -1)
+        ink = cv2.countNonZero(cv2.bitwise_and(binary[y:y + bh, x:x + bw], mask))
+        if ink / max(cv2.countNonZero(mask), 1) < 0.9:
+            continue
+        m = cv2.moments(c)
+        found.append((m["m10"] / m["m00"], m["m01"] / m["m00"]))
+    if len(found) < 4:
+        return None
+    corners = [(0, 0), (w, 0), (w, h), (0, h)]
+    picked = {min(found, key=lambda p: (p[0] - cx) ** 2 + (p[1] - cy) ** 2) for cx, cy in corners}
+    if len(picked) != 4:
+        return None
+    return order_points(np.array(sorted(picked), dtype="float32"))
+
+
+def straighten(gray):
+    """The sheet warped onto its printed layout, or None if the corners aren't all in view."""
+    _, binary = cv2.threshold(cv2.GaussianBlur(gray, (5, 5), 0), 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    marks = find_corner_marks(binary)
+    if marks is None:
+        return None
+    tl, tr, br, bl = marks
+    if np.linalg.norm(tr - tl) > np.linalg.norm(bl - tl):
+        marks = np.array([tr, br, bl, tl])     # sheet lies sideways; the QR check fixes the direction
+    matrix = cv2.getPerspectiveTransform(marks, np.array(MARK_CENTRES, dtype="float32"))
+    return cv2.warpPerspective(gray, matrix, SHEET, flags=cv2.INTER_LINEAR, borderValue=255)
+
+
+def decode_qr(gray):
+    """Payload of the first QR code found, or None."""
+    if pyzbar is not None:
+        for symbol in pyzbar.decode(gray, symbols=[pyzbar.ZBarSymbol.QRCODE]):
+            return symbol.data.decode("utf-8", "replace")
+    data, _, _ = cv2.QRCodeDetector().detectAndDecode(gray)
+    return data or None
+
+
+def sheet_qr(sheet):
+    """(upright sheet, payload). Only the printed QR corner is searched, which
+    is far cheaper than the whole page; if it isn't there the photo was taken
+    upside down, so the sheet is turned and searched again."""
+    x0, y0, x1, y1 = QR_BOX
+    pad = 40
+    for turned in (False, True):
+        upright = cv2.rotate(sheet, cv2.ROTATE_180) if turned else sheet
+        payload = decode_qr(upright[y0 - pad:y1 + pad, x0 - pad:x1 + pad])
+        if payload:
+            return upright, payload
+    return sheet, None
+
+
+def read_box(sheet, box):
+    """(score, confidence) from one score box; (None, None) if it's empty."""
+    x0, y0, x1, y1 = box
+    inset = BOX_BORDER + 14
+    crop = sheet[y0 + inset:y1 - inset, x0 + inset:x1 - inset]
+    _, ink = cv2.threshold(crop, 128, 255, cv2.THRESH_BINARY_INV)
+    if cv2.countNonZero(ink) < 0.004 * ink.size:
+        return None, None
+    x, y, w, h = cv2.boundingRect(cv2.findNonZero(ink))
+    digits = cv2.copyMakeBorder(
+        cv2.bitwise_not(ink[y:y + h, x:x + w]), 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=255,
+    )
+    data = pytesseract.image_to_data(digits, config=OCR_CONFIG, output_type=pytesseract.Output.DICT)
+    words = [(t.strip(), float(c)) for t, c in zip(data["text"], data["conf"]) if t.strip()]
+    text = "".join(t for t, _ in words)
+    if not text.isdigit():
+        return None, 0.0
+    return int(text), max(0.0, min(c for _, c in words)) / 100
+
+
+def read_scoresheet(path, media_root):
+    """Reads one photo. Runs in a pool worker, so it only takes and returns
+    plain values; the straightened sheet is saved under media_root for review."""
+    cv2.setNumThreads(1)   # the pool already uses every core
+    raw = Path(path).read_bytes()
+    result = {
+        "source": Path(path).name, "digest": hashlib.sha1(raw).hexdigest(), "image": "",
+        "match_id": None, "team1_score": None, "team2_score": None, "confidence": None, "error": "",
+    }
+    gray = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        result["error"] = "Not an image"
+        return result
+    scale = MAX_SIDE / max(gray.shape)
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    sheet, qr = straighten(gray), None
+    if sheet is not None:
+        sheet, qr = sheet_qr(sheet)
+    qr = qr or decode_qr(gray)
+    found = PAYLOAD_RE.match(qr) if qr else None
+    if found:
+        result["match_id"] = int(found.group(1))
+
+    review = sheet if sheet is not None else gray
+    name = f"{REVIEW_DIR}/{result['digest']}.jpg"
+    os.makedirs(Path(media_root) / REVIEW_DIR, exist_ok=True)
+    cv2.imwrite(str(Path(media_root) / name), cv2.resize(review, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA),
+                [cv2.IMWRITE_JPEG_QUALITY, 70])
+    result["image"] = name
+
+    if sheet is None:
+        result["error"] = "Corner squares not found"
+    elif not found:
+        result["error"] = "No scoresheet QR code" if not qr else f"Unknown QR code {qr[:40]!r}"
+    elif pytesseract is None:
+        result["error"] = "OCR unavailable: pytesseract is not installed"
+    else:
+        try:
+            (s1, c1), (s2, c2) = (read_box(sheet, box) for box in SCORE_BOXES)
+        except pytesseract.TesseractNotFoundError:
+            result["error"] = "OCR unavailable: tesseract is not installed"
+        else:
+            result["team1_score"], result["team2_score"] = s1, s2
+            confidences = [c for c in (c1, c2) if c is not None]
+            result["confidence"] = min(confidences) if confidences else None
+            if s1 is None or s2 is None:
+                result["error"] = "Score box empty or unreadable"
+    return result
+
+
+def image_paths(folder):
+    return sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+
+
+def read_all(paths, workers=None):
+    """read_scoresheet over paths in a process pool, results in input order."""
+    require_vision()
+    media_root = str(settings.MEDIA_ROOT)
+    paths = [str(p) for p in paths]
+    if len(paths) == 1 or workers == 1:
+        return [read_scoresheet(p, media_root) for p in paths]
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read_scoresheet, paths, [media_root] * len(paths),
+                             chunksize=max(1, len(paths) // (workers * 4))))
+
+
+def ingest(paths, workers=None):
+    """Reads the photos and stages them. Files already staged (same contents)
+    are skipped before reading. Returns (new ScoresheetScans, read results)."""
+    digests = {str(p): hashlib.sha1(Path(p).read_bytes()).hexdigest() for p in paths}
+    known = set(ScoresheetScan.objects.filter(digest__in=digests.values()).values_list("digest", flat=True))
+    results = read_all([p for p, d in digests.items() if d not in known], workers) if len(known) < len(digests) else []
+    match_ids = set(Match.objects.filter(pk__in={r["match_id"] for r in results if r["match_id"]}).values_list("pk", flat=True))
+
+    scans = {}
+    for r in results:
+        if r["digest"] in scans:
+            continue
+        match_id = r["match_id"] if r["match_id"] in match_ids else None
+        error = r["error"] or ("" if match_id else f"Match {r['match_id']} does not exist")
+        scans[r["digest"]] = ScoresheetScan(
+            match_id=match_id, source=r["source"], digest=r["digest"], image=r["image"],
+            team1_score=r["team1_score"], team2_score=r["team2_score"], confidence=r["confidence"],
+            status=ScoresheetScan.PENDING if match_id else ScoresheetScan.FAILED, error=error,
+        )
+    with transaction.atomic():
+        # staged by another run since `known` was read
+        for digest in ScoresheetScan.objects.filter(digest__in=scans).values_list("digest", flat=True):
+            del scans[digest]
+        created = ScoresheetScan.objects.bulk_create(list(scans.values()))
+    return created, results
+
+
+def sheets_pdf(matches):
+    """The sheets as PDF bytes."""
+    buf = io.BytesIO()
+    write_sheets(matches, buf)
+    return buf.getvalue()
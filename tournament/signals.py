@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .images import build_variants, load_manifest
+from .models import BridgeGroupResult, ChampionshipStanding, Event, ManualEventResult, Match, SwimmingResult, Team
+from .revision import bump_events, bump_revision, touch_event
+
+RESULT_KINDS = {
+    Match: "score",
+    BridgeGroupResult: "bridge",
+    SwimmingResult: "swimming",
+    ManualEventResult: "manual",
+}
+
+
+# Connected per model: a receiver without a sender would count as a delete
+# listener for every model and turn off Django's fast (single-query) deletes.
+@receiver(post_save, sender=Match)
+@receiver(post_save, sender=BridgeGroupResult)
+@receiver(post_save, sender=SwimmingResult)
+@receiver(post_save, sender=ManualEventResult)
+def bump_on_result_save(sender, instance, **kwargs):
+    # ManualEventResult.event_id is the programme number, not an Event key
+    rev = bump_revision(RESULT_KINDS[sender], None if sender is ManualEventResult else instance.event_id)
+    if sender is Match:
+        # update() does not fire post_save again
+        Match.objects.filter(pk=instance.pk).update(revision=rev)
+        instance.revision = rev
+
+
+@receiver(post_delete, sender=Match)
+@receiver(post_delete, sender=BridgeGroupResult)
+@receiver(post_delete, sender=SwimmingResult)
+@receiver(post_delete, sender=ManualEventResult)
+def bump_on_result_delete(sender, instance, **kwargs):
+    rev = bump_revision(RESULT_KINDS[sender])
+    if sender is not ManualEventResult:
+        touch_event(instance.event_id, rev)
+
+
+@receiver(post_save, sender=ChampionshipStanding)
+@receiver(post_delete, sender=ChampionshipStanding)
+def bump_on_standing_edit(sender, instance, **kwargs):
+    # Admin corrections; the engine's bulk writes bump the revision themselves
+    bump_revision("standings")
+
+
+@receiver(post_save, sender=Team)
+def bump_on_team_edit(sender, instance, **kwargs):
+    # A team's name and pool are baked into every cached page that shows it,
+    # fixture blocks included, and those are keyed on their event's revision
+    events = Match.objects.filter(Q(team1=instance) | Q(team2=instance)).order_by().values_list("event_id", flat=True)
+    bump_events("team", sorted(set(events)))
+
+
+@receiver(post_save, sender=Event)
+def bump_on_event_edit(sender, instance, **kwargs):
+    bump_revision("event", instance.pk)
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=Event)
+def derive_uploaded_image(sender, instance, **kwargs):
+    image = instance.icon if sender is Team else instance.logo
+    # Uploads get fresh names, so a name already in the manifest is done
+    if image and image.name not in load_manifest():
+        # The save has committed by then: a codec failure is logged, not raised
+        # (the {% picture %} tag falls back to the original, and
+        # build_image_variants can redo it)
+        transaction.on_commit(lambda: build_variants([image.name]), robust=True)
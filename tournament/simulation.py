@@ -0,0 +1,281 @@
+"""
+Monte Carlo odds for the whole programme.
+
+Plays every incomplete match of every event many times at once with NumPy
+(one array lane per simulated tournament), using the same rules as the engine:
+round-robin tables ranked by wins then score difference, the compiled bracket
+slots, and the 100/70/50/40/30/10 placement scale. Completed matches keep
+their real result.
+
+Match odds use a light strength model: each team's head-to-head record across
+the programme, Laplace-smoothed, combined with the log5 formula. Untested
+teams are therefore 50/50.
+
+Results are stored per tournament revision in SimulationResult; the public
+odds page only ever reads the latest stored row.
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .bracket import SEMI_FINALS
+from .engine import PLACEMENT_POINTS, bracket_order
+from .models import (
+    BracketSlot, BridgeGroupResult, Event, Match, SimulationResult, SwimmingResult, Team,
+)
+from .revision import current_revision
+
+SWIMMING_POINTS = (100, 70, 50, 40, 30, 10)
+MAX_MARGIN = 10
+KEEP_RESULTS = 5
+
+
+class TournamentData:
+    """Everything the simulator needs, loaded with one query per table."""
+
+    def __init__(self):
+        self.teams = list(Team.objects.order_by("pk"))
+        self.index = {t.pk: i for i, t in enumerate(self.teams)}
+        self.events = list(Event.objects.select_related("sport").order_by("event_id", "pk"))
+
+        self.matches = {}
+        for m in Match.objects.order_by("match_no"):
+            self.matches.setdefault(m.event_id, {})[m.pk] = m
+        self.slots = {}
+        match_event = {pk: eid for eid, ms in self.matches.items() for pk in ms}
+        for s in BracketSlot.objects.all():
+            self.slots.setdefault(match_event[s.match_id], {}).setdefault(s.match_id, {})[s.position] = s
+        self.bridge = {(r.event_id, r.group): r for r in BridgeGroupResult.objects.all()}
+        self.swimming = {r.event_id: r for r in SwimmingResult.objects.all()}
+
+    def pools(self):
+        pools = {}
+        for i, t in enumerate(self.teams):
+            pools.setdefault(t.pool_id, []).append(i)
+        return {g: np.array(members) for g, members in pools.items()}
+
+    def win_matrix(self):
+        """P[i, j]: chance team i beats team j."""
+        n = len(self.teams)
+        won, played = np.zeros(n), np.zeros(n)
+        for ms in self.matches.values():
+            for m in ms.values():
+                if not m.completed or not m.winner_team_id or not m.loser_team_id:
+                    continue
+                if m.winner_team_id == m.loser_team_id:
+                    continue
+                won[self.index[m.winner_team_id]] += 1
+                played[self.index[m.winner_team_id]] += 1
+                played[self.index[m.loser_team_id]] += 1
+        s = (won + 1) / (played + 2)
+        a, b = s[:, None], s[None, :]
+        return a * (1 - b) / (a * (1 - b) + b * (1 - a))
+
+
+class EventSimulation:
+    """One event played out `runs` times. Teams are column indexes."""
+
+    def __init__(self, data, event, rng, runs, p_win):
+        self.data, self.event, self.rng, self.runs, self.p_win = data, event, rng, runs, p_win
+        self.n_teams = len(data.teams)
+        self.lanes = np.arange(runs)
+        self.points = np.zeros((runs, self.n_teams), dtype=np.int32)
+        self.medals = {m: np.zeros((runs, self.n_teams), dtype=bool) for m in ("gold", "silver", "bronze")}
+        self.semis = None
+        self.sport = event.sport.name.lower()
+        self.matches = data.matches.get(event.pk, {})
+
+    def run(self):
+        if "swimming" in self.sport:
+            self.play_swimming()
+        else:
+            self.play_bracket(self.group_rankings())
+        return self
+
+    def idx(self, team_id):
+        return self.data.index.get(team_id, -1)
+
+    def play(self, t1, t2):
+        team1_won = self.rng.random(self.runs) < self.p_win[t1, t2]
+        return np.where(team1_won, t1, t2), np.where(team1_won, t2, t1)
+
+    def award(self, teams, points, medal=""):
+        self.points[self.lanes, teams] += points
+        if medal:
+            self.medals[medal][self.lanes, teams] = True
+
+    # --- group stage ---
+
+    def group_rankings(self):
+        pools = self.data.pools()
+        if "bridge" in self.sport:
+            return {g: self.bridge_ranking(g, members) for g, members in pools.items()}
+        return {g: self.round_robin(g, members) for g, members in pools.items()}
+
+    def bridge_ranking(self, group, members):
+        res = self.data.bridge.get((self.event.pk, group))
+        if res:
+            fixed = [self.idx(res.first_id), self.idx(res.second_id), self.idx(res.third_id)]
+            return np.broadcast_to(np.array(fixed), (self.runs, 3))
+        shuffle = np.argsort(self.rng.random((self.runs, len(members))), axis=1)
+        return members[shuffle]
+
+    def round_robin(self, group, members):
+        k = len(members)
+        local = {team: i for i, team in enumerate(members)}
+        wins = np.zeros((self.runs, k), dtype=np.int64)
+        diff = np.zeros((self.runs, k), dtype=np.int64)
+
+        for m in self.matches.values():
+            if m.group != group or not m.team1_id or not m.team2_id:
+                continue
+            t1, t2 = self.idx(m.team1_id), self.idx(m.team2_id)
+            if m.completed:
+                w = self.idx(m.winner_team_id)
+                margin = (m.team1_score or 0) - (m.team2_score or 0)
+                for team, sign in ((t1, 1), (t2, -1)):
+                    if team in local:
+                        wins[:, local[team]] += int(team == w)
+                        diff[:, local[team]] += sign * margin
+                continue
+            winner, _ = self.play(np.full(self.runs, t1), np.full(self.runs, t2))
+            margin = self.rng.integers(1, MAX_MARGIN + 1, self.runs)
+            for team in (t1, t2):
+                if team in local:
+                    won = winner == team
+                    wins[:, local[team]] += won
+                    diff[:, local[team]] += np.where(won, margin, -margin)
+
+        # wins, then score difference, then lowest team id (engine.GROUP_RANKING).
+        # Sorted on separate keys: real results are not capped at MAX_MARGIN, so
+        # no packed single key can be sure a big margin never outweighs a win.
+        by_id = np.broadcast_to(np.arange(k), (self.runs, k))
+        return members[np.lexsort((by_id, -diff, -wins), axis=-1)]
+
+    # --- knockouts ---
+
+    def play_bracket(self, rankings):
+        slots = self.data.slots.get(self.event.pk, {})
+        results = {}
+        for match in bracket_order(self.matches, slots):
+            pair = slots[match.pk]
+            if match.completed:
+                fixed = [self.idx(x) for x in (match.team1_id, match.team2_id, match.winner_team_id, match.loser_team_id)]
+                if min(fixed) < 0:
+                    continue
+                results[match.pk] = tuple(np.full(self.runs, x) for x in fixed)
+            elif len(pair) == 2:
+                t1, t2 = (self.slot_teams(pair[p], rankings, results) for p in (1, 2))
+                if t1 is None or t2 is None:
+                    continue
+                results[match.pk] = (t1, t2) + self.play(t1, t2)
+            else:
+                continue
+
+            t1, t2, winner, loser = results[match.pk]
+            if match.match_type in SEMI_FINALS:
+                if self.semis is None:
+                    self.semis = np.zeros((self.runs, self.n_teams), dtype=bool)
+                self.semis[self.lanes, t1] = True
+                self.semis[self.lanes, t2] = True
+            if match.match_type in PLACEMENT_POINTS:
+                win_pts, win_medal, lose_pts, lose_medal = PLACEMENT_POINTS[match.match_type]
+                self.award(winner, win_pts, win_medal)
+                self.award(loser, lose_pts, lose_medal)
+
+    def slot_teams(self, slot, rankings, results):
+        if slot.source == BracketSlot.GROUP:
+            ranked = rankings.get(slot.source_group)
+            if ranked is None or ranked.shape[1] < slot.source_rank:
+                return None
+            return ranked[:, slot.source_rank - 1]
+        src = results.get(slot.source_match_id)
+        if src is None:
+            return None
+        return src[2] if slot.source == BracketSlot.WINNER else src[3]
+
+    # --- swimming ---
+
+    def play_swimming(self):
+        res = self.data.swimming.get(self.event.pk)
+        if res:
+            fixed = [self.idx(getattr(res, f"{p}_id")) for p in ("first", "second", "third", "fourth", "fifth", "sixth")]
+            order = np.broadcast_to(np.array(fixed), (self.runs, len(fixed)))
+        else:
+            order = np.argsort(self.rng.random((self.runs, self.n_teams)), axis=1)
+        for place, pts in enumerate(SWIMMING_POINTS[:order.shape[1]]):
+            self.award(order[:, place], pts, ("gold", "silver", "bronze")[place] if place < 3 else "")
+
+
+def simulate_tournament(runs=100_000, seed=None):
+    """Returns the odds payload stored in SimulationResult.payload."""
+    data = TournamentData()
+    rng = np.random.default_rng(seed)
+    p_win = data.win_matrix()
+    n_teams = len(data.teams)
+    total = np.zeros((runs, n_teams), dtype=np.int32)
+    golds = np.zeros((runs, n_teams), dtype=np.int32)
+
+    events = []
+    for event in data.events:
+        sim = EventSimulation(data, event, rng, runs, p_win).run()
+        total += sim.points
+        golds += sim.medals["gold"]
+        events.append({
+            "id": event.pk, "event_id": event.event_id, "name": event.name, "sport": event.sport.name,
+            "teams": {
+                str(t.pk): {
+                    "semi": None if sim.semis is None else _p(sim.semis[:, i].mean()),
+                    "gold": _p(sim.medals["gold"][:, i].mean()),
+                    "silver": _p(sim.medals["silver"][:, i].mean()),
+                    "bronze": _p(sim.medals["bronze"][:, i].mean()),
+                    "points": round(float(sim.points[:, i].mean()), 1),
+                } for i, t in enumerate(data.teams)
+            },
+        })
+
+    # Championship position: points, then golds (ties share the better slot order by team id)
+    key = total.astype(np.int64) * 100 + golds
+    positions = np.argsort(np.argsort(-key, axis=1, kind="stable"), axis=1)
+    championship = {}
+    for i, t in enumerate(data.teams):
+        values, counts = np.unique(total[:, i], return_counts=True)
+        p5, p50, p95 = np.percentile(total[:, i], [5, 50, 95])
+        championship[str(t.pk)] = {
+            "mean": round(float(total[:, i].mean()), 1),
+            "p5": int(p5), "p50": int(p50), "p95": int(p95),
+            "positions": [_p((positions[:, i] == pos).mean()) for pos in range(n_teams)],
+            "distribution": {str(int(v)): _p(c / runs) for v, c in zip(values, counts) if c / runs >= 0.0005},
+        }
+
+    return {
+        "runs": runs,
+        "teams": [{"id": t.pk, "name": t.name, "code": t.code} for t in data.teams],
+        "events": events,
+        "championship": championship,
+    }
+
+
+def refresh_simulation(runs=None, force=False):
+    """Simulates the current revision unless it is already stored.
+    Returns the new SimulationResult, or None if nothing was done."""
+    runs = settings.SIMULATION_RUNS if runs is None else runs
+    if runs <= 0:
+        return None
+    revision = current_revision()
+    if not force and SimulationResult.objects.filter(revision=revision).exists():
+        return None
+
+    started = time.perf_counter()
+    payload = simulate_tournament(runs)
+    result, _ = SimulationResult.objects.update_or_create(revision=revision, defaults={
+        "runs": runs, "elapsed": time.perf_counter() - started, "payload": payload,
+    })
+    stale = SimulationResult.objects.values_list("pk", flat=True)[KEEP_RESULTS:]
+    SimulationResult.objects.filter(pk__in=list(stale)).delete()
+    return result
+
+
+def _p(x):
+    return round(float(x), 4)
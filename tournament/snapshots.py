@@ -0,0 +1,102 @@
+"""
+Pre-built read payloads for the public pages.
+
+Polling endpoints serve these as-is. The leaderboard JSON is built once per
+tournament revision (tournament.revision), so a client that already has the
+current revision gets a 304 after a single cache read. The manual
+championship table is keyed on the revision as well: it shows the standings,
+which the engine, the recompute worker and admin edits move as much as the
+manual sheet does. Fixture blocks are cached per event under that event's
+own revision.
+"""
+import json
+import time
+
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import BridgeGroupResult, ChampionshipStanding, ManualEventResult, Match, Team
+from .revision import current_revision, event_revisions
+
+CHAMPIONSHIP_KEY = "snapshot:championship:{}"
+
+# Old revisions are never read again; this only bounds the cache's disk use
+PAYLOAD_TIMEOUT = 60 * 60 * 24
+
+
+def etag_for(name, revision):
+    return f'"{name}-{revision}"'
+
+
+def leaderboard_payload(revision=None):
+    """(json_bytes, built_at) for the championship standings at `revision`."""
+    revision = current_revision() if revision is None else revision
+    key = f"snapshot:leaderboard:{revision}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    rows = ChampionshipStanding.objects.order_by("-total_points", "-gold", "-silver", "-bronze").values_list(
+        "team__name", "total_points", "gold", "silver", "bronze"
+    )
+    data = [
+        {"rank": i, "team": name, "points": points, "gold": gold, "silver": silver, "bronze": bronze}
+        for i, (name, points, gold, silver, bronze) in enumerate(rows, start=1)
+    ]
+    payload = (json.dumps(data, separators=(",", ":")).encode(), int(time.time()))
+    cache.set(key, payload, PAYLOAD_TIMEOUT)
+    return payload
+
+
+def championship_table():
+    """Rendered manual championship table (HTML) at the current revision."""
+    revision = current_revision()
+    html = cache.get(CHAMPIONSHIP_KEY.format(revision))
+    if html is None:
+        html = rebuild_championship_table(revision)
+    return mark_safe(html)
+
+
+def rebuild_championship_table(revision=None):
+    """Renders the table from the database and stores it under `revision`.
+    manual_leaderboard_entry calls it after its commit so the first viewer
+    finds it ready; read-only, so teams without a standing yet just show the
+    template defaults."""
+    revision = current_revision() if revision is None else revision
+    teams = list(Team.objects.order_by("code"))
+    standings = {s.team_id: s for s in ChampionshipStanding.objects.all()}
+    html = render_to_string("tournament/championship_table.html", {
+        "teams": teams,
+        "results": ManualEventResult.objects.all(),
+        "standings_map": {t.code: standings.get(t.pk) for t in teams},
+    })
+    cache.set(CHAMPIONSHIP_KEY.format(revision), html, PAYLOAD_TIMEOUT)
+    return html
+
+
+def fixture_sections(request, events):
+    """Rendered fixtures block for each event (Event objects with sport
+    loaded), in order. Blocks are keyed by the event's revision, so a result
+    only re-renders its own event. Staff see score links, hence their own copy."""
+    revisions = event_revisions([e.pk for e in events])
+    staff = int(request.user.is_staff)
+    keys = {e.pk: f"fragment:fixtures:{e.pk}:{revisions[e.pk]}:{int(e.is_locked)}:{staff}" for e in events}
+    html = cache.get_many(list(keys.values()))
+
+    stale = [e for e in events if keys[e.pk] not in html]
+    if stale:
+        prefetch_related_objects(stale, Prefetch(
+            "matches", queryset=Match.objects.select_related("team1", "team2").order_by("match_no")
+        ))
+        rankings = {}
+        for r in BridgeGroupResult.objects.filter(event__in=stale).select_related("first", "second", "third"):
+            rankings.setdefault(r.event_id, {})[r.group] = r
+        fresh = {
+            keys[e.pk]: render_to_string("tournament/fixtures_event.html", {"event": e, "rankings": rankings.get(e.pk)}, request)
+            for e in stale
+        }
+        cache.set_many(fresh, PAYLOAD_TIMEOUT)
+        html.update(fresh)
+    return [mark_safe(html[keys[e.pk]]) for e in events]
@@ -0,0 +1,135 @@
+"""
+Synthetic tournaments for benchmarks and load tests.
+
+build_tournament() lays out a programme shaped like the real MGCL one (teams
+in pools, round robin, then a knockout from bracket.knockout_plan driven by
+opponent_rule) at any size. play_event()/score_stream() then record
+randomized results in schedule order, the same way the score entry views do.
+"""
+import itertools
+import string
+from datetime import date, time
+
+from .bracket import compile_bracket, knockout_plan
+from .models import BridgeGroupResult, Event, Match, Pool, Sport, SwimmingResult, Team
+
+SPORTS = ("Badminton", "Tennis", "Table Tennis", "Snooker", "Bridge", "Swimming")
+
+SWIMMING_PLACES = ("first", "second", "third", "fourth", "fifth", "sixth")
+
+
+def build_tournament(teams=6, pools=2, events=17, matches=None, sports=SPORTS):
+    """Creates teams, events and fixtures; returns the events.
+
+    matches caps the round-robin fixtures per event (pairings are cycled
+    across pools until the count is reached); None plays one full round
+    robin. The top two of each pool go through to the knockout (byes fill
+    the bracket up, see bracket.knockout_plan), so more than eight pools is
+    a ValueError; pools of one team get no knockout. Sports that need more
+    teams than there are (Bridge needs three per pool, Swimming six overall)
+    are left out of the rotation."""
+    if not 1 <= pools <= min(teams, 26):
+        raise ValueError("pools must be between 1 and min(teams, 26)")
+
+    letters = string.ascii_uppercase[:pools]
+    Pool.objects.bulk_create([Pool(code=g, order=i) for i, g in enumerate(letters)], ignore_conflicts=True)
+    team_objs = Team.objects.bulk_create([
+        Team(code=f"S{i + 1}", name=f"Synthetic {i + 1}", pool_id=letters[i % pools]) for i in range(teams)
+    ])
+    members = {g: [t for t in team_objs if t.pool_id == g] for g in letters}
+
+    usable = [
+        s for s in sports
+        if not ("bridge" in s.lower() and min(len(m) for m in members.values()) < 3)
+        and not ("swimming" in s.lower() and teams < len(SWIMMING_PLACES))
+    ]
+    sport_objs = {name: Sport.objects.get_or_create(name=name)[0] for name in usable}
+    event_objs = Event.objects.bulk_create([
+        Event(sport=sport_objs[usable[i % len(usable)]], event_id=i + 1, name=f"{usable[i % len(usable)]} Event {i + 1}")
+        for i in range(events)
+    ])
+
+    smallest = min(len(m) for m in members.values())
+    knockout = knockout_plan(letters, advance=2, thirds=smallest >= 3) if smallest >= 2 else []
+
+    fixtures = []
+    for event in event_objs:
+        fixtures += _event_fixtures(event, members, matches, knockout)
+    Match.objects.bulk_create(fixtures)
+
+    if knockout:
+        for event in event_objs:
+            compile_bracket(event)
+    return event_objs
+
+
+def _event_fixtures(event, members, limit, knockout):
+    sport = event.sport.name.lower()
+    day, slot = date(2026, 1, 9), itertools.count()
+
+    def fixture(group, match_type, rule, team1=None, team2=None):
+        n = next(slot)
+        return Match(
+            event=event, match_no=n + 1, group=group, match_type=match_type, opponent_rule=rule,
+            team1=team1, team2=team2, date=day, time=time(8 + n // 3 % 14, n % 3 * 20),
+            venue_type="Court", venue_no="1",
+        )
+
+    if "swimming" in sport:
+        return [fixture(Match.KNOCKOUT, "F", "All Teams")]
+    if "bridge" in sport:
+        out = [fixture(g, "RR", f"All Teams of Group {g}") for g in members]
+    else:
+        pairings = [list(itertools.combinations(teams, 2)) for teams in members.values()]
+        round_robin = [pair for batch in itertools.zip_longest(*pairings) for pair in batch if pair]
+        if limit is not None:
+            round_robin = list(itertools.islice(itertools.cycle(round_robin), limit)) if round_robin else []
+        out = [fixture(t1.pool_id, "RR", f"{t1.name} vs {t2.name}", t1, t2) for t1, t2 in round_robin]
+    return out + [fixture(Match.KNOCKOUT, match_type, rule) for match_type, rule in knockout]
+
+
+def play_event(event, rng):
+    """Records a random result for each playable match in schedule order,
+    yielding after each one. Knockout teams are re-read from the database,
+    so the caller must run the engine between results for the bracket to
+    fill in."""
+    sport = event.sport.name.lower()
+    for match in Match.objects.filter(event=event).order_by("match_no"):
+        if match.match_type != "RR" or "swimming" in sport:
+            match.refresh_from_db()
+
+        if "swimming" in sport:
+            order = list(Team.objects.all())
+            rng.shuffle(order)
+            SwimmingResult.objects.update_or_create(event=event, defaults=dict(zip(SWIMMING_PLACES, order)))
+            match.record_result(order[0], label=f"Gold: {order[0].name}")
+        elif "bridge" in sport and match.match_type == "RR":
+            teams = list(Team.objects.filter(pool_id=match.group))
+            scores = sorted(((rng.uniform(20, 80), t) for t in teams), key=lambda x: x[0], reverse=True)[:3]
+            BridgeGroupResult.objects.update_or_create(event=event, group=match.group, defaults={
+                "first": scores[0][1], "second": scores[1][1], "third": scores[2][1],
+                "first_score": scores[0][0], "second_score": scores[1][0], "third_score": scores[2][0],
+            })
+            match.record_result(scores[0][1], label=f"1st: {scores[0][1].name}")
+        elif match.team1_id and match.team2_id:
+            s1, s2 = rng.sample(range(0, 22), 2)
+            match.team1_score, match.team2_score = s1, s2
+            winner, loser = (match.team1, match.team2) if s1 > s2 else (match.team2, match.team1)
+            match.record_result(winner, loser)
+        else:
+            continue
+        match.save()
+        yield match
+
+
+def score_stream(events, rng):
+    """Interleaves play_event() across events at random, like results
+    arriving from several courts at once. Yields (event, match)."""
+    live = {event.pk: (event, play_event(event, rng)) for event in events}
+    while live:
+        event, results = live[rng.choice(list(live))]
+        match = next(results, None)
+        if match is None:
+            del live[event.pk]
+            continue
+        yield event, match
@@ -1,4 +1,8 @@
 from django import template
+from django.conf import settings
+from django.utils.html import format_html, format_html_join
+
+from tournament.images import MIME, variants
 
 register = template.Library()
 
@@ -11,4 +15,25 @@ register = template.Library()
 
 @register.filter
 def get_item(dictionary, key):
-    return dictionary.get(key)
\ No newline at end of file
+    return dictionary.get(key)
+
+
+@register.simple_tag
+def picture(image, height, css_class="", alt="", style=""):
+    """<picture> with AVIF/WebP sources and a PNG <img>, sized for `height`
+    CSS px (tournament.images). image is an ImageField file or a name
+    relative to MEDIA_ROOT; unprocessed images get a plain <img>."""
+    name = getattr(image, "name", image) or ""
+    attrs = format_html_join("", ' {}="{}"', (
+        (key, value) for key, value in (("class", css_class), ("alt", alt), ("style", style)) if value or key == "alt"
+    ))
+    found = variants(name, int(height))
+    if found is None:
+        return format_html('<img src="{}"{}>', settings.MEDIA_URL + name, attrs)
+
+    def srcset(urls):
+        return ", ".join(f"{url} {density}" for density, url in urls.items())
+
+    png = found.pop("png")
+    sources = format_html_join("", '<source type="{}" srcset="{}">', ((MIME[fmt], srcset(urls)) for fmt, urls in found.items()))
+    return format_html('<picture>{}<img src="{}" srcset="{}"{}></picture>', sources, png["1x"], srcset(png), attrs)
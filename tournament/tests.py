@@ -1,3 +1,1438 @@
-from django.test import TestCase
+"""
+Query budgets for the hot paths, then behaviour tests for the engine, the
+bracket compiler and the caches in front of the public pages.
 
-# Create your tests here.
+Every public view, captain view, score-entry POST and engine entry point is
+run against two tournaments built with tournament.synthetic: one the size of
+MGCL 2026 (6 teams in 2 pools, a full round robin in 17 events) and one five
+times larger (30 teams, five times the fixtures and players). Both must fit
+the same budget, so a query count that grows with the data (an N+1) fails
+the build at the larger size even if it slips under the budget at the
+smaller one.
+
+Caches are emptied before every measurement: the budgets are for the cold
+path a page takes right after a result has moved the revision.
+"""
+import csv
+import io
+import os
+import random
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from tournament import (
+    database, engine, images, importer, live, metrics, publisher, recompute, revision, scoresheets, signals, simulation,
+)
+from tournament.bracket import knockout_plan, parse_opponent_rule
+from tournament.rebuild import rebuild_tournament, round_robin_rankings
+from tournament.models import (
+    BracketSlot, ChampionshipStanding, Event, EventPoints, ManualEventResult, Match, Player, Pool, RecomputeRequest,
+    ScoresheetScan, Team, TournamentRevision,
+)
+from tournament.snapshots import etag_for
+from tournament.synthetic import build_tournament, play_event, score_stream
+
+try:
+    import numpy as np
+except ImportError:  # the scoresheet tests skip without OpenCV (and its numpy)
+    np = None
+
+# Queries allowed per call, at every fixture size
+BUDGETS = {
+    # public views
+    "login_selection": 1,
+    "fixtures": 5,
+    "fixtures_event": 4,
+    "group_table": 2,
+    "leaderboard": 1,
+    "leaderboard_fragment": 1,
+    "leaderboard_data": 2,
+    "big_screen": 2,
+    "big_screen_feed": 3,
+    "manual_championship_view": 4,
+    "odds": 1,
+    "recompute_status": 1,
+    # captain views
+    "captain_dashboard": 4,
+    "select_squad": 7,
+    "select_squad_post": 11,
+    # staff views
+    "score_entry_post": 16,
+    "bridge_score_post": 24,
+    "swimming_score_post": 25,
+    "manual_entry": 5,
+    "manual_entry_post": 14,
+    "manual_penalty_post": 12,
+    "team_admin": 6,
+    "export_csv": 3,
+    "export_xlsx": 8,
+    "scoresheet_queue": 3,
+    "scoresheet_review_post": 13,
+    # engine
+    "update_championship": 8,
+    "update_championship_bridge": 9,
+    "update_championship_swimming": 7,
+    "calculate_group_standings": 4,
+    "resolve_bracket": 3,
+    "unlock_swimming_finals": 2,
+    "refresh_championship_totals": 3,
+    "group_tables": 1,
+    "rank_manual_standings": 6,
+    "rebuild_tournament": 8,
+}
+
+PLAYERS_PER_TEAM = 12
+
+
+def build_fixture(scale):
+    """A tournament `scale` times the MGCL size with half its results in."""
+    events = build_tournament(teams=6 * scale, pools=2, matches=None if scale == 1 else 6 * scale)
+    teams = list(Team.objects.order_by("code"))
+    Player.objects.bulk_create([
+        Player(team=t, name=f"{t.code} Player {i}", sport_label="All") for t in teams for i in range(PLAYERS_PER_TEAM)
+    ])
+    ManualEventResult.objects.bulk_create([
+        ManualEventResult(event_id=i, event_name=f"Event {i}", results_data={
+            t.code: {"pos": "", "pts": (i + n) % 5} for n, t in enumerate(teams)
+        }) for i in range(1, 18)
+    ])
+
+    ChampionshipStanding.objects.bulk_create([ChampionshipStanding(team=t) for t in teams])
+    open_matches = Match.objects.filter(match_type="RR", completed=False)[:4 * scale]
+    ScoresheetScan.objects.bulk_create([
+        ScoresheetScan(match=m, source=f"sheet{m.pk}.jpg", digest=f"{m.pk:040d}", team1_score=21, team2_score=m.pk % 20)
+        for m in open_matches
+    ])
+
+    captain = User.objects.create_user("captain", password="captain")
+    teams[0].account = captain
+    teams[0].save()
+    User.objects.create_user("referee", password="referee", is_staff=True)
+    User.objects.create_superuser("admin", password="admin")
+
+    rng, played = random.Random(2026), 0
+    target = Match.objects.count() // 2
+    for event, _ in score_stream(events, rng):
+        engine.update_championship(event)
+        played += 1
+        if played >= target:
+            break
+
+
+def sport_events(name):
+    return Event.objects.filter(sport__name__icontains=name).select_related("sport")
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    RECOMPUTE_EAGER=False,
+)
+class MGCLSizeQueryBudgetTests(TestCase):
+    SCALE = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        build_fixture(cls.SCALE)
+        cls.rr_event = sport_events("badminton").first()
+        cls.bridge_event = sport_events("bridge").first()
+        cls.swim_event = sport_events("swimming").first()
+        cls.captain_team = Team.objects.get(account__username="captain")
+
+    def assertBudget(self, name, func, *args, **kwargs):
+        """Calls func with cold caches and checks its queries against BUDGETS[name]."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args, **kwargs)
+        self.assertLessEqual(
+            len(ctx), BUDGETS[name],
+            f"{name} ran {len(ctx)} queries at {self.SCALE}x (budget {BUDGETS[name]}):\n"
+            + "\n".join(q["sql"] for q in ctx.captured_queries),
+        )
+        return result
+
+    def get(self, name, url, status=200):
+        response = self.assertBudget(name, self.client.get, url)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def post(self, name, url, data, status=302):
+        response = self.assertBudget(name, self.client.post, url, data)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def open_rr_match(self, event):
+        return Match.objects.filter(
+            event=event, match_type="RR", completed=False, team1__isnull=False, team2__isnull=False,
+        ).first() or Match.objects.filter(event=event, match_type="RR", team1__isnull=False).first()
+
+    # --- public views ---
+
+    def test_login_selection(self):
+        self.get("login_selection", reverse("login_selection"))
+
+    def test_fixtures(self):
+        self.get("fixtures", reverse("fixtures"))
+
+    def test_fixtures_event(self):
+        self.get("fixtures_event", reverse("fixtures") + f"?event={self.rr_event.pk}")
+
+    def test_group_table(self):
+        self.get("group_table", reverse("group_table", args=[self.rr_event.pk]))
+
+    def test_leaderboard(self):
+        self.get("leaderboard", reverse("leaderboard"))
+
+    def test_leaderboard_fragment(self):
+        self.get("leaderboard_fragment", reverse("leaderboard") + "?fragment=standings")
+
+    def test_leaderboard_data(self):
+        self.get("leaderboard_data", reverse("leaderboard_data"))
+
+    def test_big_screen(self):
+        self.get("big_screen", reverse("big_screen"))
+
+    def test_big_screen_feed(self):
+        self.get("big_screen_feed", reverse("big_screen_feed") + "?since=0")
+
+    def test_manual_championship_view(self):
+        self.get("manual_championship_view", reverse("manual_championship_view"))
+
+    def test_odds(self):
+        self.get("odds", reverse("odds"))
+
+    def test_recompute_status(self):
+        self.get("recompute_status", reverse("recompute_status"))
+
+    # --- captain views ---
+
+    def test_captain_dashboard(self):
+        self.client.login(username="captain", password="captain")
+        self.get("captain_dashboard", reverse("captain_dashboard"))
+
+    def test_select_squad(self):
+        self.client.login(username="captain", password="captain")
+        match = Match.objects.filter(team1=self.captain_team, event=self.rr_event).first()
+        self.get("select_squad", reverse("select_squad", args=[match.pk]))
+        player = Player.objects.filter(team=self.captain_team).first()
+        self.post("select_squad_post", reverse("select_squad", args=[match.pk]), {"players": [player.pk]})
+
+    # --- staff views ---
+
+    def test_score_entry_post(self):
+        self.client.login(username="referee", password="referee")
+        match = self.open_rr_match(self.rr_event)
+        self.post("score_entry_post", reverse("score_entry", args=[match.pk]), {"team1_score": 21, "team2_score": 15})
+
+    def test_bridge_score_post(self):
+        self.client.login(username="referee", password="referee")
+        match = Match.objects.filter(event=self.bridge_event, match_type="RR").first()
+        teams = Team.objects.filter(pool_id=match.group)
+        self.post("bridge_score_post", reverse("score_entry", args=[match.pk]), {
+            f"score_{t.pk}": 50 + i for i, t in enumerate(teams)
+        })
+
+    def test_swimming_score_post(self):
+        self.client.login(username="referee", password="referee")
+        match = Match.objects.filter(event=self.swim_event).first()
+        teams = Team.objects.order_by("code")[:6]
+        self.post("swimming_score_post", reverse("score_entry", args=[match.pk]), {
+            f"rank_{i}": t.pk for i, t in enumerate(teams, start=1)
+        })
+
+    def test_manual_entry(self):
+        self.client.login(username="referee", password="referee")
+        self.get("manual_entry", reverse("manual_leaderboard_entry"))
+        codes = Team.objects.values_list("code", flat=True)
+        self.post("manual_entry_post", reverse("manual_leaderboard_entry"), {
+            "event_id": 1, **{f"pts_{c}": 3 for c in codes}, **{f"pos_{c}": "1" for c in codes},
+        }, status=200)
+        self.post("manual_penalty_post", reverse("manual_leaderboard_entry"), {
+            "event_id": "penalty", **{f"penalty_{c}": 1 for c in codes},
+        }, status=200)
+
+    def test_team_admin(self):
+        self.client.login(username="admin", password="admin")
+        self.get("team_admin", reverse("admin:tournament_team_changelist"))
+
+    def test_export_csv(self):
+        self.client.login(username="referee", password="referee")
+
+        def download(url):
+            response = self.client.get(url)
+            return response, b"".join(response.streaming_content)
+
+        response, body = self.assertBudget("export_csv", download, reverse("export_csv", args=["matches"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body.count(b"\n"), Match.objects.count() + 1)
+
+    def test_export_xlsx(self):
+        self.client.login(username="referee", password="referee")
+        response = self.assertBudget("export_xlsx", self.client.get, reverse("export_xlsx", args=["all"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"PK"))
+
+    async def test_exports_stream_under_asgi(self):
+        # a sync iterator would be read to the end before the first byte went out
+        await self.async_client.alogin(username="referee", password="referee")
+        response = await self.async_client.get(reverse("export_csv", args=["matches"]))
+        self.assertTrue(response.is_async)
+        body = b"".join([part async for part in response])
+        self.assertEqual(body.count(b"\n"), await Match.objects.acount() + 1)
+
+        response = await self.async_client.get(reverse("export_xlsx", args=["all"]))
+        self.assertTrue(response.is_async)
+        self.assertTrue(b"".join([part async for part in response]).startswith(b"PK"))
+
+    def test_scoresheet_queue(self):
+        self.client.login(username="referee", password="referee")
+        self.get("scoresheet_queue", reverse("scoresheet_queue"))
+        scan = ScoresheetScan.objects.filter(match__completed=False).first()
+        self.post("scoresheet_review_post", reverse("scoresheet_review", args=[scan.pk]), {
+            "action": "confirm", "team1_score": 21, "team2_score": 11,
+        })
+
+    # --- engine ---
+
+    def test_update_championship(self):
+        self.assertBudget("update_championship", engine.update_championship, self.rr_event)
+
+    def test_update_championship_bridge(self):
+        self.assertBudget("update_championship_bridge", engine.update_championship, self.bridge_event)
+
+    def test_update_championship_swimming(self):
+        self.assertBudget("update_championship_swimming", engine.update_championship, self.swim_event)
+
+    def test_calculate_group_standings(self):
+        self.assertBudget("calculate_group_standings", engine.calculate_group_standings, self.rr_event)
+
+    def test_resolve_bracket(self):
+        self.assertBudget("resolve_bracket", engine.resolve_bracket, self.rr_event)
+
+    def test_unlock_swimming_finals(self):
+        self.assertBudget("unlock_swimming_finals", engine.unlock_swimming_finals, self.swim_event)
+
+    def test_refresh_championship_totals(self):
+        self.assertBudget("refresh_championship_totals", engine.refresh_championship_totals)
+
+    def test_group_tables(self):
+        self.assertBudget("group_tables", engine.group_tables, self.rr_event)
+
+    def test_rank_manual_standings(self):
+        self.assertBudget("rank_manual_standings", engine.rank_manual_standings)
+
+    def test_rebuild_tournament(self):
+        # the fixture was played through the engine, so a full recompute agrees with it
+        plan = self.assertBudget("rebuild_tournament", rebuild_tournament)
+        self.assertFalse(plan)
+
+
+class ScaledQueryBudgetTests(MGCLSizeQueryBudgetTests):
+    SCALE = 5
+
+
+# --- behaviour ---
+
+def ledger_totals():
+    """{team_id: (points, gold, silver, bronze)} summed over EventPoints."""
+    totals = {}
+    for row in EventPoints.objects.all():
+        t = totals.setdefault(row.team_id, [0, 0, 0, 0])
+        t[0] += row.points; t[1] += row.gold; t[2] += row.silver; t[3] += row.bronze
+    return {team_id: tuple(t) for team_id, t in totals.items()}
+
+
+def standing_totals():
+    return {
+        s.team_id: (s.total_points, s.gold, s.silver, s.bronze)
+        for s in ChampionshipStanding.objects.exclude(total_points=0, gold=0, silver=0, bronze=0)
+    }
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    RECOMPUTE_EAGER=False,
+)
+class ChampionshipLedgerTests(TestCase):
+    def setUp(self):
+        self.events = build_tournament(teams=6, pools=2)
+
+    def play_season(self):
+        for event, _ in score_stream(self.events, random.Random(7)):
+            engine.update_championship(event)
+
+    def test_every_event_awards_the_full_scale(self):
+        self.play_season()
+        for event in self.events:
+            rows = EventPoints.objects.filter(event=event)
+            self.assertEqual(sum(r.points for r in rows), 300, event.name)
+            self.assertEqual([sum(getattr(r, m) for r in rows) for m in ("gold", "silver", "bronze")], [1, 1, 1], event.name)
+
+    def test_standings_are_the_ledger_sum(self):
+        self.play_season()
+        self.assertEqual(standing_totals(), ledger_totals())
+        self.assertFalse(rebuild_tournament(write=False))
+
+    def test_rebuild_repairs_a_corrupted_tournament(self):
+        # half a season: brackets are filled, not all of them played
+        rng, target = random.Random(7), Match.objects.count() // 2
+        for played, (event, _) in enumerate(score_stream(self.events, rng), start=1):
+            engine.update_championship(event)
+            if played == target:
+                break
+        knockout = Match.objects.filter(group=Match.KNOCKOUT, completed=False, team1__isnull=False, team2__isnull=False).first()
+        self.assertIsNotNone(knockout)
+
+        def state():
+            return (
+                standing_totals(), list(EventPoints.objects.order_by("pk").values_list("team", "points", "gold")),
+                list(Match.objects.order_by("pk").values_list("team1", "team2")),
+            )
+        healthy = state()
+
+        standing = ChampionshipStanding.objects.exclude(total_points=0).select_related("team").first()
+        ChampionshipStanding.objects.filter(pk=standing.pk).update(total_points=F("total_points") + 50)
+        row = EventPoints.objects.order_by("pk").first()
+        EventPoints.objects.filter(pk=row.pk).update(points=row.points + 7)
+        Match.objects.filter(pk=knockout.pk).update(team1=None, team2=None)
+
+        out = io.StringIO()
+        with self.assertRaises(CommandError) as raised:
+            call_command("recompute_tournament", "--verify", stdout=out)
+        self.assertEqual(raised.exception.returncode, 1)
+        report = out.getvalue()
+        self.assertIn(f"~ match {knockout.match_no}: teams None/None -> {knockout.team1_id}/{knockout.team2_id}", report)
+        self.assertIn(f"~ team {row.team_id}: points -7,", report)
+        self.assertIn(f"~ standing {standing.team.code}:", report)
+
+        self.assertTrue(rebuild_tournament())
+        self.assertEqual(state(), healthy)
+        call_command("recompute_tournament", "--verify", stdout=io.StringIO())
+
+        # the repaired event closes like any other
+        out = io.StringIO()
+        call_command("close_event", str(knockout.event_id), "SINGLE", stdout=out)
+        self.assertIn("closed successfully", out.getvalue())
+        self.assertEqual(state(), healthy)
+
+    def test_rebuild_ranks_tied_groups_like_the_engine(self):
+        event = self.events[0]
+        teams_by_pool = {}
+        for t in Team.objects.order_by("pk"):
+            teams_by_pool.setdefault(t.pool_id, []).append(t)
+        # rock-paper-scissors, every match 21-11: each team beats the next in its
+        # pool, so wins and score differences tie all round
+        for m in Match.objects.filter(event=event).exclude(group=Match.KNOCKOUT).select_related("team1", "team2"):
+            pool = teams_by_pool[m.group]
+            home_wins = (pool.index(m.team2) - pool.index(m.team1)) % len(pool) == 1
+            m.team1_score, m.team2_score = (21, 11) if home_wins else (11, 21)
+            m.record_result(*((m.team1, m.team2) if home_wins else (m.team2, m.team1)))
+            m.save()
+        tables = engine.group_tables(event)
+        self.assertTrue(all(len({(t.won, t.score_diff) for t in table}) < len(table) for table in tables.values()))
+        rankings = round_robin_rankings(Match.objects.filter(event=event), teams_by_pool, set(tables))
+        self.assertEqual(rankings, {pool: [t.pk for t in table] for pool, table in tables.items()})
+
+    def test_manual_sheet_totals_do_not_leak_into_the_ledger_standings(self):
+        ManualEventResult.objects.create(event_id=1, event_name="Event 1", results_data={
+            t.code: {"pos": "", "pts": 17} for t in Team.objects.all()
+        })
+        engine.rank_manual_standings({t.code: 3 for t in Team.objects.all()})
+        self.play_season()
+        self.assertEqual(standing_totals(), ledger_totals())
+        self.assertFalse(rebuild_tournament(write=False))
+
+    def test_recomputing_an_event_leaves_other_events_alone(self):
+        self.play_season()
+        event = self.events[0]
+        others = list(EventPoints.objects.exclude(event=event).order_by("pk").values_list())
+        Match.objects.filter(event=event, group=Match.KNOCKOUT).update(completed=False)
+        engine.calculate_group_standings(event)
+
+        self.assertFalse(EventPoints.objects.filter(event=event).exists())
+        self.assertEqual(list(EventPoints.objects.exclude(event=event).order_by("pk").values_list()), others)
+        self.assertEqual(standing_totals(), ledger_totals())
+
+    def test_recomputing_an_event_replaces_its_points(self):
+        self.play_season()
+        event = next(e for e in self.events if "badminton" in e.sport.name.lower())
+        final = Match.objects.get(event=event, match_type="F")
+        winner, loser = final.loser_team, final.winner_team
+        final.team1_score, final.team2_score = (21, 0) if winner == final.team1 else (0, 21)
+        final.record_result(winner, loser)
+        final.save()
+        engine.update_championship(event)
+
+        self.assertEqual(EventPoints.objects.get(event=event, team=winner).gold, 1)
+        self.assertEqual(EventPoints.objects.get(event=event, team=loser).silver, 1)
+        self.assertEqual(standing_totals(), ledger_totals())
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class BracketSlotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event, = build_tournament(teams=6, pools=2, events=1, sports=("Badminton",))
+
+    def knockout(self, match_type):
+        return Match.objects.get(event=self.event, match_type=match_type)
+
+    def slots(self, match_type):
+        return [
+            (s.source, s.source_group, s.source_rank, s.source_match and s.source_match.match_type)
+            for s in BracketSlot.objects.filter(match=self.knockout(match_type)).order_by("position")
+        ]
+
+    def play(self, matches):
+        for m in matches:
+            m.team1_score, m.team2_score = 21, 10
+            m.record_result(m.team1, m.team2)
+            m.save()
+        engine.update_championship(self.event)
+
+    def test_rules_compile_to_slots(self):
+        self.assertEqual(self.slots("SF1"), [("G", "A", 1, None), ("G", "B", 2, None)])
+        self.assertEqual(self.slots("P56"), [("G", "A", 3, None), ("G", "B", 3, None)])
+        self.assertEqual(self.slots("P34"), [("L", "", None, "SF1"), ("L", "", None, "SF2")])
+        self.assertEqual(self.slots("F"), [("W", "", None, "SF1"), ("W", "", None, "SF2")])
+        self.assertFalse(BracketSlot.objects.filter(match__match_type="RR").exists())
+
+    def test_bracket_fills_from_group_tables_then_semi_finals(self):
+        self.play(Match.objects.filter(event=self.event, match_type="RR"))
+        tables = engine.group_tables(self.event)
+        sf1, sf2, p56 = self.knockout("SF1"), self.knockout("SF2"), self.knockout("P56")
+        self.assertEqual((sf1.team1, sf1.team2), (tables["A"][0], tables["B"][1]))
+        self.assertEqual((sf2.team1, sf2.team2), (tables["B"][0], tables["A"][1]))
+        self.assertEqual((p56.team1, p56.team2), (tables["A"][2], tables["B"][2]))
+        self.assertIsNone(self.knockout("F").team1)
+
+        self.play([sf1, sf2])
+        final, bronze = self.knockout("F"), self.knockout("P34")
+        self.assertEqual((final.team1, final.team2), (sf1.team1, sf2.team1))
+        self.assertEqual((bronze.team1, bronze.team2), (sf1.team2, sf2.team2))
+
+    def test_completed_matches_are_left_alone(self):
+        self.play(Match.objects.filter(event=self.event, match_type="RR"))
+        sf1 = self.knockout("SF1")
+        sf1.team1, sf1.team2 = sf1.team2, sf1.team1
+        self.play([sf1])
+        self.assertEqual(self.knockout("SF1").team1_id, sf1.team1_id)
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Migrates the app back to `before`, lets the test load rows through the
+    historical models, then migrates forward again."""
+    before = after = None
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate([("tournament", self.before)])
+        self.addCleanup(self.migrate_to_latest)
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes("tournament"))
+
+    def old_apps(self):
+        return self.executor.loader.project_state([("tournament", self.before)]).apps
+
+    def migrate_forward(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("tournament", self.after)])
+        return executor.loader.project_state([("tournament", self.after)]).apps
+
+
+class CompileBracketsMigrationTests(MigrationTestCase):
+    before, after = "0021_eventpoints", "0022_bracketslot"
+
+    def test_existing_rules_are_compiled(self):
+        apps = self.old_apps()
+        Sport, Event, Match = (apps.get_model("tournament", m) for m in ("Sport", "Event", "Match"))
+        event = Event.objects.create(sport=Sport.objects.create(name="Badminton"), event_id=1, name="Singles")
+        fixture = dict(event=event, group="A&B", date="2026-01-09", time="10:00", venue_type="Court", venue_no="1")
+        Match.objects.create(match_no=1, match_type="RR", opponent_rule="Golden Eagles vs Super Rangers", **fixture)
+        Match.objects.create(match_no=2, match_type="SF1", opponent_rule="1st of Group A vs 2nd of Group B", **fixture)
+        Match.objects.create(match_no=3, match_type="SF2", opponent_rule="1st B vs 2nd A", **fixture)
+        Match.objects.create(match_no=4, match_type="F", opponent_rule="Winners SF", **fixture)
+
+        BracketSlot = self.migrate_forward().get_model("tournament", "BracketSlot")
+        slots = sorted(
+            (s.match.match_no, s.position, s.source, s.source_group, s.source_rank, s.source_match_id and s.source_match.match_no)
+            for s in BracketSlot.objects.select_related("match", "source_match")
+        )
+        self.assertEqual(slots, [
+            (2, 1, "G", "A", 1, None), (2, 2, "G", "B", 2, None),
+            (3, 1, "G", "B", 1, None), (3, 2, "G", "A", 2, None),
+            (4, 1, "W", "", None, 2), (4, 2, "W", "", None, 3),
+        ])
+
+
+class ResultTeamsMigrationTests(MigrationTestCase):
+    before, after = "0022_bracketslot", "0023_match_winner_team_loser_team"
+
+    def test_winner_and_loser_text_becomes_team_links(self):
+        apps = self.old_apps()
+        Sport, Event, Match, Team = (apps.get_model("tournament", m) for m in ("Sport", "Event", "Match", "Team"))
+        eagles = Team.objects.create(code="T1", name="Golden Eagles", pool="A")
+        rangers = Team.objects.create(code="T2", name="Super Rangers", pool="A")
+        event = Event.objects.create(sport=Sport.objects.create(name="Badminton"), event_id=1, name="Singles")
+        fixture = dict(event=event, group="A", match_type="RR", date="2026-01-09", time="10:00",
+                       venue_type="Court", venue_no="1", completed=True)
+        rows = {
+            "head_to_head": Match.objects.create(match_no=1, opponent_rule="", team1=eagles, team2=rangers,
+                                                 winner=" super rangers ", loser="Golden Eagles", **fixture),
+            "aggregate": Match.objects.create(match_no=2, opponent_rule="All Teams of Group A", team1=eagles,
+                                              team2=eagles, winner="1st: Golden Eagles", **fixture),
+            "medal": Match.objects.create(match_no=3, opponent_rule="All Teams", winner="Gold: Super Rangers", **fixture),
+            "unknown": Match.objects.create(match_no=4, opponent_rule="", team1=eagles, team2=rangers,
+                                            winner="Someone Else", **fixture),
+            "open": Match.objects.create(match_no=5, opponent_rule="", team1=eagles, team2=rangers,
+                                         **{**fixture, "completed": False}),
+        }
+
+        Match = self.migrate_forward().get_model("tournament", "Match")
+        linked = {name: Match.objects.get(pk=m.pk) for name, m in rows.items()}
+        self.assertEqual((linked["head_to_head"].winner_team_id, linked["head_to_head"].loser_team_id), (rangers.pk, eagles.pk))
+        self.assertEqual((linked["aggregate"].winner_team_id, linked["aggregate"].loser_team_id), (eagles.pk, None))
+        self.assertEqual((linked["medal"].winner_team_id, linked["medal"].loser_team_id), (rangers.pk, None))
+        self.assertEqual((linked["unknown"].winner_team_id, linked["unknown"].loser_team_id), (None, None))
+        self.assertEqual((linked["open"].winner_team_id, linked["open"].loser_team_id), (None, None))
+
+
+def rule_sides(plan):
+    """{match_type: set of "1st of Group A"-style places that can reach it}."""
+    reach = {}
+    for code, rule in plan:
+        sides = set()
+        for source, group, rank, ref in parse_opponent_rule(rule):
+            sides |= {(rank, group)} if source == BracketSlot.GROUP else reach[ref]
+        reach[code] = sides
+    return reach
+
+
+class KnockoutPlanTests(TestCase):
+    POOL_COUNTS = range(1, 9)
+
+    def test_every_qualifier_is_placed_once(self):
+        for pools in self.POOL_COUNTS:
+            with self.subTest(pools=pools):
+                letters = string.ascii_uppercase[:pools]
+                plan = knockout_plan(letters)
+                places = [
+                    (rank, group) for _, rule in plan for source, group, rank, _ in parse_opponent_rule(rule)
+                    if source == BracketSlot.GROUP
+                ]
+                self.assertCountEqual(places, [(rank, g) for g in letters for rank in (1, 2)])
+                self.assertEqual(plan[-1][0], "F")
+                self.assertEqual(rule_sides(plan)["F"], set(places))
+
+    def test_top_seeds_get_the_byes(self):
+        plan = dict(knockout_plan("ABC"))
+        self.assertEqual(plan["SF1"], "1st of Group A vs Winner of QF1")
+        self.assertEqual(plan["SF2"], "1st of Group B vs Winner of QF2")
+        self.assertEqual(plan["P56"], "Loser of QF1 vs Loser of QF2")
+        self.assertNotIn("1st of Group A", " ".join(r for code, r in plan.items() if code.startswith("QF")))
+
+    def test_pool_mates_only_meet_in_the_final(self):
+        for pools in range(2, 9):
+            with self.subTest(pools=pools):
+                reach = rule_sides(knockout_plan(string.ascii_uppercase[:pools]))
+                for group in string.ascii_uppercase[:pools]:
+                    first, second = (1, group), (2, group)
+                    self.assertNotEqual(first in reach["SF1"], second in reach["SF1"], group)
+
+    def test_two_pools_keep_the_mgcl_semi_finals(self):
+        self.assertEqual(knockout_plan("AB", thirds=True), [
+            ("SF1", "1st of Group A vs 2nd of Group B"),
+            ("SF2", "1st of Group B vs 2nd of Group A"),
+            ("P56", "3rd of Group A vs 3rd of Group B"),
+            ("P34", "Loser of SF1 vs Loser of SF2"),
+            ("F", "Winner of SF1 vs Winner of SF2"),
+        ])
+
+    def test_too_many_qualifiers_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, "9 pools x 2 qualifiers gives 18 teams"):
+            knockout_plan(string.ascii_uppercase[:9])
+        with self.assertRaises(ValueError):
+            build_tournament(teams=27, pools=9, events=1, sports=("Badminton",))
+
+    def test_multi_letter_pool_codes(self):
+        self.assertEqual(parse_opponent_rule("1st of Group NE vs 2nd of Group SW"), [
+            (BracketSlot.GROUP, "NE", 1, None), (BracketSlot.GROUP, "SW", 2, None),
+        ])
+        self.assertIsNone(parse_opponent_rule("3rd Place"))
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_brackets_play_out_for_every_pool_count(self):
+        for pools in self.POOL_COUNTS:
+            with self.subTest(pools=pools), transaction.atomic():
+                event, = build_tournament(teams=3 * pools, pools=pools, events=1, sports=("Badminton",))
+                for _ in score_stream([event], random.Random(pools)):
+                    engine.update_championship(event)
+
+                knockout = Match.objects.filter(event=event, group=Match.KNOCKOUT)
+                self.assertEqual(knockout.count(), len(knockout_plan(string.ascii_uppercase[:pools], thirds=True)))
+                self.assertFalse(knockout.filter(completed=False).exists())
+                final = knockout.get(match_type="F")
+                self.assertEqual(EventPoints.objects.get(event=event, team=final.winner_team).gold, 1)
+                self.assertEqual(EventPoints.objects.get(event=event, team=final.loser_team).silver, 1)
+                self.assertEqual(sum(EventPoints.objects.filter(event=event).values_list("points", flat=True)),
+                                 170 if pools == 1 else 300)
+                transaction.set_rollback(True)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class RevisionCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event, = build_tournament(teams=6, pools=2, events=1, sports=("Badminton",))
+
+    def setUp(self):
+        cache.clear()
+
+    def bump(self, event_id=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return revision.bump_revision("score", event_id)
+
+    def test_leaderboard_etag_and_304(self):
+        rev = self.bump()
+        url = reverse("leaderboard_data")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], etag_for("leaderboard", rev))
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        new = self.bump()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], etag_for("leaderboard", new))
+
+    def test_restored_database_replaces_a_higher_cached_revision(self):
+        cache.set(revision.CACHE_KEY, 819, None)
+        cache.set(revision.EVENT_KEY.format(self.event.pk), 819, None)
+        rev = self.bump(self.event.pk)
+        self.assertLess(rev, 819)
+        self.assertEqual(revision.current_revision(), rev)
+        self.assertEqual(revision.event_revisions([self.event.pk]), {self.event.pk: rev})
+
+    def test_out_of_order_commits_publish_the_latest(self):
+        first = TournamentRevision.objects.create(kind="score", event_id=self.event.pk).pk
+        second = TournamentRevision.objects.create(kind="score", event_id=self.event.pk).pk
+        revision._publish(second, self.event.pk)
+        revision._publish(first, self.event.pk)
+        self.assertEqual(revision.current_revision(), second)
+        self.assertEqual(revision.event_revisions([self.event.pk]), {self.event.pk: second})
+
+    def test_feed(self):
+        rev = self.bump()
+        url = reverse("big_screen_feed")
+        self.assertEqual(self.client.get(url, {"since": rev}).json(), {"revision": rev, "cards": {}})
+
+        match = Match.objects.filter(event=self.event, match_type="RR").first()
+        match.team1_score, match.team2_score = 21, 3
+        match.record_result(match.team1, match.team2)
+        with self.captureOnCommitCallbacks(execute=True):
+            match.save()
+        data = self.client.get(url, {"since": rev}).json()
+        self.assertEqual(list(data["cards"]), [str(match.pk)])
+
+        # a client ahead of a restored database gets every card
+        data = self.client.get(url, {"since": 819}).json()
+        self.assertEqual((data["revision"], len(data["cards"])), (revision.current_revision(), Match.objects.count()))
+
+    def test_championship_table_follows_every_standings_change(self):
+        url = reverse("manual_championship_view") + "?fragment=table"
+        standing = ChampionshipStanding.objects.create(team=Team.objects.first())
+        self.assertNotContains(self.client.get(url), "4321")
+
+        standing.total_points = 4321   # an admin correction
+        with self.captureOnCommitCallbacks(execute=True):
+            standing.save()
+        self.assertContains(self.client.get(url), "4321")
+
+        ChampionshipStanding.objects.filter(pk=standing.pk).update(total_points=8765)   # the engine's bulk writes
+        self.bump(self.event.pk)
+        self.assertContains(self.client.get(url), "8765")
+
+    def test_admin_renames_reach_cached_pages(self):
+        fixtures_url = reverse("fixtures") + f"?event={self.event.pk}"
+        team = Match.objects.filter(event=self.event).first().team1
+        ChampionshipStanding.objects.create(team=team)
+        self.bump()
+        self.assertNotContains(self.client.get(fixtures_url), "Renamed Team")
+        self.assertNotIn("Renamed Team", self.client.get(reverse("leaderboard_data")).json()[0]["team"])
+
+        team.name = "Renamed Team"
+        with self.captureOnCommitCallbacks(execute=True):
+            team.save()
+        self.assertContains(self.client.get(fixtures_url), "Renamed Team")
+        self.assertEqual(self.client.get(reverse("leaderboard_data")).json()[0]["team"], "Renamed Team")
+        self.assertEqual(
+            set(TournamentRevision.objects.filter(kind="team").values_list("event_id", flat=True)), {self.event.pk}
+        )
+
+        self.event.name = "Renamed Event"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.save()
+        self.assertContains(self.client.get(fixtures_url), "Renamed Event")
+
+    def test_eager_mode_publishes_pages_on_commit(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        match = Match.objects.filter(event=self.event, match_type="RR").first()
+        match.team1_score, match.team2_score = 21, 3
+        match.record_result(match.team1, match.team2)
+        with self.settings(RECOMPUTE_EAGER=True, PUBLISH_ROOT=root), self.captureOnCommitCallbacks(execute=True):
+            match.save()
+        self.assertEqual(publisher.published_revision(root), revision.current_revision())
+        self.assertTrue((root / "leaderboard" / "data" / "index.json").exists())
+
+        # with a worker (the default) the commit leaves publishing to it
+        with self.settings(PUBLISH_ROOT=root), self.captureOnCommitCallbacks(execute=True):
+            match.save()
+        self.assertLess(publisher.published_revision(root), revision.current_revision())
+
+    def test_live_hub_reloads_clients_ahead_of_the_database(self):
+        hub = live.Hub()
+        hub.revision = 5
+        hub.recent.extend([(4, {"kind": "score", "event": None}), (5, {"kind": "score", "event": None})])
+        self.assertEqual(hub.since(5), [])
+        self.assertEqual(hub.since(4), [{"kind": "score", "event": None}])
+        self.assertIsNone(hub.since(2))
+        self.assertIsNone(hub.since(819))
+
+
+class BenchmarkEngineTests(TransactionTestCase):
+    # autocommit, as in the real run: on_commit callbacks fire inside run_isolated's overrides
+    def test_benchmark_leaves_the_published_pages_alone(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        creation = connection.creation
+        # the test database already is the throwaway one run_isolated would create
+        with patch.object(creation, "create_test_db"), patch.object(creation, "destroy_test_db"), \
+                self.settings(PUBLISH_ROOT=root):
+            call_command("benchmark_engine", "--teams", "4", "--events", "2", stdout=io.StringIO())
+        self.assertEqual(list(root.iterdir()), [])
+
+
+class LiveHubTests(SimpleTestCase):
+    async def test_poll_failures_are_logged(self):
+        hub = live.Hub()
+        hub.listeners = 1
+
+        def broken():
+            hub.listeners = 0   # one pass of the loop
+            raise OperationalError("database is locked")
+
+        with patch.object(live, "current_revision", broken), patch.object(live, "POLL_INTERVAL", 0):
+            with self.assertLogs("tournament.live", "ERROR") as logs:
+                await hub._poll()
+        self.assertIn("database is locked", logs.output[0])
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    RECOMPUTE_EAGER=False,
+)
+class ManualStandingsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        build_tournament(teams=6, pools=2, events=1)
+        cls.codes = list(Team.objects.order_by("pk").values_list("code", flat=True))
+
+    def sheet(self, *events):
+        """One ManualEventResult per {team index: (points, position)} dict."""
+        ManualEventResult.objects.bulk_create([
+            ManualEventResult(event_id=i, event_name=f"Event {i}", results_data={
+                self.codes[team]: {"pts": pts, "pos": pos} for team, (pts, pos) in cells.items()
+            }) for i, cells in enumerate(events, start=1)
+        ])
+
+    def ranks(self, result):
+        return [result[code]["rank"] for code in self.codes]
+
+    def test_competition_ranking(self):
+        self.sheet({0: (50, ""), 1: (40, ""), 2: (40, ""), 3: (30, "")})
+        self.assertEqual(self.ranks(engine.rank_manual_standings()), [1, 2, 2, 4, 5, 5])
+
+    def test_ties_on_points_go_to_golds_then_silvers_then_bronzes(self):
+        self.sheet(
+            {0: (30, "1"), 1: (15, "2"), 2: (20, "2"), 3: (20, "3"), 4: (5, "3"), 5: (10, "3")},
+            {1: (15, "2"), 4: (5, "3")},
+        )
+        # 0 (gold) > 1 (2 silvers) at 30; 2 (silver) > 3 (bronze) at 20; 4 (2 bronzes) > 5 (1) at 10
+        self.assertEqual(self.ranks(engine.rank_manual_standings()), [1, 2, 3, 4, 5, 6])
+        stored = dict(ChampionshipStanding.objects.values_list("team__code", "rank"))
+        self.assertEqual([stored[code] for code in self.codes], [1, 2, 3, 4, 5, 6])
+
+    def test_penalties_come_off_the_total(self):
+        self.sheet({0: (50, ""), 1: (45, "")})
+        result = engine.rank_manual_standings({self.codes[0]: 10})
+        self.assertEqual(result[self.codes[0]], {"gross": 50, "penalty": 10, "total": 40, "rank": 2})
+        self.assertEqual(result[self.codes[1]]["rank"], 1)
+
+        # the penalty sticks until it is changed
+        self.assertEqual(engine.rank_manual_standings()[self.codes[0]]["total"], 40)
+        self.assertEqual(engine.rank_manual_standings({self.codes[0]: 0})[self.codes[0]]["rank"], 1)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    RECOMPUTE_EAGER=False,
+)
+class SimulationTests(TestCase):
+    RUNS = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        # Badminton is played to the end; Tennis and Table Tennis are still open
+        cls.decided, cls.open_event, _ = build_tournament(teams=6, pools=2, events=3)
+        for _ in play_event(cls.decided, random.Random(3)):
+            engine.update_championship(cls.decided)
+
+    def event_odds(self, payload, event):
+        return next(e for e in payload["events"] if e["id"] == event.pk)["teams"]
+
+    def test_a_decided_event_gives_its_winner_gold(self):
+        final = Match.objects.get(event=self.decided, match_type="F")
+        self.assertTrue(final.completed)
+        odds = self.event_odds(simulation.simulate_tournament(self.RUNS, seed=1), self.decided)
+        self.assertEqual({team: o["gold"] for team, o in odds.items() if o["gold"]}, {str(final.winner_team_id): 1.0})
+
+    def test_odds_add_up_per_place(self):
+        payload = simulation.simulate_tournament(self.RUNS, seed=1)
+        for event in payload["events"]:
+            for medal in ("gold", "silver", "bronze"):
+                self.assertAlmostEqual(sum(o[medal] for o in event["teams"].values()), 1, 3, (event["name"], medal))
+        positions = [row["positions"] for row in payload["championship"].values()]
+        for place in zip(*positions):
+            self.assertAlmostEqual(sum(place), 1, 3)
+        for team in positions:
+            self.assertAlmostEqual(sum(team), 1, 3)
+
+    def test_a_fixed_seed_is_reproducible(self):
+        self.assertEqual(simulation.simulate_tournament(300, seed=5), simulation.simulate_tournament(300, seed=5))
+
+    def test_a_blowout_does_not_outrank_a_win(self):
+        a, b, c = Team.objects.filter(pool_id="A").order_by("pk")
+        # a real score can be any size, far past what simulated matches reach
+        blowout = 4 * simulation.MAX_MARGIN * Match.objects.filter(event=self.open_event).count()
+        # a beats both 1-0 (2 wins, +2); b beats c by the blowout (1 win, far more points)
+        for m in Match.objects.filter(event=self.open_event, group="A").select_related("team1", "team2"):
+            winner = a if a in (m.team1, m.team2) else b
+            loser = m.team2 if m.team1 == winner else m.team1
+            margin = 1 if winner == a else blowout
+            m.team1_score, m.team2_score = (margin, 0) if m.team1 == winner else (0, margin)
+            m.record_result(winner, loser)
+            m.save()
+
+        data = simulation.TournamentData()
+        event = next(e for e in data.events if e.pk == self.open_event.pk)
+        sim = simulation.EventSimulation(data, event, np.random.default_rng(0), 4, data.win_matrix())
+        ranked = {tuple(row) for row in sim.round_robin("A", data.pools()["A"]).tolist()}
+        self.assertEqual(ranked, {tuple(data.index[t.pk] for t in (a, b, c))})
+        self.assertEqual(engine.group_tables(self.open_event, ["A"])["A"], [a, b, c])
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    RECOMPUTE_EAGER=False,
+)
+class RecomputeQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        build_tournament(teams=6, pools=2, events=2)
+        cls.first, cls.second = Event.objects.order_by("pk")[:2]
+
+    def test_repeated_enqueues_collapse(self):
+        requests = {recompute.enqueue_recompute(self.first).pk for _ in range(3)}
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(RecomputeRequest.objects.filter(status=RecomputeRequest.PENDING).count(), 1)
+
+        # once claimed, a new submission needs a run of its own
+        recompute.claim_next()
+        recompute.enqueue_recompute(self.first)
+        self.assertEqual(
+            sorted(RecomputeRequest.objects.values_list("status", flat=True)),
+            [RecomputeRequest.PENDING, RecomputeRequest.RUNNING],
+        )
+
+    def test_stale_claims_are_requeued(self):
+        recompute.enqueue_recompute(self.first)
+        recompute.enqueue_recompute(self.second)
+        recompute.claim_next()
+        recompute.claim_next()
+        recompute.enqueue_recompute(self.second)   # already pending again: the stale claim just goes
+
+        recompute.requeue_stale()
+        self.assertEqual(
+            sorted(RecomputeRequest.objects.values_list("event_id", "status")),
+            [(self.first.pk, RecomputeRequest.PENDING), (self.second.pk, RecomputeRequest.PENDING)],
+        )
+
+    def test_a_failing_job_is_recorded_and_the_queue_moves_on(self):
+        recompute.enqueue_recompute(self.first)
+        recompute.enqueue_recompute(self.second)
+
+        def engine(event):
+            if event == self.first:
+                raise ValueError("bracket rule nobody can parse")
+        with patch.object(recompute, "update_championship", side_effect=engine) as run, \
+                self.assertLogs("tournament.recompute", "ERROR"):
+            self.assertTrue(recompute.process_next())
+            self.assertTrue(recompute.process_next())
+            self.assertFalse(recompute.process_next())
+        self.assertCountEqual([call.args[0] for call in run.call_args_list], [self.first, self.second])
+
+        failed = RecomputeRequest.objects.get()
+        self.assertEqual((failed.event, failed.status), (self.first, RecomputeRequest.FAILED))
+        self.assertIn("bracket rule nobody can parse", failed.error)
+        self.assertEqual(recompute.pending_event_ids(), [])
+
+    def test_eager_mode_runs_inline(self):
+        with self.settings(RECOMPUTE_EAGER=True), \
+                patch.object(recompute, "update_championship", wraps=recompute.update_championship) as run:
+            self.assertIsNone(recompute.enqueue_recompute(self.first))
+        run.assert_called_once_with(self.first)
+        self.assertFalse(RecomputeRequest.objects.exists())
+
+
+class RetryOnLockedTests(TransactionTestCase):
+    # outside TestCase's wrapping transaction, which would rule out any retry
+    def flaky(self, *errors):
+        """A writer that raises each of errors in turn, then returns "saved"."""
+        calls = []
+
+        @database.retry_on_locked
+        def save():
+            calls.append(connection.in_atomic_block)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return "saved"
+        return save, calls
+
+    def setUp(self):
+        sleep = patch.object(database.time, "sleep")
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def test_retries_while_locked(self):
+        locked = OperationalError("database is locked")
+        save, calls = self.flaky(locked, locked)
+        self.assertEqual(save(), "saved")
+        self.assertEqual(calls, [True, True, True])   # each attempt in its own transaction
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_gives_up_after_the_last_attempt(self):
+        save, calls = self.flaky(*[OperationalError("database is locked")] * 4)
+        with self.assertRaisesMessage(OperationalError, "locked"):
+            save()
+        self.assertEqual(len(calls), 4)
+
+    def test_other_errors_are_not_retried(self):
+        save, calls = self.flaky(OperationalError("no such table: tournament_match"))
+        with self.assertRaisesMessage(OperationalError, "no such table"):
+            save()
+        self.assertEqual(len(calls), 1)
+
+    def test_no_retry_inside_an_outer_transaction(self):
+        save, calls = self.flaky(OperationalError("database is locked"))
+        with self.assertRaises(OperationalError), transaction.atomic():
+            save()
+        self.assertEqual(len(calls), 1)
+        self.sleep.assert_not_called()
+
+
+class PublicReadsTests(SimpleTestCase):
+    def read_alias(self, method, name):
+        """The alias a model read is routed to while the middleware handles the request."""
+        seen = []
+
+        def view(request):
+            seen.append(database.PublicReadRouter().db_for_read(Match))
+            return HttpResponse()
+        request = getattr(RequestFactory(), method)(reverse(name))
+        database.PublicReadsMiddleware(view)(request)
+        return seen[0]
+
+    def test_public_gets_read_from_the_replica(self):
+        self.assertEqual(self.read_alias("get", "leaderboard"), database.REPLICA)
+        self.assertEqual(self.read_alias("head", "fixtures"), database.REPLICA)
+
+    def test_writes_and_staff_pages_read_from_the_writer(self):
+        self.assertIsNone(self.read_alias("post", "leaderboard"))
+        self.assertIsNone(self.read_alias("get", "scoresheet_queue"))
+        self.assertFalse(database._public_read.get())   # reset after each request
+
+    def test_writes_always_go_to_the_writer(self):
+        token = database._public_read.set(True)
+        self.addCleanup(database._public_read.reset, token)
+        self.assertEqual(database.PublicReadRouter().db_for_write(Match), database.DEFAULT)
+        with patch.object(connection, "in_atomic_block", True):   # a transaction on the writer sees its own writes
+            self.assertIsNone(database.PublicReadRouter().db_for_read(Match))
+
+    def test_without_a_replica_reads_stay_on_the_writer(self):
+        token = database._public_read.set(True)
+        self.addCleanup(database._public_read.reset, token)
+        with patch.dict(settings.DATABASES):
+            del settings.DATABASES[database.REPLICA]
+            self.assertIsNone(database.PublicReadRouter().db_for_read(Match))
+
+    def test_wal_is_on_unless_opted_out(self):
+        def configured(**env):
+            # settings are read once per process
+            code = "from mgcl_tournament import settings as s; print(s.SQLITE_PRAGMAS); print(sorted(s.DATABASES))"
+            out = subprocess.run(
+                [sys.executable, "-c", code], env={**os.environ, **env}, cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout
+            return out.splitlines()
+
+        pragmas, aliases = configured()
+        self.assertIn("journal_mode=WAL", pragmas)
+        self.assertEqual(aliases, "['default', 'replica']")
+        pragmas, aliases = configured(MGCL_SQLITE_WAL="0")
+        self.assertNotIn("journal_mode", pragmas)
+        self.assertEqual(aliases, "['default']")
+
+
+class MeteredCacheTests(SimpleTestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.cache = metrics.MeteredFileBasedCache(location, {})
+        self.stats = metrics._current.stats = metrics.RequestStats()
+        self.addCleanup(setattr, metrics._current, "stats", None)
+
+    def test_get_many_counts_each_key_once(self):
+        self.cache.set("a", 1)
+        self.assertEqual(self.cache.get_many(["a", "b"]), {"a": 1})
+        self.assertEqual((self.stats.cache_hits, self.stats.cache_misses), (1, 1))
+
+    def test_get_counts_a_cached_none_as_a_hit(self):
+        self.cache.set("a", None)
+        self.assertIsNone(self.cache.get("a", "default"))
+        self.assertEqual(self.cache.get("b", "default"), "default")
+        self.assertEqual((self.stats.cache_hits, self.stats.cache_misses), (1, 1))
+
+
+
+class ImageVariantTests(TestCase):
+    NAME = "team_icons/crest.png"
+
+    def setUp(self):
+        self.media = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.media)
+        override = self.settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        (self.media / "team_icons").mkdir()
+        Image.new("RGBA", (300, 150), (200, 30, 30, 255)).save(self.media / self.NAME)
+
+    def render(self, name):
+        return Template("{% load tournament_extras %}{% picture name 45 alt='Crest' %}").render(Context({"name": name}))
+
+    def test_variants_and_srcset(self):
+        self.assertEqual(images.build_variants([self.NAME]), [self.NAME])
+        png = images.load_manifest()[self.NAME]["sizes"]["45"]["png"]
+        self.assertRegex(png["1x"], r"^derived/team_icons/crest-45\.[0-9a-f]{10}\.png$")
+        self.assertRegex(png["2x"], r"^derived/team_icons/crest-90\.[0-9a-f]{10}\.png$")
+        with Image.open(self.media / png["2x"]) as variant:
+            self.assertEqual(variant.size, (180, 90))
+
+        html = self.render(self.NAME)
+        media = settings.MEDIA_URL
+        self.assertIn(f'<img src="{media}{png["1x"]}" srcset="{media}{png["1x"]} 1x, {media}{png["2x"]} 2x" alt="Crest">', html)
+        for fmt in images.available_formats()[:-1]:
+            self.assertIn(f'<source type="image/{fmt}" srcset="{media}derived/team_icons/crest-45.', html)
+        self.assertEqual(images.build_variants([self.NAME]), [])   # already in the manifest
+
+    def test_unprocessed_images_fall_back_to_the_original(self):
+        self.assertEqual(self.render(self.NAME), f'<img src="{settings.MEDIA_URL}{self.NAME}" alt="Crest">')
+
+    def test_a_failed_upload_conversion_does_not_break_the_save(self):
+        pool, _ = Pool.objects.get_or_create(code="A")
+        team = Team.objects.create(code="ZZ", name="Test Crest", pool=pool)
+        team.icon = self.NAME
+        with patch.object(signals, "build_variants", side_effect=OSError("no AVIF encoder")), \
+                self.assertLogs("django.test", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+            team.save()
+        self.assertEqual(Team.objects.get(pk=team.pk).icon.name, self.NAME)
+
+
+# --- season import ---
+
+SEASON = {
+    "teams": [("code", "name", "pool", "owners"), ("GE", "Golden Eagles", "A", ""), ("RP", "Rising Phoenix", "A", ""),
+              ("FP", "Flying Phantoms", "B", "")],
+    "events": [("event_id", "sport", "name"), (1, "Badminton", "Men's Doubles")],
+    "schedule": [("event_id", "match_no", "group", "type", "rule", "date", "time", "venue_type", "venue_no"),
+                 (1, 1, "A", "RR", "Golden Eagles vs Rising Phoenix", "2026-03-01", "09:00", "Court", "1")],
+    "nominations": [("Event / ID", "Golden Eagles", "Rising Phoenix", "Flying Phantoms"),
+                    ("Men's Doubles 1", "Ann\nBen", "Cat\nDan", "")],
+}
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    RECOMPUTE_EAGER=False,
+)
+class ImporterTests(TestCase):
+    def write_folder(self, **sheets):
+        folder = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, folder)
+        for name, rows in {**SEASON, **sheets}.items():
+            with open(folder / f"{name}.csv", "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows(rows)
+        return folder
+
+    def write_season(self, **sheets):
+        return importer.parse(self.write_folder(**sheets))
+
+    def import_command(self, *args):
+        out = io.StringIO()
+        call_command("import_tournament", *map(str, args), stdout=out)
+        return out.getvalue()
+
+    def test_nominations_become_players_and_squads(self):
+        importer.apply(self.write_season())
+        self.assertEqual(
+            sorted(Player.objects.values_list("team__code", "name", "sport_label")),
+            [("GE", "Ann", "Badminton"), ("GE", "Ben", "Badminton"), ("RP", "Cat", "Badminton"), ("RP", "Dan", "Badminton")],
+        )
+        match = Match.objects.get()
+        self.assertEqual((match.team1_players, match.team2_players), ("Ann & Ben", "Cat & Dan"))
+
+    def test_misspelt_team_names_are_read_with_a_warning(self):
+        schedule = [SEASON["schedule"][0], SEASON["schedule"][1][:4] + ("Golden Eagles vs Rising Phonix",) + SEASON["schedule"][1][5:]]
+        season = self.write_season(schedule=schedule)
+        self.assertEqual(season["warnings"], ["schedule line 2: read 'Rising Phonix' as 'rising phoenix'"])
+        self.assertEqual(season["matches"][(1, 1)]["team2"], "RP")
+
+    def test_sheet_errors(self):
+        rule = SEASON["schedule"][1]
+        cases = {
+            "teams sheet is missing column(s): pool": {"teams": [("code", "name"), ("GE", "Golden Eagles")]},
+            "teams line 3: duplicate code GE": {"teams": SEASON["teams"][:2] + [("GE", "Green Eagles", "B", "")]},
+            "schedule line 2: unknown event_id 9": {"schedule": [SEASON["schedule"][0], (9,) + rule[1:]]},
+            "schedule line 2: unknown team 'Silver Sharks'": {
+                "schedule": [SEASON["schedule"][0], rule[:4] + ("Golden Eagles vs Silver Sharks",) + rule[5:]],
+            },
+        }
+        for message, sheets in cases.items():
+            with self.subTest(message), self.assertRaisesMessage(importer.SheetError, message):
+                self.write_season(**sheets)
+
+    def test_diff_against_the_database(self):
+        importer.apply(self.write_season())
+        teams = SEASON["teams"][:2] + [("RP", "Rising Phoenix", "A", "Ravi"), SEASON["teams"][3]]
+        events = SEASON["events"] + [(2, "Chess", "Rapid")]
+        lines = importer.diff(self.write_season(teams=teams, events=events))
+        self.assertIn("teams: 0 new, 0 removed, 1 changed, 2 unchanged", lines)
+        self.assertIn("  ~ RP (owners: '' -> 'Ravi')", lines)
+        self.assertIn("events: 1 new, 0 removed, 0 changed, 1 unchanged", lines)
+        self.assertIn("  + 2", lines)
+
+    def test_dry_run_writes_nothing(self):
+        output = self.import_command(self.write_folder(), "--dry-run")
+        self.assertIn("teams: 3 new, 0 removed, 0 changed, 0 unchanged", output)
+        self.assertIn("Dry run", output)
+        self.assertFalse(Team.objects.exists())
+
+    def test_results_need_force(self):
+        folder = self.write_folder()
+        self.import_command(folder)
+        Match.objects.update(completed=True, team1_score=21, team2_score=9)
+        with self.assertRaisesMessage(CommandError, "Pass --force"):
+            self.import_command(folder)
+        self.assertTrue(Match.objects.get().completed)
+
+        self.import_command(folder, "--force")
+        self.assertFalse(Match.objects.get().completed)
+
+    def test_reimport_keeps_captain_accounts(self):
+        importer.apply(self.write_season())
+        captain = User.objects.create_user("captain", password="captain")
+        Team.objects.filter(code="GE").update(account=captain)
+
+        teams = [SEASON["teams"][0], ("GE", "Golden Eagles", "B", "Asha"), ("RP", "Rising Phoenix", "A", "")]
+        nominations = [row[:3] for row in SEASON["nominations"]]
+        importer.apply(self.write_season(teams=teams, nominations=nominations))
+
+        eagles = Team.objects.get(code="GE")
+        self.assertEqual((eagles.account, eagles.pool_id, eagles.owners), (captain, "B", "Asha"))
+        self.assertEqual(sorted(Team.objects.values_list("code", flat=True)), ["GE", "RP"])
+        self.assertEqual(ChampionshipStanding.objects.count(), 2)
+        self.assertEqual(Match.objects.get().team1, eagles)
+
+    def test_reimport_logs_one_revision(self):
+        season = self.write_season()
+        importer.apply(season)
+        logged = TournamentRevision.objects.count()
+        importer.apply(season)   # clearing the old matches must not bump once per row
+        self.assertEqual(TournamentRevision.objects.count(), logged + 1)
+
+
+# --- paper scoresheets ---
+
+SAMPLES = Path(__file__).parent / "testdata" / "scoresheets"
+SAMPLE_MATCH_ID = 9001   # the id in the samples' QR codes
+# sample photo -> scores written in the boxes (a tilted photo, one upside down, one sideways, a blank sheet)
+SAMPLE_SCORES = {
+    "scan_straight.jpg": (21, 15),
+    "photo_tilted.jpg": (11, 7),
+    "photo_upside_down.jpg": (3, 2),
+    "photo_sideways.jpg": (19, 21),
+    "photo_blank.jpg": (None, None),
+}
+
+
+def tesseract_available():
+    try:
+        return scoresheets.pytesseract is not None and bool(scoresheets.pytesseract.get_tesseract_version())
+    except Exception:
+        return False
+
+
+@skipUnless(scoresheets.cv2, "opencv-python is not installed")
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    RECOMPUTE_EAGER=False,
+)
+class ScoresheetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        build_tournament(teams=6, pools=2)
+        template = Match.objects.filter(match_type="RR", team1__isnull=False, team2__isnull=False).first()
+        template.pk, template.id = SAMPLE_MATCH_ID, SAMPLE_MATCH_ID
+        template.save(force_insert=True)
+        cls.match = Match.objects.get(pk=SAMPLE_MATCH_ID)
+        User.objects.create_user("referee", password="referee", is_staff=True)
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        override = self.settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_printed_sheet_reads_back(self):
+        sheet = scoresheets.straighten(np.array(scoresheets.render_sheet(self.match).convert("L")))
+        _, payload = scoresheets.sheet_qr(sheet)
+        self.assertEqual(payload, f"MGCL-MATCH:{self.match.pk}")
+
+    def test_samples_are_straightened_and_identified(self):
+        results = scoresheets.read_all(sorted(SAMPLES.glob("*.jpg")), workers=2)
+        self.assertEqual(len(results), len(SAMPLE_SCORES))
+        for r in results:
+            self.assertEqual(r["match_id"], SAMPLE_MATCH_ID, r["source"])
+            self.assertNotIn("Corner squares", r["error"], r["source"])
+            self.assertTrue((Path(settings.MEDIA_ROOT) / r["image"]).exists())
+
+    @skipUnless(tesseract_available(), "tesseract is not installed")
+    def test_samples_ocr(self):
+        for r in scoresheets.read_all(sorted(SAMPLES.glob("*.jpg")), workers=1):
+            self.assertEqual((r["team1_score"], r["team2_score"]), SAMPLE_SCORES[r["source"]], r["source"])
+
+    def test_ingest_stages_once_and_confirm_saves(self):
+        created, _ = scoresheets.ingest(sorted(SAMPLES.glob("*.jpg")))
+        self.assertEqual(len(created), len(SAMPLE_SCORES))
+        self.assertTrue(all(scan.status == ScoresheetScan.PENDING for scan in created))
+        self.assertFalse(Match.objects.get(pk=SAMPLE_MATCH_ID).completed)
+
+        again, results = scoresheets.ingest(sorted(SAMPLES.glob("*.jpg")))
+        self.assertEqual((again, results), ([], []))
+
+        self.client.login(username="referee", password="referee")
+        scan = ScoresheetScan.objects.get(source="scan_straight.jpg")
+        self.client.post(reverse("scoresheet_review", args=[scan.pk]), {
+            "action": "confirm", "team1_score": 21, "team2_score": 15,
+        })
+        match = Match.objects.get(pk=SAMPLE_MATCH_ID)
+        self.assertEqual((match.completed, match.team1_score, match.team2_score), (True, 21, 15))
+        self.assertEqual(match.winner_team_id, match.team1_id)
+        scan.refresh_from_db()
+        self.assertEqual(scan.status, ScoresheetScan.CONFIRMED)
+
+    def test_ingest_counts_only_the_scans_it_staged(self):
+        read_all = scoresheets.read_all
+
+        def staged_meanwhile(paths, workers):
+            # another ingest run stages one of the photos while this one reads them
+            results = read_all(paths, workers)
+            ScoresheetScan.objects.create(match=self.match, source="other run", digest=results[0]["digest"])
+            return results
+
+        with patch.object(scoresheets, "read_all", staged_meanwhile):
+            created, _ = scoresheets.ingest(sorted(SAMPLES.glob("*.jpg")))
+        self.assertEqual(len(created), len(SAMPLE_SCORES) - 1)
+        self.assertEqual(ScoresheetScan.objects.count(), len(SAMPLE_SCORES))
+
+    def test_print_view(self):
+        self.client.login(username="referee", password="referee")
+        response = self.client.get(reverse("scoresheet_print") + f"?event={self.match.event_id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b"%PDF"))
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    RECOMPUTE_EAGER=False,
+)
+class ScoresheetReviewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        build_tournament(teams=6, pools=2)
+        cls.match = Match.objects.filter(match_type="RR", team1__isnull=False, team2__isnull=False).first()
+        User.objects.create_user("referee", password="referee", is_staff=True)
+
+    def setUp(self):
+        self.client.login(username="referee", password="referee")
+
+    def review(self, scan, **data):
+        return self.client.post(reverse("scoresheet_review", args=[scan.pk]), {"action": "confirm", **data})
+
+    def scan(self, digest, **fields):
+        return ScoresheetScan.objects.create(match=self.match, source=f"{digest}.jpg", digest=digest, **fields)
+
+    def score(self):
+        self.match.refresh_from_db()
+        return self.match.team1_score, self.match.team2_score
+
+    def test_reviewed_scans_are_not_confirmed_again(self):
+        for status in (ScoresheetScan.CONFIRMED, ScoresheetScan.REJECTED):
+            self.review(self.scan(status, status=status), team1_score=21, team2_score=3)
+        self.assertFalse(Match.objects.get(pk=self.match.pk).completed)
+
+    def test_completed_match_needs_replace(self):
+        self.review(self.scan("first"), team1_score=21, team2_score=15)
+        self.assertEqual(self.score(), (21, 15))
+
+        second = self.scan("second")
+        self.review(second, team1_score=15, team2_score=21)
+        self.assertEqual(self.score(), (21, 15))
+        second.refresh_from_db()
+        self.assertEqual(second.status, ScoresheetScan.PENDING)
+
+        self.review(second, team1_score=15, team2_score=21, replace="1")
+        self.assertEqual(self.score(), (15, 21))
+        self.assertEqual(Match.objects.get(pk=self.match.pk).winner_team_id, self.match.team2_id)
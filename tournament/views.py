@@ -1,11 +1,18 @@
+import tempfile
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
+from django.utils import timezone
 from django.contrib.auth import logout as django_logout
 from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
 
 from tournament.models import (
     ChampionshipStanding,
@@ -15,9 +22,20 @@ from tournament.models import (
     Team,
     SwimmingResult,
     Player,
-    ManualEventResult
+    ManualEventResult,
+    SimulationResult,
+    ScoresheetScan,
+)
+from tournament.engine import is_placeholder_match, group_tables, rank_manual_standings
+from tournament.recompute import enqueue_recompute, pending_event_ids
+from tournament.metrics import render_metrics
+from tournament.exports import DATASETS, in_batches, stream_csv, write_workbook
+from tournament import scoresheets
+from tournament.revision import bump_revision, current_revision
+from tournament.database import retry_on_locked
+from tournament.snapshots import (
+    championship_table, etag_for, fixture_sections, leaderboard_payload, rebuild_championship_table,
 )
-from tournament.engine import update_championship, is_placeholder_match
 
 # ============================
 # Gateway & Authentication
@@ -38,37 +56,121 @@ def custom_logout(request):
 # ============================
 
 def leaderboard(request):
-    standings_a = ChampionshipStanding.objects.filter(team__pool="A").select_related('team').order_by(
-        "-total_points", "-gold", "-silver", "-bronze"
+    standings = ChampionshipStanding.objects.select_related('team__pool').order_by(
+        "team__pool__order", "team__pool__code", "-total_points", "-gold", "-silver", "-bronze"
     )
-    standings_b = ChampionshipStanding.objects.filter(team__pool="B").select_related('team').order_by(
-        "-total_points", "-gold", "-silver", "-bronze"
-    )
-    return render(request, "tournament/leaderboard.html", {
-        "standings_a": standings_a,
-        "standings_b": standings_b
-    })
+    pools = {}
+    for s in standings:
+        pools.setdefault(s.team.pool, []).append(s)
+    if request.GET.get("fragment") == "standings":
+        return render(request, "tournament/leaderboard_groups.html", {"pools": list(pools.items())})
+    return render(request, "tournament/leaderboard.html", {"pools": list(pools.items())})
 
 def leaderboard_data(request):
-    standings = ChampionshipStanding.objects.order_by("-total_points", "-gold", "-silver", "-bronze")
-    data = []
-    for i, s in enumerate(standings, start=1):
-        data.append({
-            "rank": i, "team": s.team.name, "points": s.total_points, 
-            "gold": s.gold, "silver": s.silver, "bronze": s.bronze
-        })
-    return JsonResponse(data, safe=False)
+    """Standings JSON, pre-serialized once per tournament revision.
+    A client sending the current ETag gets a 304 from one cache read."""
+    revision = current_revision()
+    etag = etag_for("leaderboard", revision)
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        body, built_at = leaderboard_payload(revision)
+        response = HttpResponse(body, content_type="application/json")
+        response["Last-Modified"] = http_date(built_at)
+        response = get_conditional_response(request, etag=etag, last_modified=built_at, response=response)
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    response["X-Tournament-Revision"] = revision
+    return response
 
 # ============================
 # Fixtures & Big Screen
 # ============================
 
 def fixtures(request):
-    events = Event.objects.prefetch_related("matches").order_by("sport__name", "event_id")
-    bridge_rankings = {}
-    for r in BridgeGroupResult.objects.select_related("event", "first", "second", "third"):
-        bridge_rankings.setdefault(r.event_id, {})[r.group] = r
-    return render(request, "tournament/fixtures.html", {"events": events, "bridge_rankings": bridge_rankings})
+    """Assembled from per-event blocks cached under each event's revision."""
+    if request.GET.get("event", "").isdigit():
+        # One event section, swapped in by the live update script
+        event = get_object_or_404(Event.objects.select_related("sport"), pk=request.GET["event"])
+        return HttpResponse(fixture_sections(request, [event])[0])
+    events = list(Event.objects.select_related("sport").order_by("sport__name", "event_id"))
+    return render(request, "tournament/fixtures.html", {
+        "events": events, "sections": fixture_sections(request, events), "updating_events": pending_event_ids()
+    })
+
+def recompute_status(request):
+    """Polled by the fixtures page while standings are being recalculated."""
+    pending = pending_event_ids()
+    return JsonResponse({"updating": bool(pending), "events": pending})
+
+def metrics(request):
+    """Prometheus scrape endpoint for this process (see tournament.metrics)."""
+    if not request.user.is_staff:
+        raise PermissionDenied("Unauthorized Access.")
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@login_required
+def export_csv(request, name):
+    """One dataset from tournament.exports, streamed row by row."""
+    if not request.user.is_staff:
+        raise PermissionDenied()
+    if name not in DATASETS:
+        raise Http404(f"No export called {name}")
+    rows = stream_csv(name)
+    if isinstance(request, ASGIRequest):
+        rows = in_batches(rows)
+    response = StreamingHttpResponse(rows, content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="mgcl-{name}.csv"'
+    return response
+
+@login_required
+def export_xlsx(request, name):
+    """One dataset, or "all" for a sheet per dataset. openpyxl has to finish the
+    zip before it can be sent, so it is built in a temp file and streamed from there."""
+    if not request.user.is_staff:
+        raise PermissionDenied()
+    if name != "all" and name not in DATASETS:
+        raise Http404(f"No export called {name}")
+    f = tempfile.TemporaryFile()
+    write_workbook(list(DATASETS) if name == "all" else [name], f)
+    f.seek(0)
+    response = FileResponse(f, as_attachment=True, filename=f"mgcl-{name}.xlsx")
+    if isinstance(request, ASGIRequest):
+        # block_size is read per chunk: the ASGI handler raises it after the view returns
+        response.streaming_content = in_batches(iter(lambda: f.read(response.block_size), b""), size=1)
+    return response
+
+def odds(request):
+    """Monte Carlo title odds. Only reads the last stored simulation; the worker refreshes it."""
+    result = SimulationResult.objects.first()
+    if result is None:
+        return render(request, "tournament/odds.html", {"result": None})
+
+    payload = result.payload
+    names = {str(t["id"]): t["name"] for t in payload["teams"]}
+    table = sorted(
+        ({"name": names[tid], **row} for tid, row in payload["championship"].items()),
+        key=lambda r: -r["mean"],
+    )
+    events = [
+        {
+            "name": f"{e['sport']} // {e['name']}",
+            "teams": sorted(
+                ({"name": names[tid], **row} for tid, row in e["teams"].items()),
+                key=lambda r: (-r["gold"], -r["points"]),
+            ),
+        }
+        for e in payload["events"]
+    ]
+    return render(request, "tournament/odds.html", {
+        "result": result, "table": table, "events": events,
+        "positions": range(1, len(payload["teams"]) + 1),
+    })
+
+def group_table_view(request, event_pk):
+    """Public round-robin tables for one event (same query the engine ranks with)."""
+    event = get_object_or_404(Event.objects.select_related("sport"), pk=event_pk)
+    return render(request, "tournament/group_table.html", {"event": event, "tables": group_tables(event)})
 
 # def big_screen(request):
 #     """Optimized for the arena display. Fixes duplicate match entries."""
@@ -102,6 +204,9 @@ def big_screen(request):
     Native Big Screen view for development.
     Groups all matches by their sport name to render sport-by-sport slides.
     """
+    # Read before the matches so the feed re-sends anything saved in between
+    revision = current_revision()
+
     # Order matches by sport name, then date and time
     all_matches = Match.objects.select_related('team1', 'team2', 'event', 'event__sport').order_by('event__sport__name', 'date', 'time')
     
@@ -115,6 +220,29 @@ def big_screen(request):
         
     return render(request, "tournament/big_screen.html", {
         "grouped_fixtures": grouped_fixtures,
+        "revision": revision,
+        "match_count": len(all_matches),
+    })
+
+def big_screen_feed(request):
+    """Cards for the matches changed since ?since=<revision>. When nothing has
+    changed the answer is the revision alone, read from the cache. A client
+    ahead of the counter (the database was restored) gets every card."""
+    since = request.GET.get("since", "")
+    if not since.isdigit():
+        return JsonResponse({"error": "since must be a revision number"}, status=400)
+
+    revision, since = current_revision(), int(since)
+    if since == revision:
+        return JsonResponse({"revision": revision, "cards": {}})
+
+    changed = Match.objects.select_related('team1', 'team2', 'event')
+    if since < revision:
+        changed = changed.filter(revision__gt=since)
+    return JsonResponse({
+        "revision": revision,
+        "count": Match.objects.count(),
+        "cards": {m.id: render_to_string("tournament/big_screen_card.html", {"m": m}) for m in changed},
     })
 
 # ============================
@@ -127,7 +255,7 @@ def captain_dashboard(request):
         my_team = request.user.team_profile
     except AttributeError:
         return render(request, "tournament/captain_error.html", {"message": "You are not linked to a team."})
-    my_matches = Match.objects.filter((Q(team1=my_team) | Q(team2=my_team)), completed=False).select_related('event', 'event__sport').order_by('date', 'time')
+    my_matches = Match.objects.filter((Q(team1=my_team) | Q(team2=my_team)), completed=False).select_related('event__sport', 'team1', 'team2').order_by('date', 'time')
     return render(request, "tournament/captain_dashboard.html", {"team": my_team, "matches": my_matches})
 
 @login_required
@@ -135,7 +263,7 @@ def select_squad(request, match_id):
     """Handles Official Players + Guest Players with Auto-Update and Validation."""
     match = get_object_or_404(Match, id=match_id)
     my_team = request.user.team_profile
-    if match.team1 != my_team and match.team2 != my_team:
+    if my_team.pk not in (match.team1_id, match.team2_id):
         return redirect('captain_dashboard')
     
     sport_name = match.event.sport.name
@@ -153,7 +281,7 @@ def select_squad(request, match_id):
         
         if total_selected > req_count:
             messages.error(request, f"Too many players! This match only requires {req_count} player(s).")
-            current_squad = match.team1_players if match.team1 == my_team else match.team2_players
+            current_squad = match.team1_players if match.team1_id == my_team.pk else match.team2_players
             return render(request, "tournament/select_squad.html", {
                 "match": match, "roster": roster, "req_count": req_count, "current_squad": current_squad or ""
             })
@@ -165,7 +293,7 @@ def select_squad(request, match_id):
             player_names.append(guest_name)
         
         final_squad = " & ".join(player_names)
-        if match.team1 == my_team: match.team1_players = final_squad
+        if match.team1_id == my_team.pk: match.team1_players = final_squad
         else: match.team2_players = final_squad
         match.save()
 
@@ -178,7 +306,7 @@ def select_squad(request, match_id):
             if other_match:
                 remaining_players = roster.exclude(id__in=selected_ids)
                 rem_squad = " & ".join([p.name for p in remaining_players])
-                if other_match.team1 == my_team: other_match.team1_players = rem_squad
+                if other_match.team1_id == my_team.pk: other_match.team1_players = rem_squad
                 else: other_match.team2_players = rem_squad
                 other_match.save()
                 messages.info(request, "Other match squad updated automatically.")
@@ -186,7 +314,7 @@ def select_squad(request, match_id):
         messages.success(request, f"Squad saved for {match.event.name}!")
         return redirect('captain_dashboard')
 
-    current_squad = match.team1_players if match.team1 == my_team else match.team2_players
+    current_squad = match.team1_players if match.team1_id == my_team.pk else match.team2_players
     return render(request, "tournament/select_squad.html", {
         "match": match, "roster": roster, "req_count": req_count, "current_squad": current_squad or ""
     })
@@ -207,8 +335,9 @@ def score_entry(request, match_id):
     if "swimming" in sport_name: return swimming_score_entry(request, match)
     if "bridge" in sport_name and "all teams" in rule_lower: return bridge_group_score_entry(request, match)
 
-    if match.team1 and match.team2:
-        team1_name, team2_name = match.team1.name, match.team2.name
+    team1, team2 = match.team1, match.team2
+    if team1 and team2:
+        team1_name, team2_name = team1.name, team2.name
     elif "vs" in rule_lower:
         parts = match.opponent_rule.split("vs")
         team1_name, team2_name = parts[0].strip(), parts[1].strip()
@@ -218,19 +347,24 @@ def score_entry(request, match_id):
     if request.method == "POST":
         try:
             s1, s2 = int(request.POST.get("team1_score")), int(request.POST.get("team2_score"))
-            match.team1_score, match.team2_score = s1, s2
-            match.completed = True
-            match.winner = team1_name if s1 > s2 else team2_name
-            match.save()
-            update_championship(match.event)
-            return redirect(reverse("fixtures") + f"#match-{match.id}")
-        except:
+        except (TypeError, ValueError):
             return render(request, "tournament/score_entry.html", {"match": match, "team1_name": team1_name, "team2_name": team2_name, "error": "Invalid Score."})
 
+        retry_on_locked(record_match_score)(match, s1, s2, team1_name, team2_name)
+        return redirect(reverse("fixtures") + f"#match-{match.id}")
+
     return render(request, "tournament/score_entry.html", {"match": match, "team1_name": team1_name, "team2_name": team2_name})
 
+def record_match_score(match, s1, s2, team1_name, team2_name):
+    """Saves a head-to-head result and queues the event's recompute."""
+    match.team1_score, match.team2_score = s1, s2
+    if s1 > s2: match.record_result(match.team1, match.team2, label=team1_name)
+    else: match.record_result(match.team2, match.team1, label=team2_name)
+    match.save()
+    enqueue_recompute(match.event)
+
 def bridge_group_score_entry(request, match):
-    teams = Team.objects.filter(code__in=["T1", "T2", "T3"]) if match.group == "A" else Team.objects.filter(code__in=["T4", "T5", "T6"])
+    teams = Team.objects.filter(pool_id=match.group).order_by("code")
     initial_raw_scores = {}
     existing_res = BridgeGroupResult.objects.filter(event=match.event, group=match.group).first()
     if existing_res:
@@ -243,10 +377,13 @@ def bridge_group_score_entry(request, match):
             if val: scores_data.append((team, float(val)))
         scores_data.sort(key=lambda x: x[1], reverse=True)
         if len(scores_data) >= 3:
-            BridgeGroupResult.objects.update_or_create(event=match.event, group=match.group, defaults={"first": scores_data[0][0], "second": scores_data[1][0], "third": scores_data[2][0], "first_score": scores_data[0][1], "second_score": scores_data[1][1], "third_score": scores_data[2][1]})
-            match.completed, match.winner = True, f"1st: {scores_data[0][0].name}"
-            match.save()
-            update_championship(match.event)
+            @retry_on_locked
+            def save():
+                BridgeGroupResult.objects.update_or_create(event=match.event, group=match.group, defaults={"first": scores_data[0][0], "second": scores_data[1][0], "third": scores_data[2][0], "first_score": scores_data[0][1], "second_score": scores_data[1][1], "third_score": scores_data[2][1]})
+                match.record_result(scores_data[0][0], label=f"1st: {scores_data[0][0].name}")
+                match.save()
+                enqueue_recompute(match.event)
+            save()
             return redirect(reverse("fixtures") + f"#match-{match.id}")
 
     return render(request, "tournament/bridge_score_entry.html", {"match": match, "teams": teams, "initial_raw_scores": initial_raw_scores})
@@ -255,10 +392,14 @@ def swimming_score_entry(request, match):
     all_teams = Team.objects.all().order_by("name")
     if request.method == "POST":
         res_teams = [Team.objects.get(id=request.POST.get(f"rank_{i}")) for i in range(1, 7)]
-        SwimmingResult.objects.update_or_create(event=match.event, defaults={"first": res_teams[0], "second": res_teams[1], "third": res_teams[2], "fourth": res_teams[3], "fifth": res_teams[4], "sixth": res_teams[5]})
-        match.completed, match.winner = True, f"Gold: {res_teams[0].name}"
-        match.save()
-        update_championship(match.event)
+
+        @retry_on_locked
+        def save():
+            SwimmingResult.objects.update_or_create(event=match.event, defaults={"first": res_teams[0], "second": res_teams[1], "third": res_teams[2], "fourth": res_teams[3], "fifth": res_teams[4], "sixth": res_teams[5]})
+            match.record_result(res_teams[0], label=f"Gold: {res_teams[0].name}")
+            match.save()
+            enqueue_recompute(match.event)
+        save()
         return redirect(reverse("fixtures") + f"#match-{match.id}")
     return render(request, "tournament/swimming_score_entry.html", {"match": match, "teams": all_teams, "existing": SwimmingResult.objects.filter(event=match.event).first()})
 
@@ -302,51 +443,39 @@ def manual_leaderboard_entry(request):
     
     if request.method == "POST":
         event_id = request.POST.get("event_id")
-        
-        # --- Handle Penalty Saving ---
-        if event_id == "penalty":
-            for team in teams:
-                val = request.POST.get(f"penalty_{team.code}")
-                standing, _ = ChampionshipStanding.objects.get_or_create(team=team)
-                standing.penalty_points = int(val) if val else 0
-                standing.total_points = standing.gross_total - standing.penalty_points
-                standing.save()
-        
-        # --- Handle Event Saving ---
-        else:
-            result_obj = get_object_or_404(ManualEventResult, event_id=event_id)
-            new_data = {t.code: {"pos": request.POST.get(f"pos_{t.code}"), 
-                                 "pts": int(request.POST.get(f"pts_{t.code}") or 0)} for t in teams}
-            result_obj.results_data = new_data
-            result_obj.save()
-
-        # --- Recalculate Totals & Ranks for Persistence ---
-        all_results = ManualEventResult.objects.all()
-        standings_to_rank = []
-        
-        for team in teams:
-            gross = sum(int(r.results_data.get(team.code, {}).get('pts', 0)) for r in all_results)
-            standing, _ = ChampionshipStanding.objects.get_or_create(team=team)
-            standing.gross_total = gross
-            standing.total_points = standing.gross_total - standing.penalty_points
-            standing.save()
-            standings_to_rank.append(standing)
-        
-        # Auto-Ranking Logic
-        standings_to_rank.sort(key=lambda x: x.total_points, reverse=True)
-        for index, s in enumerate(standings_to_rank):
-            s.rank = index + 1
-            s.save()
 
-        return JsonResponse({"status": "success"})
+        @retry_on_locked   # one transaction, rerun if the writer stays locked
+        def save():
+            penalties = None
+
+            # --- Handle Penalty Saving ---
+            if event_id == "penalty":
+                penalties = {t.code: int(request.POST.get(f"penalty_{t.code}") or 0) for t in teams}
+                bump_revision("manual")
+
+            # --- Handle Event Saving ---
+            else:
+                result_obj = get_object_or_404(ManualEventResult, event_id=event_id)
+                new_data = {t.code: {"pos": request.POST.get(f"pos_{t.code}"), 
+                                     "pts": int(request.POST.get(f"pts_{t.code}") or 0)} for t in teams}
+                result_obj.results_data = new_data
+                result_obj.save()
+
+            # --- Recalculate Totals & Ranks (one pass, one bulk_update) ---
+            totals = rank_manual_standings(penalties)
+            # Registered after the revision bump, so it renders under the new revision
+            transaction.on_commit(rebuild_championship_table)
+            return totals
+        return JsonResponse({"status": "success", "totals": save()})
 
     # --- Page Load Logic ---
     results = ManualEventResult.objects.all()
-    standings_map = {}
-    for team in teams:
-        # Safety check: ensure every team has a map entry
-        s, _ = ChampionshipStanding.objects.get_or_create(team=team)
-        standings_map[team.code] = s
+    standings = {s.team_id: s for s in ChampionshipStanding.objects.all()}
+    # Safety check: ensure every team has a map entry
+    missing = [ChampionshipStanding(team=t) for t in teams if t.pk not in standings]
+    for s in ChampionshipStanding.objects.bulk_create(missing):
+        standings[s.team_id] = s
+    standings_map = {team.code: standings[team.pk] for team in teams}
 
     return render(request, "tournament/manual_entry.html", {
         "teams": teams, 
@@ -354,21 +483,93 @@ def manual_leaderboard_entry(request):
         "standings_map": standings_map
     })
 
-from django.views.decorators.cache import cache_page
 # REMOVED @login_required to make this public
-@cache_page(30) # Cache the standings for 30 seconds
 def manual_championship_view(request):
-    teams = Team.objects.all().order_by('code')
-    results = ManualEventResult.objects.all()
-    
-    # Critical: Create the map for the template to access Gross/Penalty/Rank
-    standings_map = {}
-    for team in teams:
-        standing, _ = ChampionshipStanding.objects.get_or_create(team=team)
-        standings_map[team.code] = standing
+    """The table itself is a snapshot (tournament.snapshots) built once per
+    tournament revision, so anonymous viewers cost one cache read."""
+    if request.GET.get("fragment") == "table":
+        return HttpResponse(championship_table())
+    return render(request, "tournament/manual_view.html", {"table": championship_table()})
 
-    return render(request, "tournament/manual_view.html", {
-        "teams": teams, 
-        "results": results,
-        "standings_map": standings_map
-    })
\ No newline at end of file
+# ============================
+# Paper Scoresheets
+# ============================
+
+@login_required
+def scoresheet_queue(request):
+    """Scans staged by `manage.py ingest_scoresheets`, waiting for staff."""
+    if not request.user.is_staff:
+        raise PermissionDenied()
+    scans = (
+        ScoresheetScan.objects.filter(status__in=[ScoresheetScan.PENDING, ScoresheetScan.FAILED])
+        .select_related("match__event__sport", "match__team1", "match__team2")
+    )
+    return render(request, "tournament/scoresheet_queue.html", {"scans": scans})
+
+@login_required
+def scoresheet_review(request, scan_id):
+    """Confirms (with the scores as corrected on the form) or rejects a scan.
+    A match that already has a result is only overwritten when the form says
+    so (the "replace" box the queue shows for it)."""
+    if not request.user.is_staff:
+        raise PermissionDenied()
+    if request.method != "POST":
+        return redirect("scoresheet_queue")
+    scan = get_object_or_404(ScoresheetScan.objects.select_related("match__event__sport", "match__team1", "match__team2"), pk=scan_id)
+    if scan.status not in (ScoresheetScan.PENDING, ScoresheetScan.FAILED):
+        messages.error(request, f"{scan.source} was already {scan.get_status_display().lower()}.")
+        return redirect("scoresheet_queue")
+    scan.reviewed_by, scan.reviewed_at = request.user, timezone.now()
+
+    if request.POST.get("action") == "reject":
+        scan.status = ScoresheetScan.REJECTED
+        scan.save(update_fields=["status", "reviewed_by", "reviewed_at"])
+        messages.info(request, f"{scan.source} rejected.")
+        return redirect("scoresheet_queue")
+
+    match = scan.match
+    try:
+        s1, s2 = int(request.POST.get("team1_score")), int(request.POST.get("team2_score"))
+    except (TypeError, ValueError):
+        messages.error(request, f"{scan.source}: enter both scores.")
+        return redirect("scoresheet_queue")
+    if match is None or not (match.team1 and match.team2):
+        messages.error(request, f"{scan.source}: the match's teams are not decided yet.")
+        return redirect("scoresheet_queue")
+    if match.event.is_locked:
+        messages.error(request, f"{match.event.name} is locked.")
+        return redirect("scoresheet_queue")
+    if match.completed and not request.POST.get("replace"):
+        messages.error(request, f"{match.event.name} match {match.match_no} is already scored "
+                                f"{match.team1_score}-{match.team2_score}; tick Replace to overwrite it.")
+        return redirect("scoresheet_queue")
+
+    @retry_on_locked
+    def confirm():
+        # Claim the scan first: of two reviewers confirming it at once, only one writes the score
+        claimed = ScoresheetScan.objects.filter(pk=scan.pk, status=ScoresheetScan.PENDING).update(
+            team1_score=s1, team2_score=s2, status=ScoresheetScan.CONFIRMED,
+            reviewed_by=scan.reviewed_by, reviewed_at=scan.reviewed_at,
+        )
+        if claimed:
+            record_match_score(match, s1, s2, match.team1.name, match.team2.name)
+        return claimed
+    if not confirm():
+        messages.error(request, f"{scan.source} was reviewed by someone else in the meantime.")
+        return redirect("scoresheet_queue")
+    messages.success(request, f"{match.event.name} match {match.match_no}: {s1}-{s2} saved.")
+    return redirect("scoresheet_queue")
+
+@login_required
+def scoresheet_print(request):
+    """PDF of blank sheets for every open match, or one event's with ?event=<pk>."""
+    if not request.user.is_staff:
+        raise PermissionDenied()
+    matches = scoresheets.printable_matches()
+    name = "mgcl-scoresheets"
+    if request.GET.get("event"):
+        event = get_object_or_404(Event, pk=request.GET["event"])
+        matches, name = matches.filter(event=event), f"{name}-{event.event_id}"
+    response = HttpResponse(scoresheets.sheets_pdf(matches), content_type="application/pdf")
+    response["Content-Disposition"] = f'attachment; filename="{name}.pdf"'
+    return response